@@ -0,0 +1,73 @@
+"""
+Compare two benchmarks.load result files and fail on regressions.
+
+    python -m benchmarks.compare baseline.json results.json --threshold 0.10
+
+Results are matched by scenario and params. Metrics ending in _per_s are
+better higher, every other numeric metric better lower; a metric worse
+than the baseline by more than the threshold (a fraction) is a
+regression, and the exit status is 1 if there is any.
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Tuple
+
+Key = Tuple[str, str]
+
+
+def load_results(path: str) -> Dict[Key, Dict[str, Any]]:
+    with open(path) as results_file:
+        report = json.load(results_file)
+    return {
+        (result["scenario"], json.dumps(result["params"], sort_keys=True)): result["metrics"]
+        for result in report["results"]
+    }
+
+
+def compare(baseline: Dict[Key, Dict[str, Any]], current: Dict[Key, Dict[str, Any]],
+            threshold: float) -> List[Dict[str, Any]]:
+    """
+    One row per numeric metric present in both files, flagged when it regressed.
+    """
+    rows = []
+    for key in sorted(baseline.keys() & current.keys()):
+        for metric, before in baseline[key].items():
+            after = current[key].get(metric)
+            if isinstance(before, bool) or not isinstance(before, (int, float)) or not isinstance(after, (int, float)):
+                continue
+            if before == 0:
+                continue
+            change = (after - before) / before
+            worse = -change if metric.endswith("_per_s") else change
+            rows.append({
+                "scenario": key[0],
+                "params": key[1],
+                "metric": metric,
+                "baseline": before,
+                "current": after,
+                "change": change,
+                "regression": worse > threshold,
+            })
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative slowdown (default 0.10)")
+    args = parser.parse_args()
+
+    rows = compare(load_results(args.baseline), load_results(args.current), args.threshold)
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        print(f"{row['scenario']:>9} {row['params']} {row['metric']:<20} "
+              f"{row['baseline']:>12.2f} -> {row['current']:>12.2f} {row['change']:+7.1%} {flag}")
+    regressions = sum(row["regression"] for row in rows)
+    print(f"{len(rows)} metrics compared, {regressions} regression(s) beyond {args.threshold:.0%}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Compare the dashboard serialization paths.
+
+    python -m benchmarks.serialization --tickets 1000 --history 5 --alerts 5
+
+"model" reproduces the regular /dashboard path: ORM objects with
+selectinload, TicketSchema.from_ticket() per ticket, then FastAPI's
+response_model pass (dump, re-validate, serialize). "fast" is the
+?fast=true path: row tuples serialized with pydantic-core.
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src import crud, models, schemas, serialization
+from src.codes import codebook
+from src.database import Base
+
+
+def populate(session, tickets: int, history: int, alerts: int) -> None:
+    codebook.register({("priority", "high"), ("customer_tier", "gold"), ("status", "open"), ("sla_type", "response")})
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    for i in range(tickets):
+        created = start + timedelta(minutes=i)
+        session.add(models.Ticket(
+            id=f"bench-{i}", priority="high", customer_tier="gold",
+            created_at=created, updated_at=created, escalation_level=alerts,
+        ))
+        for h in range(history):
+            session.add(models.TicketStatusHistory(
+                ticket_id=f"bench-{i}", status="open", timestamp=created + timedelta(seconds=h)
+            ))
+        for a in range(alerts):
+            session.add(models.Alert(
+                ticket_id=f"bench-{i}", sla_type="response", state=models.SLAState.ALERT,
+                created_at=created + timedelta(minutes=a),
+                details={"elapsed_minutes": 30.0 + a, "target_minutes": 30, "percent_used": 1.0 + a / 30},
+            ))
+    session.commit()
+
+
+def model_path(session, limit: int) -> bytes:
+    adapter = TypeAdapter(List[schemas.TicketSchema])
+    tickets, _ = crud.paginate_tickets(crud.dashboard_query(session), limit)
+    result = [schemas.TicketSchema.from_ticket(t) for t in tickets]
+    # FastAPI's response_model handling: dump, validate again, serialize
+    return adapter.dump_json(adapter.validate_python([m.model_dump() for m in result]))
+
+
+def fast_path(session, limit: int) -> bytes:
+    query = serialization.ticket_rows(crud.dashboard_query(session, include=()))
+    rows, _ = crud.paginate_tickets(query, limit)
+    return serialization.dump_tickets_json(session, rows)
+
+
+def measure(fn, session, limit: int, repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        session.expunge_all()
+        started = time.perf_counter()
+        fn(session, limit)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=int, default=1000)
+    parser.add_argument("--history", type=int, default=5, help="status history rows per ticket")
+    parser.add_argument("--alerts", type=int, default=5, help="alerts per ticket")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    codebook.use(engine)
+    session = sessionmaker(bind=engine)()
+    populate(session, args.tickets, args.history, args.alerts)
+
+    assert model_path(session, args.tickets) == fast_path(session, args.tickets)
+    results = {}
+    for name, fn in (("model", model_path), ("fast", fast_path)):
+        timings = measure(fn, session, args.tickets, args.repeat)
+        results[name] = statistics.median(timings)
+        print(f"{name:>5}: median {results[name]:8.1f} ms  (min {min(timings):.1f} ms, {args.repeat} runs)")
+    print(f"speedup: {results['model'] / results['fast']:.1f}x for {args.tickets} tickets "
+          f"with {args.history} history rows and {args.alerts} alerts each")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Measure cold-start cost: importing the app in a fresh interpreter, then
+starting each component the lifespan starts (scheduler excluded).
+
+    python -m benchmarks.startup --runs 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+IMPORT_SCRIPT = "import time; t = time.perf_counter(); import src.main; print((time.perf_counter() - t) * 1000)"
+
+COMPONENTS_SCRIPT = """
+from src.broadcast import broadcast_component
+from src.config import config_component
+from src.database import schema_component
+for component in (schema_component, config_component, broadcast_component):
+    component.ensure_started()
+    print(component.name, component.startup_ms)
+"""
+
+
+def run(script: str, env: dict) -> str:
+    result = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True)
+    return result.stdout
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp}/startup.sqlite3")
+        timings = [float(run(IMPORT_SCRIPT, env).split()[-1]) for _ in range(args.runs)]
+        print(f"import src.main: median {statistics.median(timings):.1f} ms, min {min(timings):.1f} ms "
+              f"({args.runs} runs)")
+        for line in run(COMPONENTS_SCRIPT, env).splitlines():
+            name, ms = line.split()
+            print(f"start {name}: {float(ms):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Seeded synthetic ticket events for the benchmarks.
+
+Tiers and priorities are drawn from weighted mixes ("gold:0.2,silver:0.8");
+creation times are spaced 1/rate seconds apart and end at `now`, so the
+event rate decides how much of its SLA each ticket has used.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert
+
+from src import models
+from src.codes import codebook
+
+Mix = List[Tuple[str, float]]
+
+
+def parse_mix(spec: str) -> Mix:
+    """
+    "gold:0.2,silver:0.8" -> [("gold", 0.2), ("silver", 0.8)]; weights default to 1.
+    """
+    mix = []
+    for part in spec.split(","):
+        name, _, weight = part.strip().partition(":")
+        mix.append((name, float(weight) if weight else 1.0))
+    return mix
+
+
+class TicketGenerator:
+    def __init__(
+            self,
+            tiers: Mix,
+            priorities: Mix,
+            rate: float,
+            seed: int = 0,
+            prefix: str = "bench",
+            now: Optional[datetime] = None
+    ):
+        self.tiers = tiers
+        self.priorities = priorities
+        self.rate = rate
+        self.prefix = prefix
+        self.now = now or datetime.now(timezone.utc)
+        self._random = random.Random(seed)
+
+    def events(self, start: int, stop: int, total: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Events for tickets start..stop-1 of `total` (default stop), as POST /tickets JSON.
+        """
+        total = total or stop
+        tier_names, tier_weights = zip(*self.tiers)
+        priority_names, priority_weights = zip(*self.priorities)
+        for i in range(start, stop):
+            created = self.now - timedelta(seconds=(total - i) / self.rate)
+            yield {
+                "id": f"{self.prefix}-{i}",
+                "priority": self._random.choices(priority_names, priority_weights)[0],
+                "customer_tier": self._random.choices(tier_names, tier_weights)[0],
+                "created_at": created.isoformat(),
+                "updated_at": created.isoformat(),
+                "status": "open",
+            }
+
+
+def populate(session, generator: TicketGenerator, start: int, stop: int, total: int, chunk: int = 10000) -> None:
+    """
+    Bulk-insert tickets start..stop-1 with one status history row each,
+    bypassing the API (a million tickets through POST /tickets takes hours).
+    """
+    codes = {("status", "open")}
+    codes.update(("customer_tier", tier) for tier, _ in generator.tiers)
+    codes.update(("priority", priority) for priority, _ in generator.priorities)
+    codebook.register(codes)
+
+    for offset in range(start, stop, chunk):
+        tickets, history = [], []
+        for event in generator.events(offset, min(offset + chunk, stop), total):
+            created = datetime.fromisoformat(event["created_at"])
+            tickets.append({
+                "id": event["id"],
+                "priority": event["priority"],
+                "customer_tier": event["customer_tier"],
+                "status": event["status"],
+                "created_at": created,
+                "updated_at": created,
+                "escalation_level": 0,
+                "sla_state": models.SLAState.OK,
+            })
+            history.append({"ticket_id": event["id"], "status": event["status"], "timestamp": created})
+        session.execute(insert(models.Ticket), tickets)
+        session.execute(insert(models.TicketStatusHistory), history)
+        session.commit()
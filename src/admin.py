@@ -0,0 +1,148 @@
+import hmac
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query
+from fastapi.responses import FileResponse
+
+from src import settings
+from src.archive import archive_status
+from src.backtest import run_backtest
+from src.cache import response_cache
+from src.config import SLAConfigError, get_reload_status
+from src.database import engine, pool_status
+from src.hotset import hot_set
+from src.profiling import MODES, profiler
+from src.scheduler import JOB_NAMES
+
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    The admin endpoints do not exist unless ADMIN_ENABLED, and with
+    ADMIN_TOKEN set a request must send it as X-Admin-Token.
+    """
+    if not settings.ADMIN_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if settings.ADMIN_TOKEN and not hmac.compare_digest(
+            (x_admin_token or "").encode(), settings.ADMIN_TOKEN.encode()
+    ):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+# Longest window POST /admin/backtest replays in a request worker; longer
+# ones go through the CLI (python -m src.backtest)
+BACKTEST_MAX_DAYS = 365
+
+
+@router.get("/archive")
+async def archive_runs() -> Dict[str, Any]:
+    """
+    Retention settings and the most recent runs that moved rows to the archive.
+    """
+    return {
+        "retention_days": settings.RETENTION_DAYS,
+        "archive_dir": settings.ARCHIVE_DIR,
+        "runs": archive_status(),
+    }
+
+
+@router.post("/backtest")
+def backtest_config(
+        candidate: Dict[str, Any] = Body(..., description="Candidate SLA config, same shape as sla_config.yaml"),
+        days: int = Query(90, ge=1, le=BACKTEST_MAX_DAYS, description="Window ending at `end`"),
+        start: Optional[datetime] = Query(None, description="Start of the window (overrides days)"),
+        end: Optional[datetime] = Query(None, description="End of the window (default now)"),
+) -> Dict[str, Any]:
+    """
+    Alerts and breaches the candidate config would have produced for the
+    tickets created in the window, next to those of the config in use.
+    Read-only: nothing is alerted or written. Windows are limited to
+    BACKTEST_MAX_DAYS.
+    """
+    if start is not None:
+        window_end = end or datetime.now(timezone.utc)
+        # naive values are UTC, as stored
+        if (window_end.replace(tzinfo=window_end.tzinfo or timezone.utc)
+                - start.replace(tzinfo=start.tzinfo or timezone.utc)).days > BACKTEST_MAX_DAYS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Window longer than {BACKTEST_MAX_DAYS} days; use python -m src.backtest",
+            )
+    try:
+        return run_backtest(candidate, start=start, end=end, days=days)
+    except SLAConfigError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@router.get("/cache")
+async def cache_stats() -> Dict[str, Any]:
+    """
+    Hit/miss counters and size of the in-process response cache.
+    """
+    return response_cache.stats()
+
+
+@router.get("/config")
+async def config_status() -> Dict[str, Any]:
+    """
+    SLA config version in use, reload counters and the last reload error.
+    """
+    return get_reload_status()
+
+
+@router.get("/db")
+async def db_pool_status() -> Dict[str, Any]:
+    """
+    Connection pool occupancy and checkout wait statistics.
+    """
+    return pool_status(engine)
+
+
+@router.get("/hotset")
+async def hot_set_stats() -> Dict[str, Any]:
+    """
+    Size, hit rate and last verification drift of the active ticket hot set.
+    """
+    return hot_set.stats()
+
+
+@router.post("/profile")
+async def arm_profiler(
+        requests: int = Query(0, ge=0, le=1000, description="Profile the next N requests"),
+        job: List[str] = Query([], description="Profile the next run of these scheduler jobs"),
+        mode: str = Query("cprofile", description="cprofile (pstats) or sample (collapsed stacks)"),
+) -> Dict[str, Any]:
+    """
+    Arm the profiler for the next `requests` requests and/or the next run
+    of each `job`; the results are listed at GET /admin/profiles.
+    """
+    unknown = set(job) - set(JOB_NAMES)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown job(s): {', '.join(sorted(unknown))}")
+    if mode not in MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown mode {mode!r}; expected one of {', '.join(MODES)}")
+    return profiler.arm(requests, tuple(job), mode)
+
+
+@router.get("/profiles")
+async def list_profiles() -> Dict[str, Any]:
+    """
+    What the profiler is armed for, and the stored profiles, newest first.
+    """
+    return {"armed": profiler.status(), "profiles": profiler.profiles()}
+
+
+@router.get("/profiles/{name}")
+async def download_profile(name: str) -> FileResponse:
+    """
+    One stored profile: pstats (load with pstats.Stats) or collapsed stacks
+    (feed to flamegraph.pl or speedscope).
+    """
+    path = profiler.path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    media_type = "text/plain" if name.endswith(".collapsed") else "application/octet-stream"
+    return FileResponse(path, media_type=media_type, filename=name)
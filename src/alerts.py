@@ -1,27 +1,20 @@
 import logging
+import time
 from datetime import timezone
 from typing import Dict, Any
 
-import httpx
-
-from src import crud, models, settings
-from src.database import SessionLocal
-from src.ws import manager
+from src import crud, metrics, models, settings
+from src.broadcast import broadcaster
+from src.database import session_scope
 
 logger = logging.getLogger(__name__)
 
-db = SessionLocal()
-
 
-def send_slack_notification(ticket: models.Ticket, alert: models.Alert) -> None:
+def slack_payload(ticket: models.Ticket, alert: models.Alert) -> Dict[str, Any]:
     """
-    Send a structured Slack message for the given alert.
+    Structured Slack message for the given alert.
     """
-    if not settings.SLACK_WEBHOOK_URL:
-        logger.warning("SLACK_WEBHOOK_URL not set; skipping Slack notification.")
-        return
-
-    payload = {
+    return {
         "text": f"SLA {alert.state.value.upper()} for Ticket {ticket.id}",
         "attachments": [
             {
@@ -73,6 +66,18 @@ def send_slack_notification(ticket: models.Ticket, alert: models.Alert) -> None:
         ],
     }
 
+
+def send_slack_notification(payload: Dict[str, Any], alert_id: int) -> None:
+    """
+    Post a message built by slack_payload() to the Slack webhook.
+    """
+    if not settings.SLACK_WEBHOOK_URL:
+        logger.warning("SLACK_WEBHOOK_URL not set; skipping Slack notification.")
+        return
+
+    import httpx
+
+    started = time.perf_counter()
     try:
         response = httpx.post(
             settings.SLACK_WEBHOOK_URL,
@@ -80,9 +85,12 @@ def send_slack_notification(ticket: models.Ticket, alert: models.Alert) -> None:
             timeout=settings.SLACK_TIMEOUT,
         )
         response.raise_for_status()
-        logger.info(f"Slack notification sent for alert id={alert.id}")
+        logger.info(f"Slack notification sent for alert id={alert_id}")
     except Exception as exc:
+        metrics.slack_send_failures.inc()
         logger.error(f"Failed to send Slack notification: {exc}")
+    finally:
+        metrics.slack_send_duration.observe(time.perf_counter() - started)
 
 
 def process_alert(
@@ -93,38 +101,38 @@ def process_alert(
 ) -> None:
     """
     Persist a new alert, bump escalation, notify Slack,
-    and broadcast synchronously over WebSocket.
+    and publish it to every worker's WebSocket clients.
     """
     try:
-        alert = crud.create_alert(db, ticket_id, sla_type, state, details)
-        ticket = crud.get_ticket(db, ticket_id)
-
-        # Structured business logging
-        logger.info({
-            "correlation_id": None,  # Can be propagated via context if available
-            "ticket_id": ticket_id,
-            "operation": "alert",
-            "sla_type": sla_type,
-            "state": state.value,
-            "escalation_level": ticket.escalation_level,
-            "details": details
-        })
+        with session_scope() as db:
+            alert = crud.create_alert(db, ticket_id, sla_type, state, details)
+            ticket = crud.get_ticket(db, ticket_id)
 
-        send_slack_notification(ticket, alert)
+            # Structured business logging
+            logger.info({
+                "ticket_id": ticket_id,
+                "operation": "alert",
+                "sla_type": sla_type,
+                "state": state.value,
+                "escalation_level": ticket.escalation_level,
+                "details": details
+            })
 
-        message = {
-            "ticket_id": ticket.id,
-            "sla_type": alert.sla_type,
-            "state": alert.state.value,
-            "details": alert.details,
-            "timestamp": alert.created_at.astimezone(timezone.utc).isoformat(),
-        }
+            payload = slack_payload(ticket, alert)
+            message = {
+                "alert_id": alert.id,
+                "ticket_id": ticket.id,
+                "sla_type": alert.sla_type,
+                "state": alert.state.value,
+                "details": alert.details,
+                "timestamp": alert.created_at.astimezone(timezone.utc).isoformat(),
+            }
 
-        # synchronous broadcast
-        manager.broadcast_sync(message)
+        # the blocking Slack call holds no connection or transaction
+        send_slack_notification(payload, message["alert_id"])
+        metrics.alerts_emitted.inc(sla_type, state.value)
+        # fan out to all workers through the broadcast backbone
+        broadcaster.publish(message)
 
     except Exception:
-        db.rollback()
         logger.exception(f"Error processing alert for ticket {ticket_id}")
-    finally:
-        db.close()
\ No newline at end of file
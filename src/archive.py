@@ -0,0 +1,210 @@
+import gzip
+import json
+import logging
+import os
+import zlib
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import exists, select
+from sqlalchemy.orm import aliased
+
+from src import models, schemas, settings
+from src.cache import response_cache
+from src.crud import TICKET_CHILDREN
+from src.database import session_scope
+
+logger = logging.getLogger(__name__)
+
+
+def archive_expired_rows(
+        retention_days: Optional[int] = None,
+        archive_dir: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        now: Optional[datetime] = None
+) -> Dict[str, int]:
+    """
+    Move status history rows and alerts older than `retention_days` out of
+    the hot tables into gzip JSONL files under `archive_dir`, so the tables
+    stay the size of the retention window. Returns the rows moved per
+    relation. A ticket's latest status history row is its current status
+    and always stays, however old.
+
+    Rows are moved oldest first, `batch_size` at a time: each batch is
+    appended and fsynced to its archive files before it is deleted, so a
+    crash can duplicate rows in the archive (readers drop duplicates) but
+    never lose them.
+    """
+    retention_days = settings.RETENTION_DAYS if retention_days is None else retention_days
+    archive_dir = archive_dir or settings.ARCHIVE_DIR
+    batch_size = batch_size or settings.RETENTION_BATCH_SIZE
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=retention_days)
+
+    moved = {}
+    for relation, (model, time_column) in TICKET_CHILDREN.items():
+        moved[relation] = 0
+        while True:
+            with session_scope() as db:
+                query = db.query(model).filter(time_column < cutoff)
+                if model is models.TicketStatusHistory:
+                    query = query.filter(_superseded_status())
+                rows = (
+                    query
+                    .order_by(time_column, model.id)
+                    .limit(batch_size)
+                    .all()
+                )
+                if not rows:
+                    break
+                _append_rows(
+                    archive_dir, model.__tablename__, time_column.key, [_row_to_dict(model, row) for row in rows]
+                )
+                ticket_ids = {row.ticket_id for row in rows}
+                db.query(model).filter(model.id.in_([row.id for row in rows])).delete()
+            for ticket_id in ticket_ids:
+                response_cache.invalidate_ticket(ticket_id)
+            moved[relation] += len(rows)
+            if len(rows) < batch_size:
+                break
+
+    if any(moved.values()):
+        # Moves the ETag fingerprints of every ticket and dashboard page
+        with session_scope() as db:
+            db.add(models.ArchiveRun(
+                cutoff=cutoff,
+                status_history_rows=moved["status_history"],
+                alert_rows=moved["alerts"],
+                finished_at=datetime.now(timezone.utc),
+            ))
+        logger.info({
+            "operation": "archive",
+            "cutoff": cutoff.isoformat(),
+            "rows": moved,
+        })
+    return moved
+
+
+def _superseded_status():
+    # a later row of the same ticket exists (history is appended in order);
+    # probes ix_ticket_status_history_ticket_id_timestamp
+    newer = aliased(models.TicketStatusHistory)
+    return exists().where(
+        newer.ticket_id == models.TicketStatusHistory.ticket_id,
+        newer.id > models.TicketStatusHistory.id,
+    )
+
+
+def read_archived(relation: str, ticket_id: str, archive_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Archived rows of one ticket relationship, oldest first. Reads one
+    shard file per archived month.
+    """
+    model, time_column = TICKET_CHILDREN[relation]
+    table_dir = os.path.join(archive_dir or settings.ARCHIVE_DIR, model.__tablename__)
+    if not os.path.isdir(table_dir):
+        return []
+
+    shard = _shard_name(ticket_id)
+    rows: Dict[int, Dict[str, Any]] = {}
+    for month in sorted(os.listdir(table_dir)):
+        path = os.path.join(table_dir, month, shard)
+        if not os.path.exists(path):
+            continue
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as archive_file:
+                for line in archive_file:
+                    row = json.loads(line)
+                    if row["ticket_id"] == ticket_id:
+                        rows[row["id"]] = row
+        except (EOFError, OSError, ValueError):
+            # a batch cut short by a crash; everything before it is intact
+            logger.warning(f"Truncated archive file {path}")
+    return sorted(rows.values(), key=lambda row: (row[time_column.key], row["id"]))
+
+
+def merge_archived(archived: List[Dict[str, Any]], hot: list, latest: Optional[int] = None) -> list:
+    """
+    Archived rows followed by the hot rows of the same relationship,
+    without rows present in both, keeping only the `latest` most recent.
+    """
+    hot_ids = {row.id for row in hot}
+    merged = [row for row in archived if row["id"] not in hot_ids] + list(hot)
+    return merged[-latest:] if latest is not None else merged
+
+
+def ticket_schema_with_archived(
+        ticket: models.Ticket,
+        include: Iterable[str],
+        latest: Optional[int] = None
+) -> schemas.TicketSchema:
+    """
+    TicketSchema of `ticket` whose included relationships also hold the
+    archived rows, read from the archive files on demand.
+    """
+    data = {name: getattr(ticket, name) for name in schemas.TicketBase.model_fields}
+    for relation in include:
+        data[relation] = merge_archived(read_archived(relation, ticket.id), getattr(ticket, relation), latest)
+    return schemas.TicketSchema.model_validate(data)
+
+
+def archive_status(limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    The most recent archive runs, newest first.
+    """
+    with session_scope() as db:
+        runs = db.execute(
+            select(models.ArchiveRun).order_by(models.ArchiveRun.id.desc()).limit(limit)
+        ).scalars().all()
+        return [
+            {
+                "id": run.id,
+                "cutoff": run.cutoff,
+                "status_history_rows": run.status_history_rows,
+                "alert_rows": run.alert_rows,
+                "finished_at": run.finished_at,
+            }
+            for run in runs
+        ]
+
+
+def _row_to_dict(model: Any, row: Any) -> Dict[str, Any]:
+    data = {}
+    for column in model.__table__.columns:
+        value = getattr(row, column.key)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, Enum):
+            value = value.value
+        data[column.key] = value
+    if model is models.Alert:
+        # archived in the shape the API returns
+        for key in models.Alert.DETAIL_COLUMNS + ("extra",):
+            del data[key]
+        data["details"] = row.details
+    return data
+
+
+def _append_rows(archive_dir: str, table: str, time_key: str, rows: List[Dict[str, Any]]) -> None:
+    """
+    Append rows to their month/shard files, one gzip member per file and
+    batch (concatenated members read back as a single stream).
+    """
+    files: Dict[Tuple[str, str], List[str]] = defaultdict(list)
+    for row in rows:
+        month = row[time_key][:7]
+        files[(month, _shard_name(row["ticket_id"]))].append(json.dumps(row, separators=(",", ":")))
+
+    for (month, shard), lines in files.items():
+        month_dir = os.path.join(archive_dir, table, month)
+        os.makedirs(month_dir, exist_ok=True)
+        with open(os.path.join(month_dir, shard), "ab") as archive_file:
+            archive_file.write(gzip.compress(("\n".join(lines) + "\n").encode("utf-8")))
+            archive_file.flush()
+            os.fsync(archive_file.fileno())
+
+
+def _shard_name(ticket_id: str) -> str:
+    return "{:03d}.jsonl.gz".format(zlib.crc32(ticket_id.encode("utf-8")) % settings.ARCHIVE_SHARDS)
@@ -0,0 +1,227 @@
+"""
+What-if evaluation of an SLA config against stored tickets: how many
+alerts and breaches it would have produced, per tier and priority,
+without writing anything.
+
+    python -m src.backtest candidate.yaml --days 90
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Collection, Dict, List, Mapping, Optional, Tuple
+
+from sqlalchemy import Integer, select, type_coerce
+from sqlalchemy.orm import Session
+
+from src import models, settings
+from src.codes import LookupValue
+from src.config import SLAConfigSnapshot, as_snapshot, get_sla_config, validate_sla_config
+from src.database import session_scope
+
+logger = logging.getLogger(__name__)
+
+Cell = Tuple[str, str]  # (customer_tier, priority)
+
+# rows fetched per round trip while loading
+FETCH_SIZE = 50000
+
+
+def load_lifetimes(
+        db: Session,
+        start: datetime,
+        end: datetime,
+        closed_statuses: Collection[str]
+) -> Dict[Cell, array]:
+    """
+    For every ticket created in [start, end), the minutes from creation to
+    the last moment before `end` it was active (not in a closed status),
+    grouped by (tier, priority) and sorted.
+
+    The scheduler evaluates an active ticket by its age alone, so the
+    oldest age a ticket reached while active decides every alert it got.
+    Tickets changed after `end` look up their status at `end` in the
+    status history (the live table only: archived history is not read,
+    so those tickets count as active until `end`).
+    """
+    names = dict(db.execute(select(LookupValue.id, LookupValue.value)).all())
+    closed_codes = {code for code, value in names.items() if value in set(closed_statuses)}
+    # Core rows of raw codes: no ORM row processing, and the Encoded
+    # columns are compared as codes instead of decoded per row
+    tickets = models.Ticket.__table__.c
+    rows = db.connection().execute(
+        select(tickets.id, type_coerce(tickets.customer_tier, Integer), type_coerce(tickets.priority, Integer),
+               type_coerce(tickets.status, Integer), tickets.created_at, tickets.updated_at)
+        .where(tickets.created_at >= start, tickets.created_at < end)
+        .execution_options(yield_per=FETCH_SIZE)
+    )
+
+    end_naive = _naive_utc(end)
+    lifetimes: Dict[Tuple[int, int], List[float]] = defaultdict(list)
+    changed_after_end: Dict[str, Tuple[Tuple[int, int], datetime]] = {}
+    for ticket_id, tier, priority, status, created_at, updated_at in rows:
+        created_at, updated_at = _naive_utc(created_at), _naive_utc(updated_at)
+        if updated_at > end_naive:
+            changed_after_end[ticket_id] = ((tier, priority), created_at)
+            continue
+        active_until = updated_at if status in closed_codes else end_naive
+        lifetimes[(tier, priority)].append((active_until - created_at).total_seconds() / 60)
+
+    if changed_after_end:
+        closed_at = _closed_at(db, list(changed_after_end), end, closed_statuses)
+        for ticket_id, (cell, created_at) in changed_after_end.items():
+            active_until = closed_at.get(ticket_id, end_naive)
+            lifetimes[cell].append((active_until - created_at).total_seconds() / 60)
+
+    return {
+        (names.get(tier, str(tier)), names.get(priority, str(priority))): array("d", sorted(values))
+        for (tier, priority), values in lifetimes.items()
+    }
+
+
+def _closed_at(
+        db: Session,
+        ticket_ids: List[str],
+        end: datetime,
+        closed_statuses: Collection[str]
+) -> Dict[str, datetime]:
+    """
+    When each ticket last became closed, for those closed at `end`
+    according to their status history before it.
+    """
+    closed = set(closed_statuses)
+    history = defaultdict(list)
+    for offset in range(0, len(ticket_ids), 500):
+        for ticket_id, status, timestamp in db.execute(
+            select(models.TicketStatusHistory.ticket_id, models.TicketStatusHistory.status,
+                   models.TicketStatusHistory.timestamp)
+            .where(models.TicketStatusHistory.ticket_id.in_(ticket_ids[offset:offset + 500]),
+                   models.TicketStatusHistory.timestamp <= end)
+        ):
+            history[ticket_id].append((_naive_utc(timestamp), status))
+
+    closed_at = {}
+    for ticket_id, events in history.items():
+        events.sort()
+        if events[-1][1] not in closed:
+            continue
+        # the start of the trailing run of closed statuses
+        index = len(events) - 1
+        while index > 0 and events[index - 1][1] in closed:
+            index -= 1
+        closed_at[ticket_id] = events[index][0]
+    return closed_at
+
+
+def evaluate(lifetimes: Mapping[Cell, array], sla_config: SLAConfigSnapshot) -> Dict[str, Any]:
+    """
+    Alert and breach counts `sla_config` gives the loaded tickets: per
+    SLA type, the tickets that reached its alert threshold ("alerts",
+    including those that went on to breach) and its breach threshold
+    ("breaches"). Two binary searches per (tier, priority, SLA type).
+    """
+    def counts():
+        return defaultdict(lambda: {"alerts": 0, "breaches": 0})
+
+    total, by_tier, by_priority = counts(), defaultdict(counts), defaultdict(counts)
+    unconfigured = 0
+    for (tier, priority), values in lifetimes.items():
+        targets = sla_config.cell(tier, priority)
+        if targets is None:
+            unconfigured += len(values)
+            continue
+        for sla_type, target in targets.items():
+            alerts = len(values) - bisect_left(values, target.alert_minutes)
+            breaches = len(values) - bisect_left(values, target.breach_minutes)
+            for bucket in (total[sla_type], by_tier[tier][sla_type], by_priority[priority][sla_type]):
+                bucket["alerts"] += alerts
+                bucket["breaches"] += breaches
+
+    return {
+        "config_digest": sla_config.digest,
+        "total": _plain(total),
+        "by_customer_tier": {tier: _plain(value) for tier, value in sorted(by_tier.items())},
+        "by_priority": {priority: _plain(value) for priority, value in sorted(by_priority.items())},
+        "unconfigured_tickets": unconfigured,
+    }
+
+
+def run_backtest(
+        candidate: Mapping,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        days: int = 90,
+        closed_statuses: Optional[Collection[str]] = None
+) -> Dict[str, Any]:
+    """
+    Evaluate the candidate config (parsed sla_config.yaml contents) and the
+    config in use over the tickets created from `start` (default `days`
+    before `end`) to `end` (default now). Raises SLAConfigError for an
+    invalid candidate.
+    """
+    candidate_config = SLAConfigSnapshot(validate_sla_config(candidate))
+    end = end or datetime.now(timezone.utc)
+    start = start or end - timedelta(days=days)
+    closed_statuses = settings.CLOSED_STATUSES if closed_statuses is None else closed_statuses
+
+    started = time.perf_counter()
+    with session_scope() as db:
+        lifetimes = load_lifetimes(db, start, end, closed_statuses)
+    loaded = time.perf_counter()
+    result = {
+        "start": start,
+        "end": end,
+        "tickets": sum(len(values) for values in lifetimes.values()),
+        "candidate": evaluate(lifetimes, candidate_config),
+        "current": evaluate(lifetimes, as_snapshot(get_sla_config())),
+        "load_ms": round((loaded - started) * 1000, 2),
+        "evaluate_ms": round((time.perf_counter() - loaded) * 1000, 2),
+    }
+    logger.info({
+        "operation": "backtest",
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "tickets": result["tickets"],
+        "candidate_digest": result["candidate"]["config_digest"],
+        "load_ms": result["load_ms"],
+    })
+    return result
+
+
+def _plain(counts: Mapping) -> Dict[str, Any]:
+    return {key: dict(value) if isinstance(value, Mapping) else value for key, value in counts.items()}
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # stored columns are naive UTC
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import yaml
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("config", help="candidate SLA config, same format as sla_config.yaml")
+    parser.add_argument("--days", type=int, default=90, help="window ending at --end (default 90)")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="ISO start of the window (overrides --days)")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="ISO end of the window (default now)")
+    args = parser.parse_args(argv)
+
+    with open(args.config) as config_file:
+        candidate = yaml.safe_load(config_file)
+    end = args.end.replace(tzinfo=args.end.tzinfo or timezone.utc) if args.end else None
+    start = args.start.replace(tzinfo=args.start.tzinfo or timezone.utc) if args.start else None
+    result = run_backtest(candidate, start=start, end=end, days=args.days)
+    json.dump(result, sys.stdout, indent=2, default=str)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+import fcntl
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.engine import make_url
+
+from src import settings
+from src.components import Component
+
+logger = logging.getLogger(__name__)
+
+Subscriber = Callable[[Dict[str, Any]], None]
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+PG_NOTIFY_MAX_BYTES = 7999
+
+
+class BroadcastBackend:
+    """
+    Base class for the alert fan-out backbone.
+
+    Every process publishes its alerts through a backend, and every
+    subscriber registered in every process receives each alert once.
+    """
+
+    def __init__(self):
+        self._subscribers: List[Subscriber] = []
+
+    def subscribe(self, callback: Subscriber) -> None:
+        self._subscribers.append(callback)
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return True
+
+    def _deliver(self, message: Dict[str, Any]) -> None:
+        for callback in self._subscribers:
+            try:
+                callback(message)
+            except Exception:
+                logger.exception("Broadcast subscriber failed")
+
+
+class LocalBroadcast(BroadcastBackend):
+    """
+    Single-process backend: publishing delivers straight to local subscribers.
+    """
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        self._deliver(message)
+
+
+class UnixSocketBroadcast(BroadcastBackend):
+    """
+    Single-host backend built on a Unix-domain socket hub.
+
+    The first process to take the lock file next to the socket becomes the
+    hub; the others connect to it as peers. Messages are newline-delimited
+    JSON. A peer sends its alerts to the hub, and the hub relays every
+    message to all peers (the sender included) and delivers it locally.
+    If the hub goes away, the remaining processes elect a new one.
+    """
+
+    RETRY_SECONDS = 0.1
+
+    def __init__(self, path: str):
+        super().__init__()
+        self._path = path
+        self._lock_path = f"{path}.lock"
+        self._lock_fd: Optional[int] = None
+        self._send_lock = threading.Lock()
+        self._peers: List[socket.socket] = []
+        self._upstream: Optional[socket.socket] = None
+        self._ready = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_hub(self) -> bool:
+        return self._lock_fd is not None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="broadcast-unix", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._ready.clear()
+        with self._send_lock:
+            for sock in self._peers + ([self._upstream] if self._upstream else []):
+                _close_quietly(sock)
+            self._peers = []
+            self._upstream = None
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        self._release_hub_lock()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        line = _encode(message)
+        with self._send_lock:
+            if self.is_hub:
+                self._relay(line)
+            elif self._upstream is not None:
+                try:
+                    self._upstream.sendall(line)
+                    return
+                except OSError:
+                    logger.warning("Lost connection to broadcast hub; delivering locally")
+                    _close_quietly(self._upstream)
+                    self._upstream = None
+            else:
+                logger.warning("Broadcast hub not connected; delivering locally")
+        self._deliver(message)
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                if self._try_connect():
+                    self._follow()
+                elif self._try_acquire_hub_lock():
+                    self._serve()
+                else:
+                    time.sleep(self.RETRY_SECONDS)
+            except Exception:
+                logger.exception("Broadcast hub loop failed; retrying")
+                time.sleep(self.RETRY_SECONDS)
+
+    # --- peer side ---------------------------------------------------------
+
+    def _try_connect(self) -> bool:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self._path)
+        except OSError:
+            sock.close()
+            return False
+        with self._send_lock:
+            self._upstream = sock
+        return True
+
+    def _follow(self) -> None:
+        sock = self._upstream
+        for line in _read_lines(sock, self._stopped):
+            if not line:
+                # The hub greets every peer with an empty line once registered
+                self._ready.set()
+                continue
+            self._deliver(json.loads(line))
+        self._ready.clear()
+        with self._send_lock:
+            if self._upstream is sock:
+                self._upstream = None
+        _close_quietly(sock)
+
+    # --- hub side ----------------------------------------------------------
+
+    def _try_acquire_hub_lock(self) -> bool:
+        fd = os.open(self._lock_path, os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def _release_hub_lock(self) -> None:
+        if self._lock_fd is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def _serve(self) -> None:
+        # Holding the lock means any socket file left behind is stale
+        if os.path.exists(self._path):
+            os.unlink(self._path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self._path)
+        server.listen()
+        server.settimeout(0.5)
+        self._ready.set()
+        logger.info(f"Broadcast hub listening on {self._path}")
+        try:
+            while not self._stopped.is_set():
+                try:
+                    peer, _ = server.accept()
+                except socket.timeout:
+                    continue
+                peer.settimeout(None)
+                with self._send_lock:
+                    self._peers.append(peer)
+                    try:
+                        peer.sendall(b"\n")
+                    except OSError:
+                        self._drop_peer(peer)
+                        continue
+                threading.Thread(target=self._read_peer, args=(peer,), name="broadcast-peer", daemon=True).start()
+        finally:
+            server.close()
+            if os.path.exists(self._path):
+                os.unlink(self._path)
+
+    def _read_peer(self, peer: socket.socket) -> None:
+        for line in _read_lines(peer, self._stopped):
+            if not line:
+                continue
+            with self._send_lock:
+                self._relay(line + b"\n")
+            self._deliver(json.loads(line))
+        with self._send_lock:
+            self._drop_peer(peer)
+
+    def _relay(self, line: bytes) -> None:
+        # Caller holds _send_lock
+        for peer in list(self._peers):
+            try:
+                peer.sendall(line)
+            except OSError:
+                self._drop_peer(peer)
+
+    def _drop_peer(self, peer: socket.socket) -> None:
+        if peer in self._peers:
+            self._peers.remove(peer)
+        _close_quietly(peer)
+
+
+class PostgresBroadcast(BroadcastBackend):
+    """
+    Multi-host backend built on Postgres LISTEN/NOTIFY.
+
+    Each process LISTENs on a dedicated connection and publishes with
+    pg_notify(), so every process (the publisher included) receives
+    each alert once.
+    """
+
+    RETRY_SECONDS = 1.0
+
+    def __init__(self, dsn: str, channel: str):
+        super().__init__()
+        self._dsn = dsn
+        self._channel = channel
+        self._publish_conn = None
+        self._publish_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._listen, name="broadcast-pg", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=3)
+            self._thread = None
+        with self._publish_lock:
+            if self._publish_conn is not None:
+                self._publish_conn.close()
+                self._publish_conn = None
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        import psycopg
+
+        payload = _encode(message)[:-1].decode()
+        if len(payload.encode()) > PG_NOTIFY_MAX_BYTES:
+            logger.warning("Alert payload too large for NOTIFY; delivering locally")
+            self._deliver(message)
+            return
+        with self._publish_lock:
+            try:
+                if self._publish_conn is None or self._publish_conn.closed:
+                    self._publish_conn = psycopg.connect(self._dsn, autocommit=True)
+                self._publish_conn.execute("SELECT pg_notify(%s, %s)", (self._channel, payload))
+            except psycopg.Error as exc:
+                logger.error(f"Failed to publish alert via NOTIFY: {exc}; delivering locally")
+                self._publish_conn = None
+                self._deliver(message)
+
+    def _listen(self) -> None:
+        import psycopg
+        from psycopg import sql
+
+        while not self._stopped.is_set():
+            try:
+                with psycopg.connect(self._dsn, autocommit=True) as conn:
+                    conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self._channel)))
+                    self._ready.set()
+                    while not self._stopped.is_set():
+                        for notify in conn.notifies(timeout=1.0):
+                            self._deliver(json.loads(notify.payload))
+            except psycopg.Error as exc:
+                logger.error(f"Broadcast LISTEN connection failed: {exc}")
+                self._ready.clear()
+                time.sleep(self.RETRY_SECONDS)
+
+
+def create_broadcaster(backend: Optional[str] = None) -> BroadcastBackend:
+    """
+    Build the broadcast backend selected by settings.BROADCAST_BACKEND.
+    Nothing is connected until start() is called.
+    """
+    backend = backend or settings.BROADCAST_BACKEND
+    if backend == "local":
+        return LocalBroadcast()
+    if backend == "unix":
+        return UnixSocketBroadcast(settings.BROADCAST_SOCKET_PATH)
+    if backend == "postgres":
+        url = make_url(settings.DATABASE_URL).set(drivername="postgresql")
+        return PostgresBroadcast(url.render_as_string(hide_password=False), settings.BROADCAST_CHANNEL)
+    raise ValueError(f"Unknown broadcast backend: {backend}")
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    return json.dumps(message, separators=(",", ":"), default=str).encode() + b"\n"
+
+
+def _read_lines(sock: socket.socket, stopped: threading.Event):
+    buffer = b""
+    while not stopped.is_set():
+        try:
+            chunk = sock.recv(65536)
+        except OSError:
+            return
+        if not chunk:
+            return
+        buffer += chunk
+        while b"\n" in buffer:
+            line, buffer = buffer.split(b"\n", 1)
+            yield line
+
+
+def _close_quietly(sock: Optional[socket.socket]) -> None:
+    if sock is None:
+        return
+    try:
+        # shutdown() wakes up any thread blocked in recv() on this socket
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+    try:
+        sock.close()
+    except OSError:
+        pass
+
+
+broadcaster = create_broadcaster()
+
+
+def _start_broadcaster() -> BroadcastBackend:
+    broadcaster.start()
+    return broadcaster
+
+
+broadcast_component = Component("broadcast", _start_broadcaster, stop=lambda backend: backend.stop())
@@ -0,0 +1,161 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, NamedTuple, Optional, Set
+
+from src import settings
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    headers: Dict[str, str]
+
+
+class _Entry(NamedTuple):
+    expires_at: float
+    response: CachedResponse
+    ticket_id: Optional[str]
+
+
+class ResponseCache:
+    """
+    In-process LRU/TTL cache of serialized API responses.
+
+    Entries are bounded by count and by total body size. Writes invalidate
+    precisely: invalidate_ticket() drops the entries of that ticket and every
+    dashboard page, and bumps `generation`. Dashboard keys embed the
+    generation, and set() refuses entries computed under an older generation,
+    so a response built while a write was committing is never stored.
+
+    Each worker process has its own cache; writes handled by other workers
+    become visible once entries expire (ttl_seconds).
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._by_ticket: Dict[str, Set[Hashable]] = {}
+        self._dashboard_keys: Set[Hashable] = set()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def dashboard_key(self, *params: Any) -> tuple:
+        return ("dashboard", self.generation) + params
+
+    @staticmethod
+    def ticket_key(ticket_id: str, *params: Any) -> tuple:
+        return ("ticket", ticket_id) + params
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.response
+
+    def set(
+            self,
+            key: Hashable,
+            response: CachedResponse,
+            generation: int,
+            ticket_id: Optional[str] = None
+    ) -> None:
+        """
+        Store a response computed while `generation` was current.
+        """
+        size = len(response.body)
+        if not self.enabled or size > self.max_bytes:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(time.monotonic() + self.ttl_seconds, response, ticket_id)
+            self._bytes += size
+            if ticket_id is not None:
+                self._by_ticket.setdefault(ticket_id, set()).add(key)
+            else:
+                self._dashboard_keys.add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate_ticket(self, ticket_id: str) -> None:
+        """
+        Forget everything a write to `ticket_id` can change.
+        """
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+            for key in list(self._by_ticket.get(ticket_id, ())):
+                self._remove(key)
+            for key in list(self._dashboard_keys):
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._by_ticket.clear()
+            self._dashboard_keys.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "generation": self.generation,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, key: Hashable) -> None:
+        # Caller holds _lock
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= len(entry.response.body)
+        if entry.ticket_id is not None:
+            keys = self._by_ticket.get(entry.ticket_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_ticket[entry.ticket_id]
+        else:
+            self._dashboard_keys.discard(key)
+
+
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+)
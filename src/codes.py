@@ -0,0 +1,232 @@
+import threading
+from contextlib import nullcontext
+from typing import ContextManager, Dict, Iterable, Optional, Set, Tuple, Union
+
+from sqlalchemy import (
+    Integer,
+    SmallInteger,
+    String,
+    UniqueConstraint,
+    inspect,
+    insert,
+    literal,
+    select,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import operators
+from sqlalchemy.types import TypeDecorator
+
+from src import database
+from src.database import Base
+
+# (kind, value)
+Code = Tuple[str, str]
+
+# Code of a filter value missing from the dictionary: matches no row
+UNKNOWN_CODE = -1
+
+# Filter values remembered as unknown at most; arbitrary client filters
+# must not grow the process without bound
+MAX_UNKNOWN = 1024
+
+
+class LookupValue(Base):
+    """
+    Dictionary of the strings stored as small-integer codes, per kind
+    (priority, customer_tier, status, sla_type).
+    """
+    __tablename__ = "lookup_values"
+
+    # SQLite only autoincrements INTEGER primary keys
+    id: Mapped[int] = mapped_column(SmallInteger().with_variant(Integer, "sqlite"), primary_key=True,
+                                    autoincrement=True)
+    kind: Mapped[str] = mapped_column(String, nullable=False)
+    value: Mapped[str] = mapped_column(String, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("kind", "value", name="uq_lookup_values_kind_value"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<LookupValue id={self.id} {self.kind}={self.value}>"
+
+
+class Encoded(TypeDecorator):
+    """
+    A string column stored as the small-integer code of its value in
+    lookup_values. Values are converted in process through the codebook,
+    so the column is read, written, filtered and grouped as a plain string
+    at the cost of a dict lookup. Values written for the first time are
+    added to the dictionary; values only filtered on never are.
+    """
+    impl = SmallInteger
+    cache_ok = True
+
+    class comparator_factory(TypeDecorator.Comparator):
+        def operate(self, op, *other, **kwargs):
+            # Filter values are looked up, not added: a query for an
+            # unknown tier must not grow the dictionary
+            lookup = self.type.lookup_type
+            if op in (operators.in_op, operators.not_in_op) and isinstance(other[0], (list, tuple, set)):
+                other = ([literal(value, lookup) for value in other[0]],) + other[1:]
+            elif other and isinstance(other[0], str):
+                other = (literal(other[0], lookup),) + other[1:]
+            return super().operate(op, *other, **kwargs)
+
+    def __init__(self, kind: str, create: bool = True):
+        super().__init__()
+        self.kind = kind
+        self.create = create
+
+    @property
+    def lookup_type(self) -> "Encoded":
+        return Encoded(self.kind, create=False)
+
+    def process_bind_param(self, value: Optional[str], dialect) -> Optional[int]:
+        if value is None:
+            return None
+        return codebook.code(self.kind, value, create=self.create)
+
+    def process_result_value(self, value: Optional[int], dialect) -> Optional[str]:
+        if value is None:
+            return None
+        return codebook.value(value)
+
+
+class CodeBook:
+    """
+    In-process copy of lookup_values, both ways. Codes are append-only and
+    never change meaning, so the copy can only be incomplete, never wrong:
+    an unknown code or value reloads the (small) table once before it is
+    treated as new. Filter values still unknown after that are remembered,
+    so polling a filter on them does not reload every time, until a load
+    (register() or reload()) finds them.
+
+    New values are inserted and committed in a transaction of their own
+    before the row that uses them is written, so a code in the copy always
+    exists in the database, whatever the writer's transaction does next.
+    """
+
+    def __init__(self):
+        self._codes: Dict[Code, int] = {}
+        self._values: Dict[int, str] = {}
+        self._unknown: Set[Code] = set()
+        self._bind: Union[Engine, Connection, None] = None
+        self._lock = threading.Lock()
+
+    def use(self, bind: Union[Engine, Connection, None]) -> None:
+        """
+        Read and add values through `bind`: an Engine (a transaction of
+        their own each time; the default is the application's engine) or a
+        Connection (its current transaction, for tests and single-connection
+        in-memory databases).
+        """
+        self._bind = bind
+
+    def code(self, kind: str, value: str, create: bool = True) -> int:
+        """
+        Code of a value, added to the dictionary if `create` is set and it is
+        not there yet; otherwise UNKNOWN_CODE.
+        """
+        code = self._codes.get((kind, value))
+        if code is None:
+            if not create and (kind, value) in self._unknown:
+                return UNKNOWN_CODE
+            self.reload()
+            code = self._codes.get((kind, value))
+        if code is None:
+            if not create:
+                with self._lock:
+                    if len(self._unknown) >= MAX_UNKNOWN:
+                        self._unknown = set()
+                    self._unknown.add((kind, value))
+                return UNKNOWN_CODE
+            self.register([(kind, value)])
+            code = self._codes[(kind, value)]
+        return code
+
+    def value(self, code: int) -> str:
+        value = self._values.get(code)
+        if value is None:
+            self.reload()
+            value = self._values.get(code)
+            if value is None:
+                raise LookupError(f"Code {code} is not in lookup_values")
+        return value
+
+    def register(self, codes: Iterable[Code]) -> None:
+        """
+        Add the values missing from the dictionary and load their codes.
+        Writers call this before their transaction writes anything: on
+        SQLite, the insert waits for the database write lock, so values
+        first met mid-flush (the fallback in Encoded) can time out there.
+        """
+        missing = set(codes) - self._codes.keys()
+        if not missing:
+            return
+        with self._connect() as connection:
+            connection.execute(_insert_ignoring_duplicates(connection.dialect.name), [
+                {"kind": kind, "value": value} for kind, value in sorted(missing)
+            ])
+            self._load(connection)
+
+    def reload(self) -> None:
+        with self._connect() as connection:
+            self._load(connection)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._codes, self._values, self._unknown = {}, {}, set()
+
+    def _load(self, connection: Connection) -> None:
+        rows = connection.execute(select(LookupValue.id, LookupValue.kind, LookupValue.value)).all()
+        with self._lock:
+            # replaced whole: readers never see a half-built map
+            self._codes = {(kind, value): code for code, kind, value in rows}
+            self._values = {code: value for code, _, value in rows}
+            self._unknown = {unknown for unknown in self._unknown if unknown not in self._codes}
+
+    def _connect(self) -> ContextManager[Connection]:
+        bind = self._bind if self._bind is not None else database.engine
+        if isinstance(bind, Connection):
+            return nullcontext(bind)
+        return bind.begin()
+
+
+def _insert_ignoring_duplicates(dialect: str):
+    # Another worker may add the same value concurrently
+    if dialect == "postgresql":
+        return postgresql.insert(LookupValue).on_conflict_do_nothing()
+    if dialect == "sqlite":
+        return sqlite.insert(LookupValue).on_conflict_do_nothing()
+    return insert(LookupValue)
+
+
+def check_encoded_columns(bind: Union[Engine, Connection]) -> None:
+    """
+    Fail fast on a database created before categorical columns were
+    encoded: its TEXT columns would be read as codes. Raises RuntimeError
+    naming the columns to migrate.
+    """
+    inspector = inspect(bind)
+    stale = []
+    for table in Base.metadata.sorted_tables:
+        encoded = [column.name for column in table.columns if isinstance(column.type, Encoded)]
+        if not encoded or not inspector.has_table(table.name):
+            continue
+        stored = {column["name"]: column["type"] for column in inspector.get_columns(table.name)}
+        stale.extend(
+            f"{table.name}.{name} ({stored[name]})"
+            for name in encoded if name in stored and not isinstance(stored[name], Integer)
+        )
+    if stale:
+        raise RuntimeError(
+            "The database stores categorical columns as text: " + ", ".join(stale)
+            + ". This version stores them as lookup_values codes; recreate the database or migrate "
+              "these columns (see README, Storage Encoding)."
+        )
+
+
+codebook = CodeBook()
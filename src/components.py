@@ -0,0 +1,101 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class Component:
+    """
+    A piece of process-wide machinery (database schema, config watcher,
+    broadcast backbone, scheduler) that is started on first use and
+    exactly once per process, however many callers ask for it.
+
+    `start` returns a handle that is passed to `stop` at shutdown.
+    Components in `requires` are started first.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            start: Callable[[], Any],
+            stop: Optional[Callable[[Any], None]] = None,
+            requires: Sequence["Component"] = ()
+    ):
+        self.name = name
+        self.requires = tuple(requires)
+        self.startup_ms: Optional[float] = None
+        self._start = start
+        self._stop = stop
+        self._handle: Any = None
+        self._started = False
+        self._lock = threading.Lock()
+
+    @property
+    def started(self) -> bool:
+        return self._started
+
+    def ensure_started(self) -> Any:
+        """
+        Start the component unless it is already running; return its handle.
+        """
+        if self._started:
+            return self._handle
+        for dependency in self.requires:
+            dependency.ensure_started()
+        with self._lock:
+            if self._started:
+                return self._handle
+            started = time.perf_counter()
+            self._handle = self._start()
+            self.startup_ms = (time.perf_counter() - started) * 1000
+            self._started = True
+            with _registry_lock:
+                _running.append(self)
+        logger.info({
+            "operation": "startup",
+            "component": self.name,
+            "duration_ms": round(self.startup_ms, 2),
+        })
+        return self._handle
+
+    def stop(self) -> None:
+        with self._lock:
+            if not self._started:
+                return
+            handle, self._handle, self._started = self._handle, None, False
+            with _registry_lock:
+                if self in _running:
+                    _running.remove(self)
+        if self._stop is not None:
+            try:
+                self._stop(handle)
+            except Exception:
+                logger.exception(f"Failed to stop component {self.name}")
+
+    def __repr__(self) -> str:
+        return f"<Component {self.name} started={self._started}>"
+
+
+# Running components, in start order
+_running: List[Component] = []
+_registry_lock = threading.Lock()
+
+
+def stop_all() -> None:
+    """
+    Stop every running component, most recently started first.
+    """
+    with _registry_lock:
+        running = list(reversed(_running))
+    for component in running:
+        component.stop()
+
+
+def startup_report() -> Dict[str, Optional[float]]:
+    """
+    Start-up time in milliseconds of each running component.
+    """
+    with _registry_lock:
+        return {component.name: component.startup_ms for component in _running}
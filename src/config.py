@@ -1,76 +1,418 @@
+import hashlib
+import json
 import logging
+import math
 import os
-from threading import Lock
-from typing import Dict, Any
+import sys
+import threading
+from collections.abc import Mapping
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, NamedTuple, Optional, Tuple
 
-import yaml
 from watchdog.events import FileSystemEventHandler
-from watchdog.observers import Observer
 
-from src import settings
+from src import metrics, settings
+from src.components import Component
 
 logger = logging.getLogger(__name__)
 
-# Global storage for SLA config
-_sla_config: Dict[str, Any] = {}
-_config_lock = Lock()
+# SLA types the evaluator knows how to measure
+SLA_TYPES = ("response", "resolution")
+
+
+class SLAConfigError(ValueError):
+    """
+    Raised when an SLA config file is structurally invalid.
+    """
+
+
+class SLATarget(NamedTuple):
+    target_minutes: float
+    alert_minutes: float  # elapsed minutes at which an ALERT is due
+    breach_minutes: float  # elapsed minutes at which the SLA is breached
+
+
+class SLAConfigSnapshot(Mapping):
+    """
+    Immutable, compiled view of one version of the SLA configuration.
+
+    Tier and priority names are interned and every (tier, priority,
+    sla_type) target is flattened into one table together with its alert
+    and breach thresholds in minutes, so the evaluator does a single dict
+    lookup per ticket and no arithmetic on the config. It still reads like
+    the original nested mapping: snapshot[tier][priority][sla_type].
+
+    Snapshots are never mutated; a reload compiles a new one and publishes
+    it by swapping a module reference.
+    """
+
+    __slots__ = ("version", "digest", "loaded_at", "source", "_tiers", "_targets", "_cells")
+
+    def __init__(
+            self,
+            tiers: Mapping,
+            version: int = 0,
+            source: Optional[str] = None,
+            alert_threshold: Optional[float] = None,
+            breach_threshold: Optional[float] = None
+    ):
+        alert_threshold = settings.ALERT_THRESHOLD if alert_threshold is None else alert_threshold
+        breach_threshold = settings.BREACH_THRESHOLD if breach_threshold is None else breach_threshold
+        nested: Dict[str, Any] = {}
+        targets: Dict[Tuple[str, str, str], SLATarget] = {}
+        cells: Dict[Tuple[str, str], Mapping] = {}
+        for tier, priorities in (tiers or {}).items():
+            tier = sys.intern(str(tier))
+            nested_priorities = {}
+            for priority, sla_types in (priorities or {}).items():
+                priority = sys.intern(str(priority))
+                cell = {}
+                for sla_type, minutes in (sla_types or {}).items():
+                    sla_type = sys.intern(str(sla_type))
+                    minutes = float(minutes)
+                    if minutes <= 0:
+                        raise ValueError(f"SLA target {tier}/{priority}/{sla_type} must be positive, got {minutes}")
+                    target = SLATarget(minutes, minutes * alert_threshold, minutes * breach_threshold)
+                    targets[(tier, priority, sla_type)] = target
+                    cell[sla_type] = target
+                cells[(tier, priority)] = MappingProxyType(cell)
+                nested_priorities[priority] = MappingProxyType(dict(sla_types or {}))
+            nested[tier] = MappingProxyType(nested_priorities)
+
+        _set = object.__setattr__
+        _set(self, "version", version)
+        _set(self, "digest", hashlib.sha1(
+            json.dumps([alert_threshold, breach_threshold, tiers], sort_keys=True, default=str).encode()
+        ).hexdigest()[:12])
+        _set(self, "loaded_at", datetime.now(timezone.utc))
+        _set(self, "source", source)
+        _set(self, "_tiers", MappingProxyType(nested))
+        _set(self, "_targets", MappingProxyType(targets))
+        _set(self, "_cells", MappingProxyType(cells))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SLAConfigSnapshot is immutable")
+
+    def __getitem__(self, tier: str) -> Mapping:
+        return self._tiers[tier]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tiers)
+
+    def __len__(self) -> int:
+        return len(self._tiers)
+
+    def __repr__(self) -> str:
+        return f"<SLAConfigSnapshot version={self.version} digest={self.digest} tiers={len(self)}>"
+
+    @property
+    def targets(self) -> Mapping:
+        """
+        Flat (tier, priority, sla_type) -> SLATarget table.
+        """
+        return self._targets
+
+    def target(self, tier: str, priority: str, sla_type: str) -> Optional[SLATarget]:
+        return self._targets.get((tier, priority, sla_type))
+
+    def cell(self, tier: str, priority: str) -> Optional[Mapping]:
+        """
+        All targets of one (tier, priority) as sla_type -> SLATarget,
+        or None if the pair is not configured.
+        """
+        return self._cells.get((tier, priority))
+
+    def changed_cells(self, previous: "SLAConfigSnapshot") -> FrozenSet[Tuple[str, str, str]]:
+        """
+        (tier, priority, sla_type) cells whose target or thresholds differ
+        from `previous`, including cells added or removed.
+        """
+        keys = set(self._targets) | set(previous.targets)
+        return frozenset(key for key in keys if self._targets.get(key) != previous.targets.get(key))
+
+
+def as_snapshot(config: Mapping) -> SLAConfigSnapshot:
+    """
+    Return `config` as a snapshot, compiling plain nested dicts.
+    """
+    if isinstance(config, SLAConfigSnapshot):
+        return config
+    return SLAConfigSnapshot(config)
+
+
+ReloadListener = Callable[[SLAConfigSnapshot, SLAConfigSnapshot], None]
+
+# Current SLA config. Readers take the reference as is; only reloads
+# (serialized by _reload_lock) replace it.
+_snapshot: SLAConfigSnapshot = SLAConfigSnapshot({})
+_reload_lock = threading.Lock()
+_reload_listeners: List[ReloadListener] = []
+
+
+def add_reload_listener(callback: ReloadListener) -> None:
+    """
+    Call `callback(previous, current)` after each reload that replaces an
+    already loaded config (not after the initial load).
+    """
+    _reload_listeners.append(callback)
+
+
+# Reload bookkeeping, exposed at GET /admin/config. Guarded by _reload_lock.
+_status: Dict[str, Any] = {
+    "mode": None,
+    "events": 0,
+    "reloads": 0,
+    "unchanged": 0,
+    "failures": 0,
+    "last_reload_at": None,
+    "last_error": None,
+    "last_error_at": None,
+}
+_last_signature: Optional[Tuple[int, int, int]] = None
 
 
 class SLAConfigHandler(FileSystemEventHandler):
     """
     Watchdog handler to reload SLA config when the YAML file changes.
+
+    A save usually produces a burst of events (truncate, write, chmod, or
+    write-to-temp then rename over the file). Events are coalesced: the
+    reload runs once, `debounce_seconds` after the last one.
     """
 
-    def __init__(self, config_path: str):
+    def __init__(self, config_path: str, debounce_seconds: Optional[float] = None):
         super().__init__()
         self._config_path = os.path.abspath(config_path)
+        if debounce_seconds is None:
+            debounce_seconds = settings.CONFIG_RELOAD_DEBOUNCE_SECONDS
+        self._debounce_seconds = debounce_seconds
+        self._timer: Optional[threading.Timer] = None
+        self._timer_lock = threading.Lock()
 
     def on_modified(self, event):
-        if os.path.abspath(event.src_path) == self._config_path:
-            logger.info("Detected change in SLA config, reloading…")
-            load_sla_config(self._config_path)
+        self._schedule_reload(event.src_path)
 
+    def on_created(self, event):
+        self._schedule_reload(event.src_path)
 
-def load_sla_config(config_path: str = None) -> None:
+    def on_moved(self, event):
+        # atomic replace: the new content is renamed onto the config path
+        self._schedule_reload(getattr(event, "dest_path", None))
+
+    def _schedule_reload(self, path: Optional[str]) -> None:
+        if not path or os.path.abspath(path) != self._config_path:
+            return
+        with _reload_lock:
+            _status["events"] += 1
+        if self._debounce_seconds <= 0:
+            reload_if_changed(self._config_path)
+            return
+        with self._timer_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self._debounce_seconds, self._reload)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _reload(self) -> None:
+        logger.info("Detected change in SLA config, reloading…")
+        reload_if_changed(self._config_path)
+
+
+class ConfigPoller:
+    """
+    Reload the SLA config when the file's mtime, size or inode change,
+    checked every `interval` seconds. For filesystems where inotify is
+    unavailable or unreliable (network mounts, some container volumes).
+    """
+
+    def __init__(self, config_path: str, interval: float):
+        self._config_path = config_path
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="sla-config-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self._interval):
+            try:
+                reload_if_changed(self._config_path)
+            except Exception:
+                logger.exception("SLA config poll failed")
+
+
+def validate_sla_config(data: Any) -> Mapping:
+    """
+    Check parsed YAML before it is compiled and return its tiers.
+
+    Raises SLAConfigError listing every problem: a missing or empty
+    `tiers` mapping, unknown SLA types, and targets that are not positive
+    numbers of minutes.
+    """
+    if not isinstance(data, Mapping) or "tiers" not in data:
+        raise SLAConfigError("missing top-level 'tiers' mapping")
+    tiers = data["tiers"]
+    if not isinstance(tiers, Mapping) or not tiers:
+        raise SLAConfigError("'tiers' must be a non-empty mapping")
+
+    errors = []
+    for tier, priorities in tiers.items():
+        if not isinstance(priorities, Mapping) or not priorities:
+            errors.append(f"{tier}: expected a mapping of priorities")
+            continue
+        for priority, sla_types in priorities.items():
+            if not isinstance(sla_types, Mapping) or not sla_types:
+                errors.append(f"{tier}/{priority}: expected a mapping of SLA types")
+                continue
+            for sla_type, minutes in sla_types.items():
+                where = f"{tier}/{priority}/{sla_type}"
+                if sla_type not in SLA_TYPES:
+                    errors.append(f"{where}: unknown SLA type (expected one of {', '.join(SLA_TYPES)})")
+                elif (isinstance(minutes, bool) or not isinstance(minutes, (int, float))
+                      or not math.isfinite(minutes) or minutes <= 0):
+                    errors.append(f"{where}: target must be a positive number of minutes, got {minutes!r}")
+    if errors:
+        raise SLAConfigError("; ".join(errors))
+    return tiers
+
+
+def load_sla_config(config_path: str = None) -> bool:
     """
-    Load SLA configuration from YAML into the global _sla_config dict.
+    Load SLA configuration from YAML, validate and compile it into a new
+    snapshot and publish it. On any error the current snapshot stays in
+    place and the error is recorded in the reload status.
+    Returns True if a new snapshot was published.
     """
+    global _snapshot, _last_signature
+    import yaml
+
     path = config_path or os.getenv("SLA_CONFIG_PATH", "sla_config.yaml")
+    signature = _file_signature(path)
     try:
         with open(path, "r") as f:
             data = yaml.safe_load(f)
-        # Assuming top-level key "tiers"
-        tiers = data.get("tiers", {})
-        with _config_lock:
-            _sla_config.clear()
-            _sla_config.update(tiers)
-        logger.info(f"SLA configuration loaded from {path}")
+        tiers = validate_sla_config(data)
+        with _reload_lock:
+            previous = _snapshot
+            snapshot = SLAConfigSnapshot(tiers, version=previous.version + 1, source=path)
+            # a single reference assignment: readers see the old or the new snapshot, never a mix
+            _snapshot = snapshot
+            _last_signature = signature
+            _status["reloads"] += 1
+            _status["last_reload_at"] = snapshot.loaded_at
+        logger.info(f"SLA configuration version {snapshot.version} ({snapshot.digest}) loaded from {path}")
     except Exception as e:
+        with _reload_lock:
+            # the same broken file is not parsed again until it changes
+            _last_signature = signature
+            _status["failures"] += 1
+            _status["last_error"] = f"{path}: {e}"
+            _status["last_error_at"] = datetime.now(timezone.utc)
         logger.error(f"Failed to load SLA config from {path}: {e}")
+        return False
+
+    if previous.version == 0 or previous.digest == snapshot.digest:
+        return True
+    for listener in list(_reload_listeners):
+        try:
+            listener(previous, snapshot)
+        except Exception:
+            logger.exception("SLA config reload listener failed")
+    return True
+
+
+def reload_if_changed(config_path: str) -> bool:
+    """
+    Reload the config unless the file is unchanged (same inode, size and
+    mtime) since the last load attempt. Returns True if a new snapshot
+    was published.
+    """
+    signature = _file_signature(config_path)
+    if signature is not None and signature == _last_signature:
+        with _reload_lock:
+            _status["unchanged"] += 1
+        return False
+    return load_sla_config(config_path)
+
+
+def get_sla_config() -> SLAConfigSnapshot:
+    """
+    Retrieve the current SLA configuration snapshot, loading the config
+    file on first use. Lock-free; the snapshot is immutable, so callers
+    may keep it for a whole pass.
+    """
+    if _snapshot.version == 0:
+        config_component.ensure_started()
+    return _snapshot
 
 
-def get_sla_config() -> Dict[str, Any]:
+def get_reload_status() -> Dict[str, Any]:
     """
-    Retrieve the current SLA configuration.
+    Reload counters, the last error and the version currently in use.
     """
-    with _config_lock:
-        return dict(_sla_config)
+    snapshot = _snapshot
+    with _reload_lock:
+        status = dict(_status)
+    status.update({
+        "version": snapshot.version,
+        "digest": snapshot.digest,
+        "source": snapshot.source,
+        "loaded_at": snapshot.loaded_at,
+    })
+    return status
 
 
-def start_config_watcher() -> None:
+def start_config_watcher(mode: Optional[str] = None):
     """
-    Starts a watchdog observer to reload SLA config on file changes.
+    Start watching the SLA config file for changes, with inotify (through
+    watchdog) or by polling its mtime, per settings.CONFIG_WATCH_MODE.
+    Returns the started observer or poller.
     """
+    mode = mode or settings.CONFIG_WATCH_MODE
     path = settings.SLA_CONFIG_PATH
-    directory = os.path.dirname(os.path.abspath(path)) or "."
-    handler = SLAConfigHandler(path)
-    observer = Observer()
-    observer.schedule(handler, directory, recursive=False)
-    observer.daemon = True
-    observer.start()
-    logger.info(f"Started SLA config watcher on {path}")
-
-
-# Initialize at import time
-load_sla_config()
-start_config_watcher()
+    if mode == "poll":
+        watcher = ConfigPoller(path, settings.CONFIG_POLL_SECONDS)
+    elif mode == "inotify":
+        from watchdog.observers import Observer
+
+        directory = os.path.dirname(os.path.abspath(path)) or "."
+        watcher = Observer()
+        watcher.schedule(SLAConfigHandler(path), directory, recursive=False)
+        watcher.daemon = True
+    else:
+        raise ValueError(f"Unknown config watch mode: {mode}")
+    watcher.start()
+    with _reload_lock:
+        _status["mode"] = mode
+    logger.info(f"Started SLA config watcher on {path} ({mode})")
+    return watcher
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def _stop_watcher(watcher) -> None:
+    watcher.stop()
+    watcher.join(timeout=2)
+
+
+metrics.config_version.set_function(lambda: _snapshot.version)
+config_component = Component("sla_config", load_sla_config)
+watcher_component = Component("config_watcher", start_config_watcher, stop=_stop_watcher,
+                              requires=(config_component,))
@@ -1,31 +1,153 @@
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import Iterable, List, Optional, Sequence, Tuple
 import logging
 
-from sqlalchemy.orm import Session
+from sqlalchemy import exists, func, select, tuple_, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Query, Session, noload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
-from src import models, schemas
+from src import metrics, models, schemas
+from src.cache import response_cache
+from src.codes import codebook
+from src.etag import make_etag
+from src.hotset import hot_set
+from src.pagination import decode_cursor, encode_cursor
+from src.stats import Cell, sla_stats, ticket_cell
 
 logger = logging.getLogger(__name__)
 
 
-def get_ticket(db: Session, ticket_id: str) -> Optional[models.Ticket]:
+def ticket_load_options(include: Iterable[str] = schemas.TICKET_RELATIONS) -> list:
     """
-    Retrieve a ticket by its ID.
+    Loader options for Ticket queries whose results get serialized:
+    relationships in `include` are fetched with one SELECT ... IN per
+    relationship for the whole result, the others are never loaded.
     """
-    return db.query(models.Ticket).filter(models.Ticket.id == ticket_id).first()
+    include = set(include)
+    return [
+        selectinload(getattr(models.Ticket, relation)) if relation in include
+        else noload(getattr(models.Ticket, relation))
+        for relation in schemas.TICKET_RELATIONS
+    ]
+
+
+# Ticket relationship -> (model, column the rows are ordered and filtered by)
+TICKET_CHILDREN = {
+    "status_history": (models.TicketStatusHistory, models.TicketStatusHistory.timestamp),
+    "alerts": (models.Alert, models.Alert.created_at),
+}
+
+
+def get_ticket(
+        db: Session,
+        ticket_id: str,
+        include: Optional[Iterable[str]] = None,
+        latest: Optional[int] = None
+) -> Optional[models.Ticket]:
+    """
+    Retrieve a ticket by its ID, eagerly loading the relationships
+    in `include` when given. With `latest`, each included relationship
+    holds only its `latest` most recent rows, oldest first.
+    """
+    query = db.query(models.Ticket).filter(models.Ticket.id == ticket_id)
+    if include is not None and latest is not None:
+        ticket = query.options(*ticket_load_options(())).first()
+        if ticket is not None:
+            for relation in include:
+                set_committed_value(ticket, relation, latest_ticket_children(db, relation, ticket_id, latest))
+        return ticket
+    if include is not None:
+        query = query.options(*ticket_load_options(include))
+    return query.first()
+
+
+def ticket_version(db: Session, ticket_id: str) -> Optional[tuple]:
+    """
+    Cheap fingerprint of everything GET /tickets/{id} returns: one indexed
+    lookup, no relationships loaded. Returns None if the ticket is missing.
+
+    The latest alert id is read from ix_alerts_ticket_id_created_at (its
+    leading column is ticket_id, and id is the rowid), never a table scan.
+    """
+    latest_alert = (
+        select(func.max(models.Alert.id))
+        .where(models.Alert.ticket_id == models.Ticket.id)
+        .scalar_subquery()
+    )
+    row = db.execute(
+        select(models.Ticket.updated_at, models.Ticket.escalation_level, latest_alert, _latest_archive_run())
+        .where(models.Ticket.id == ticket_id)
+    ).first()
+    return tuple(row) if row is not None else None
+
+
+def ticket_etag(ticket_id: str, include: Iterable[str], latest: Optional[int], archived: bool, version: tuple) -> str:
+    """
+    ETag of GET /tickets/{id} from a ticket_version() fingerprint.
+
+    Without relationships the body is the ticket row alone, which only
+    changes with updated_at or escalation_level (every alert bumps it), so
+    only those two count and the hot set, which holds them, derives the
+    same ETag as the database path.
+    """
+    include = tuple(include)
+    if not include:
+        return make_etag("ticket", ticket_id, include, *version[:2])
+    return make_etag("ticket", ticket_id, include, latest, archived, *version)
+
+
+def dashboard_version(db: Session) -> tuple:
+    """
+    Fingerprint of the dashboard contents. Every committed ticket change
+    appends a status history row or an alert, so the highest ids of both
+    tables move on every write, and every archive run removes rows; each
+    is a single primary-key index probe.
+    """
+    row = db.execute(select(
+        select(func.max(models.TicketStatusHistory.id)).scalar_subquery(),
+        select(func.max(models.Alert.id)).scalar_subquery(),
+        _latest_archive_run(),
+    )).one()
+    return tuple(row)
+
+
+def _latest_archive_run():
+    return select(func.max(models.ArchiveRun.id)).scalar_subquery()
+
+
+def get_tickets(
+        db: Session,
+        ticket_ids: Sequence[str],
+        include: Iterable[str] = schemas.TICKET_RELATIONS
+) -> List[models.Ticket]:
+    """
+    Load several tickets in one round trip (plus one per included
+    relationship), returned in the order of `ticket_ids`.
+    """
+    tickets = (
+        db.query(models.Ticket)
+        .filter(models.Ticket.id.in_(set(ticket_ids)))
+        .options(*ticket_load_options(include))
+        .populate_existing()
+        .all()
+    )
+    by_id = {t.id: t for t in tickets}
+    return [by_id[tid] for tid in ticket_ids if tid in by_id]
 
 
 def create_ticket(db: Session, ticket_event: schemas.TicketEvent) -> models.Ticket:
     """
     Create a new ticket and its initial status history.
     """
+    _register_values(ticket_event)
     ticket = models.Ticket(
         id=ticket_event.id,
         priority=ticket_event.priority,
         customer_tier=ticket_event.customer_tier,
         created_at=ticket_event.created_at,
-        updated_at=ticket_event.updated_at
+        updated_at=ticket_event.updated_at,
+        status=ticket_event.status
     )
     db.add(ticket)
     # Add initial status history
@@ -37,9 +159,9 @@ def create_ticket(db: Session, ticket_event: schemas.TicketEvent) -> models.Tick
     db.add(status_history)
     db.commit()
     db.refresh(ticket)
+    _after_ticket_write(ticket, None, _cell(ticket))
     # Structured logging for ingestion
     logger.info({
-        "correlation_id": None,
         "ticket_id": ticket.id,
         "operation": "ingest",
         "priority": ticket.priority,
@@ -55,8 +177,10 @@ def update_ticket(db: Session, ticket_event: schemas.TicketEvent) -> models.Tick
     Update an existing ticket if the event is newer, or create it if not present.
     Maintains idempotency based on updated_at.
     """
+    _register_values(ticket_event)
     existing = get_ticket(db, ticket_event.id)
     if existing is None:
+        metrics.ticket_events.inc("accepted")
         return create_ticket(db, ticket_event)
 
     # Ensure timezone-aware comparison
@@ -70,12 +194,17 @@ def update_ticket(db: Session, ticket_event: schemas.TicketEvent) -> models.Tick
 
     # Check event freshness (idempotency)
     if event_updated_at <= existing_updated_at:
+        metrics.ticket_events.inc("stale")
         return existing
+    metrics.ticket_events.inc("accepted")
+
+    before = _cell(existing)
 
     # Update fields
     existing.priority = ticket_event.priority
     existing.customer_tier = ticket_event.customer_tier
     existing.updated_at = ticket_event.updated_at
+    existing.status = ticket_event.status
     db.add(existing)
 
     # Add status history entry
@@ -88,9 +217,9 @@ def update_ticket(db: Session, ticket_event: schemas.TicketEvent) -> models.Tick
 
     db.commit()
     db.refresh(existing)
+    _after_ticket_write(existing, before, _cell(existing))
     # Structured logging for update
     logger.info({
-        "correlation_id": None,
         "ticket_id": existing.id,
         "operation": "update",
         "priority": existing.priority,
@@ -107,6 +236,141 @@ def list_tickets(db: Session, skip: int = 0, limit: int = 100) -> List[models.Ti
     return db.query(models.Ticket).offset(skip).limit(limit).all()
 
 
+def dashboard_query(
+        db: Session,
+        state: Optional[models.SLAState] = None,
+        include: Iterable[str] = schemas.TICKET_RELATIONS,
+        customer_tier: Optional[str] = None,
+        priority: Optional[str] = None
+) -> Query:
+    """
+    Build the dashboard ticket query, optionally filtered by SLA state,
+    customer tier and priority, with the relationships in `include`
+    loaded up front. Filters hit the indexed columns on tickets.
+    """
+    query = db.query(models.Ticket).options(*ticket_load_options(include))
+
+    if state is not None:
+        # If filtering for ALERT, include BREACH as well
+        valid_states = [state]
+        if state == models.SLAState.ALERT:
+            valid_states.append(models.SLAState.BREACH)
+        query = query.filter(models.Ticket.sla_state.in_(valid_states))
+    if customer_tier is not None:
+        query = query.filter(models.Ticket.customer_tier == customer_tier)
+    if priority is not None:
+        query = query.filter(models.Ticket.priority == priority)
+
+    return query
+
+
+def paginate_tickets(
+        query: Query,
+        limit: int,
+        offset: int = 0,
+        cursor: Optional[str] = None
+) -> Tuple[List[models.Ticket], Optional[str]]:
+    """
+    Return one page of tickets in stable (updated_at, id) order and the
+    cursor of the next page, or None when this is the last page.
+
+    With a cursor the page starts right after the cursor's key, so it costs
+    one index range scan however deep it is; otherwise `offset` is applied.
+    Raises pagination.InvalidCursor for malformed cursors.
+    """
+    sort_key = tuple_(models.Ticket.updated_at, models.Ticket.id)
+    query = query.order_by(models.Ticket.updated_at, models.Ticket.id)
+    if cursor is not None:
+        updated_at, ticket_id = decode_cursor(cursor, (datetime.fromisoformat, str))
+        query = query.filter(sort_key > tuple_(updated_at, ticket_id))
+    elif offset:
+        query = query.offset(offset)
+
+    tickets = query.limit(limit).all()
+    next_cursor = None
+    if len(tickets) == limit:
+        last = tickets[-1]
+        next_cursor = encode_cursor(last.updated_at, last.id)
+    return tickets, next_cursor
+
+
+def ticket_children_query(
+        db: Session,
+        relation: str,
+        ticket_id: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+) -> Query:
+    """
+    Rows of one ticket relationship ("status_history" or "alerts"), limited
+    to [since, until) on their timestamp. Served by the (ticket_id, time, id)
+    index of the child table.
+    """
+    model, time_column = TICKET_CHILDREN[relation]
+    query = db.query(model).filter(model.ticket_id == ticket_id)
+    if since is not None:
+        query = query.filter(time_column >= since)
+    if until is not None:
+        query = query.filter(time_column < until)
+    return query
+
+
+def paginate_ticket_children(
+        db: Session,
+        relation: str,
+        ticket_id: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+) -> Tuple[list, Optional[str]]:
+    """
+    Return one page of a ticket's history or alerts in (time, id) order and
+    the cursor of the next page, or None when this is the last page.
+    Raises pagination.InvalidCursor for malformed cursors.
+    """
+    model, time_column = TICKET_CHILDREN[relation]
+    query = ticket_children_query(db, relation, ticket_id, since, until).order_by(time_column, model.id)
+    if cursor is not None:
+        timestamp, row_id = decode_cursor(cursor, (datetime.fromisoformat, int))
+        query = query.filter(tuple_(time_column, model.id) > tuple_(timestamp, row_id))
+
+    rows = query.limit(limit).all()
+    next_cursor = None
+    if len(rows) == limit:
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, time_column.key), last.id)
+    return rows, next_cursor
+
+
+def latest_ticket_children(db: Session, relation: str, ticket_id: str, count: int) -> list:
+    """
+    The `count` most recent rows of a ticket relationship, oldest first.
+    """
+    model, time_column = TICKET_CHILDREN[relation]
+    rows = (
+        ticket_children_query(db, relation, ticket_id)
+        .order_by(time_column.desc(), model.id.desc())
+        .limit(count)
+        .all()
+    )
+    return rows[::-1]
+
+
+def alerts_by_percent_used(db: Session, min_percent_used: float, limit: int) -> List[models.Alert]:
+    """
+    Alerts recorded at `min_percent_used` of their SLA or more, highest
+    first; a range scan of ix_alerts_percent_used.
+    """
+    return (
+        db.query(models.Alert)
+        .filter(models.Alert.percent_used >= min_percent_used)
+        .order_by(models.Alert.percent_used.desc(), models.Alert.id.desc())
+        .limit(limit)
+        .all()
+    )
+
+
 def create_alert(
         db: Session,
         ticket_id: str,
@@ -115,26 +379,87 @@ def create_alert(
         details: dict
 ) -> models.Alert:
     """
-    Persist a new Alert row and bump the ticket's escalation_level by 1.
+    Persist a new Alert row, bump the ticket's escalation_level by 1
+    and raise its materialized sla_state if this alert is worse.
     """
+    codebook.register([("sla_type", sla_type)])
     ticket = db.query(models.Ticket).filter(models.Ticket.id == ticket_id).first()
     if not ticket:
         raise ValueError(f"Ticket {ticket_id} not found")
 
     # create alert
+    now = datetime.now(timezone.utc)
     alert = models.Alert(
         ticket_id=ticket_id,
         sla_type=sla_type,
         state=state,
+        created_at=now,
         details=details
     )
     db.add(alert)
 
     # bump escalation level
     ticket.escalation_level += 1
+    before = _cell(ticket)
+
+    # keep the worst state seen so far on the ticket itself
+    current_state = ticket.sla_state or models.SLAState.OK
+    if state.severity > current_state.severity:
+        ticket.sla_state = state
+        ticket.sla_state_at = now
+
+    after = _cell(ticket)
 
     # commit both the new alert and the ticket update
     db.commit()
     # refresh so alert.created_at, alert.id, etc. are populated
     db.refresh(alert)
+    _after_ticket_write(ticket, before, after)
     return alert
+
+
+def backfill_sla_state(connection: Connection) -> int:
+    """
+    Set the materialized sla_state of tickets still at OK that have alerts
+    (written before tickets carried it) to the worst state among them, as
+    create_alert would have, with sla_state_at the first alert in that
+    state. Returns the tickets updated; a no-op once they are all set.
+    """
+    updated = 0
+    # worst first: a ticket with a breach is not then lowered to alert
+    for state in (models.SLAState.BREACH, models.SLAState.ALERT):
+        alerts = select(models.Alert.created_at).where(
+            models.Alert.ticket_id == models.Ticket.id, models.Alert.state == state
+        )
+        updated += connection.execute(
+            update(models.Ticket)
+            .where(models.Ticket.sla_state == models.SLAState.OK, exists(alerts))
+            .values(sla_state=state, sla_state_at=alerts.with_only_columns(func.min(models.Alert.created_at))
+                    .scalar_subquery())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+    return updated
+
+
+def _register_values(ticket_event: schemas.TicketEvent) -> None:
+    # New values are committed on their own connection; doing it before this
+    # transaction writes anything keeps it from waiting on our own lock
+    codebook.register([
+        ("priority", ticket_event.priority),
+        ("customer_tier", ticket_event.customer_tier),
+        ("status", ticket_event.status),
+    ])
+
+
+def _cell(ticket: models.Ticket) -> Cell:
+    return ticket_cell(ticket.customer_tier, ticket.priority, ticket.sla_state)
+
+
+def _after_ticket_write(ticket: models.Ticket, before: Optional[Cell], after: Cell) -> None:
+    """
+    Called once a change to a ticket (or its history/alerts) is committed,
+    with the ticket's stats cell before and after the change.
+    """
+    response_cache.invalidate_ticket(ticket.id)
+    sla_stats.ticket_changed(before, after)
+    hot_set.put(ticket)
@@ -1,9 +1,192 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Tuple
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session, declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from src import metrics, querylog, settings  # noqa: F401 (querylog instruments every engine)
+from src.components import Component
+
+
+class PoolStats:
+    """
+    How long connection checkouts waited for the pool, and how many gave up.
+    """
+
+    # waits longer than this are counted as slow
+    SLOW_MS = 100.0
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.slow = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, wait_ms: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_ms_total += wait_ms
+            self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+            if wait_ms >= self.SLOW_MS:
+                self.slow += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "slow_checkouts": self.slow,
+                "wait_ms_avg": self.wait_ms_total / attempts if attempts else 0.0,
+                "wait_ms_max": self.wait_ms_max,
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that times every checkout, including the wait for a free
+    connection when the pool and its overflow are exhausted.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record((time.perf_counter() - started) * 1000, timed_out=True)
+            raise
+        self.stats.record((time.perf_counter() - started) * 1000)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def build_engine(url: str, **pool_options: Any) -> Engine:
+    """
+    Create the engine for `url` with the pool settings from settings.py
+    (overridable through `pool_options`).
+
+    SQLite file databases get WAL journaling and the SQLITE_* pragmas on
+    every new connection, so readers do not block the writer on a single
+    node. In-memory SQLite keeps SQLAlchemy's default single-connection pool.
+    """
+    database_url = make_url(url)
+    if database_url.get_backend_name() == "sqlite" and database_url.database in (None, "", ":memory:"):
+        return create_engine(url, echo=False, future=True, connect_args={"check_same_thread": False})
 
-from src import settings
+    options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    options.update(pool_options)
+    connect_args = {}
+    if database_url.get_backend_name() == "sqlite":
+        connect_args["check_same_thread"] = False
+    engine = create_engine(
+        url, echo=False, future=True, poolclass=InstrumentedQueuePool, connect_args=connect_args, **options
+    )
+    if database_url.get_backend_name() == "sqlite":
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+    return engine
 
-engine = create_engine(settings.DATABASE_URL, echo=False, future=True)
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+
+def pool_status(engine: Engine) -> Dict[str, Any]:
+    """
+    Current pool occupancy and checkout wait statistics of `engine`.
+    """
+    pool = engine.pool
+    status: Dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        })
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        status.update(stats.as_dict())
+    return status
+
+
+# create_engine() does not connect; the first session does
+engine = build_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
+
+
+def _pool_connections() -> Dict[Tuple[str], float]:
+    status = pool_status(engine)
+    # QueuePool.overflow() counts down from zero while the pool is still filling
+    return {(state,): max(0, status[state]) for state in ("checked_in", "checked_out", "overflow") if state in status}
+
+
+metrics.db_pool_connections.set_function(_pool_connections)
+metrics.db_pool_timeouts.set_function(lambda: pool_status(engine).get("timeouts", 0))
+
+
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    """
+    A session for one unit of work, owned by the calling thread: rolled
+    back if the block raises, committed otherwise, and always closed.
+    """
+    session = SessionLocal()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def create_schema() -> None:
+    """
+    Create any missing tables and indexes, refusing a database whose
+    existing tables predate the lookup-code encoding, and fill in the
+    materialized SLA state of tickets alerted before it was kept.
+    """
+    from src import crud, models  # noqa: F401 -- models registers the tables on Base.metadata
+    from src.codes import check_encoded_columns
+    check_encoded_columns(engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        crud.backfill_sla_state(connection)
+
+
+schema_component = Component("database", create_schema)
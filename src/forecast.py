@@ -0,0 +1,134 @@
+import heapq
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from src import models
+from src.config import SLA_TYPES, SLAConfigSnapshot
+from src.hotset import active_tickets, hot_set
+
+# The ticket columns an at-risk entry shows
+AT_RISK_COLUMNS = (
+    models.Ticket.id,
+    models.Ticket.customer_tier,
+    models.Ticket.priority,
+    models.Ticket.status,
+    models.Ticket.created_at,
+    models.Ticket.escalation_level,
+    models.Ticket.sla_state,
+)
+
+_DURATION = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*$")
+_UNIT_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_duration(value: str) -> timedelta:
+    """
+    "90s", "30m", "2h", "1d"; a bare number is minutes.
+    """
+    match = _DURATION.match(value)
+    if match is None:
+        raise ValueError(f"Invalid duration {value!r}; expected e.g. 30m, 2h or 90s")
+    amount, unit = match.groups()
+    return timedelta(seconds=float(amount) * _UNIT_SECONDS[unit or "m"])
+
+
+def tickets_at_risk(
+        db: Session,
+        sla_config: SLAConfigSnapshot,
+        within: timedelta,
+        now: Optional[datetime] = None,
+        customer_tier: Optional[str] = None,
+        priority: Optional[str] = None,
+        limit: int = 100
+) -> List[Dict[str, Any]]:
+    """
+    Active tickets whose next SLA breach falls within `within` from now,
+    soonest first, at most `limit`; each ticket once, for its earliest
+    upcoming breach. created_at and breach_at are naive UTC, like every
+    stored time the API returns.
+
+    Within one (tier, priority, sla_type) cell every ticket has the same
+    breach target, so breach order is creation order and the tickets
+    breaching in (now, now + within] are exactly those created in
+    (now - breach, now - breach + within]: one range scan of
+    ix_tickets_customer_tier_priority_created_at per configured cell,
+    merged by breach time. Tickets outside the window are never read.
+    """
+    now = now or datetime.now(timezone.utc)
+    cells = [
+        (key, target) for key, target in sla_config.targets.items()
+        if key[2] in SLA_TYPES
+        and (customer_tier is None or key[0] == customer_tier)
+        and (priority is None or key[1] == priority)
+    ]
+    streams = [
+        _cell_breaches(db, tier, priority_name, sla_type, timedelta(minutes=target.breach_minutes), now, within, limit)
+        for (tier, priority_name, sla_type), target in cells
+    ]
+
+    results: List[Dict[str, Any]] = []
+    seen = set()
+    for breach_at, ticket_id, sla_type, row in heapq.merge(*streams):
+        if ticket_id in seen:
+            continue
+        seen.add(ticket_id)
+        results.append({
+            "id": row.id,
+            "customer_tier": row.customer_tier,
+            "priority": row.priority,
+            "status": row.status,
+            "created_at": _naive_utc(row.created_at),
+            "escalation_level": row.escalation_level,
+            "sla_state": row.sla_state,
+            "sla_type": sla_type,
+            "breach_at": _naive_utc(breach_at),
+            "minutes_to_breach": (breach_at - now).total_seconds() / 60,
+        })
+        if len(results) >= limit:
+            break
+    return results
+
+
+def _cell_breaches(
+        db: Session,
+        tier: str,
+        priority: str,
+        sla_type: str,
+        breach: timedelta,
+        now: datetime,
+        within: timedelta,
+        limit: int
+) -> Iterator[Tuple[datetime, str, str, Any]]:
+    # the query runs when heapq.merge first pulls from this cell
+    created_after = now - breach
+    query = (
+        db.query(*AT_RISK_COLUMNS)
+        .filter(
+            models.Ticket.customer_tier == tier,
+            models.Ticket.priority == priority,
+            models.Ticket.created_at > created_after,
+            models.Ticket.created_at <= created_after + within,
+        )
+    )
+    # a ticket can appear in up to len(SLA_TYPES) cells; the first `limit` per cell always suffice
+    rows = (
+        active_tickets(query, hot_set.closed_statuses)
+        .order_by(models.Ticket.created_at, models.Ticket.id)
+        .limit(limit)
+        .all()
+    )
+    for row in rows:
+        created = row.created_at
+        if created.tzinfo is None:
+            created = created.replace(tzinfo=timezone.utc)
+        yield created + breach, row.id, sla_type, row
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # stored columns are naive UTC
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
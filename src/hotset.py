@@ -0,0 +1,228 @@
+import logging
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Collection, Dict, List, Optional, Set
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Query, Session
+
+from src import metrics, models, settings
+
+logger = logging.getLogger(__name__)
+
+# The ticket columns a hot entry holds
+HOT_COLUMNS = (
+    models.Ticket.id,
+    models.Ticket.priority,
+    models.Ticket.customer_tier,
+    models.Ticket.created_at,
+    models.Ticket.updated_at,
+    models.Ticket.escalation_level,
+    models.Ticket.sla_state,
+    models.Ticket.sla_state_at,
+    models.Ticket.status,
+)
+
+
+class HotTicket:
+    """
+    The scalar fields of one active ticket. Readable like a Ticket by the
+    SLA evaluator and TicketSchema; tiers, priorities and statuses are
+    interned, so every entry shares the same few strings.
+    """
+    __slots__ = tuple(column.key for column in HOT_COLUMNS)
+
+    def __init__(self, source: Any):
+        self.id = source.id
+        self.priority = sys.intern(source.priority)
+        self.customer_tier = sys.intern(source.customer_tier)
+        self.created_at = _as_stored(source.created_at)
+        self.updated_at = _as_stored(source.updated_at)
+        self.escalation_level = source.escalation_level
+        self.sla_state = source.sla_state or models.SLAState.OK
+        self.sla_state_at = _as_stored(source.sla_state_at)
+        self.status = sys.intern(source.status) if source.status is not None else None
+
+    def key(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"<HotTicket id={self.id} status={self.status}>"
+
+
+def _as_stored(value: Optional[datetime]) -> Optional[datetime]:
+    # the columns hold naive UTC; objects not yet reloaded may still be aware
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def active_tickets(query: Query, closed_statuses: Collection[str]) -> Query:
+    """
+    Restrict a Ticket query to tickets whose last status is not closed.
+    """
+    return query.filter(or_(models.Ticket.status.is_(None), models.Ticket.status.not_in(list(closed_statuses))))
+
+
+class HotSet:
+    """
+    In-process copy of the active tickets, kept current write-through by
+    crud and re-read from the database by verify().
+
+    Bounded to `max_tickets` entries, least recently used evicted first;
+    tickets moving to a closed status leave it at once. It is `complete`
+    when it provably holds every active ticket (loaded from the database,
+    nothing evicted since): only then can it stand in for a table scan.
+    Writes made by other worker processes show up at the next verify().
+    """
+
+    def __init__(self, max_tickets: int, closed_statuses: Collection[str]):
+        self.max_tickets = max_tickets
+        self.closed_statuses = frozenset(closed_statuses)
+        self.complete = False
+        self.loaded_at: Optional[datetime] = None
+        self._tickets: "OrderedDict[str, HotTicket]" = OrderedDict()
+        self._written_during_load: Optional[Set[str]] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.drift = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_tickets > 0
+
+    def get(self, ticket_id: str) -> Optional[HotTicket]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            ticket = self._tickets.get(ticket_id)
+            if ticket is None:
+                self.misses += 1
+                return None
+            self._tickets.move_to_end(ticket_id)
+            self.hits += 1
+            return ticket
+
+    def put(self, ticket: Any) -> None:
+        """
+        Write-through after a committed change to `ticket`.
+        """
+        if not self.enabled:
+            return
+        closed = ticket.status in self.closed_statuses
+        entry = None if closed else HotTicket(ticket)
+        with self._lock:
+            if self._written_during_load is not None:
+                self._written_during_load.add(ticket.id)
+            if closed:
+                self._tickets.pop(ticket.id, None)
+                return
+            self._tickets[ticket.id] = entry
+            self._tickets.move_to_end(ticket.id)
+            self._evict()
+
+    def tickets(self) -> Optional[List[HotTicket]]:
+        """
+        Every active ticket, or None unless the set is complete.
+        """
+        with self._lock:
+            if not self.complete:
+                return None
+            return list(self._tickets.values())
+
+    def ensure_loaded(self, db: Session) -> None:
+        if self.enabled and self.loaded_at is None:
+            self.load(db)
+
+    def load(self, db: Session) -> int:
+        """
+        Replace the contents with the active tickets in the database, most
+        recently updated first, and return how many entries differed.
+        Changes written through while the query runs are kept.
+        """
+        if not self.enabled:
+            return 0
+        with self._lock:
+            self._written_during_load = set()
+        try:
+            rows = (
+                active_tickets(db.query(*HOT_COLUMNS), self.closed_statuses)
+                .order_by(models.Ticket.updated_at.desc())
+                .limit(self.max_tickets + 1)
+                .all()
+            )
+        except Exception:
+            with self._lock:
+                self._written_during_load = None
+            raise
+
+        loaded = OrderedDict((row.id, HotTicket(row)) for row in reversed(rows[:self.max_tickets]))
+        with self._lock:
+            for ticket_id in self._written_during_load:
+                if ticket_id in self._tickets:
+                    loaded[ticket_id] = self._tickets[ticket_id]
+                else:
+                    loaded.pop(ticket_id, None)
+            self._written_during_load = None
+            drift = _drift(self._tickets, loaded) if self.loaded_at is not None else 0
+            self._tickets = loaded
+            self.complete = len(rows) <= self.max_tickets
+            self.loaded_at = datetime.now(timezone.utc)
+            self.drift += drift
+        return drift
+
+    def verify(self, db: Session) -> int:
+        """
+        Reload from the database, logging the entries that were stale.
+        """
+        drift = self.load(db)
+        if drift:
+            logger.warning({
+                "operation": "hotset_verify",
+                "drift": drift,
+            })
+        return drift
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tickets.clear()
+            self.complete = False
+            self.loaded_at = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "tickets": len(self._tickets),
+                "max_tickets": self.max_tickets,
+                "complete": self.complete,
+                "loaded_at": self.loaded_at,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "drift": self.drift,
+            }
+
+    def _evict(self) -> None:
+        while len(self._tickets) > self.max_tickets:
+            self._tickets.popitem(last=False)
+            self.evictions += 1
+            # an active ticket is no longer held
+            self.complete = False
+
+
+def _drift(current: Dict[str, HotTicket], loaded: Dict[str, HotTicket]) -> int:
+    drift = 0
+    for ticket_id in set(current) | set(loaded):
+        old, new = current.get(ticket_id), loaded.get(ticket_id)
+        if old is None or new is None or old.key() != new.key():
+            drift += 1
+    return drift
+
+
+hot_set = HotSet(settings.HOTSET_MAX_TICKETS, settings.CLOSED_STATUSES)
+metrics.hot_set_tickets.set_function(lambda: len(hot_set._tickets))
@@ -1,26 +1,80 @@
 import json
 import logging
 import time
-import uuid
 
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
-from starlette.requests import Request
-from starlette.responses import Response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src import metrics, settings
+from src.logs import bind_correlation_id
+from src.profiling import profiler
+from src.querylog import track_queries
 
 logger = logging.getLogger(__name__)
+access_logger = logging.getLogger("uvicorn.access")
+
+CORRELATION_HEADER = "X-Correlation-ID"
+
+
+class StructuredLoggingMiddleware:
+    """
+    Pure ASGI middleware: binds a correlation id (the caller's
+    X-Correlation-ID, or a new one) for everything the request runs,
+    including streamed bodies, and once the response is complete records
+    its latency, status and SQL counts in the access log and metrics.
+    Response messages are passed straight through.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        headers = Headers(scope=scope)
+        forced = settings.PROFILE_HEADER_ENABLED and headers.get("X-Profile") == "1"
+        profile_mode = profiler.take_request(forced)
+        profile = None
+        status = 500
+
+        with bind_correlation_id(headers.get(CORRELATION_HEADER)) as correlation_id:
+            with track_queries(correlation_id, scope["path"]) as queries:
 
+                async def send_with_headers(message: Message) -> None:
+                    nonlocal status
+                    if message["type"] == "http.response.start":
+                        status = message["status"]
+                        response_headers = MutableHeaders(scope=message)
+                        response_headers[CORRELATION_HEADER] = correlation_id
+                        if settings.DEBUG:
+                            # statements run while a body is streamed come after this
+                            response_headers["X-Query-Count"] = str(queries.count)
+                            response_headers["X-Query-Time-Ms"] = str(queries.ms)
+                        if profile is not None:
+                            response_headers["X-Profile"] = profile["name"]
+                    await send(message)
 
-class StructuredLoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        start = time.time()
-        correlation_id = str(uuid.uuid4())
-        response = await call_next(request)
-        latency = int((time.time() - start) * 1000)
-        payload = {
-            "correlation_id": correlation_id,
-            "path": request.url.path,
-            "status": response.status_code,
-            "latency_ms": latency,
-        }
-        logging.getLogger("uvicorn.access").info(json.dumps(payload))
-        return response
+                try:
+                    if profile_mode is None:
+                        await self.app(scope, receive, send_with_headers)
+                    else:
+                        # profiles the event loop thread: other requests served meanwhile show up too
+                        label = f"{scope['method']} {scope['path']}"
+                        with profiler.capture(label, profile_mode) as profile:
+                            await self.app(scope, receive, send_with_headers)
+                finally:
+                    elapsed = time.perf_counter() - start
+                    # the route template, not the raw path, keeps the label set bounded
+                    route = getattr(scope.get("route"), "path", "unmatched")
+                    metrics.http_request_duration.observe(elapsed, scope["method"], route, str(status))
+                    if access_logger.isEnabledFor(logging.INFO):
+                        access_logger.info(json.dumps({
+                            "correlation_id": correlation_id,
+                            "path": scope["path"],
+                            "status": status,
+                            "latency_ms": int(elapsed * 1000),
+                            **queries.as_dict(),
+                        }))
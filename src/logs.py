@@ -0,0 +1,111 @@
+import logging
+import queue
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable, Dict, Iterator, List, Optional
+
+from src import settings
+from src.components import Component
+
+# Correlation id of the request or scheduler run being served. Set by the
+# logging middleware and tracked scheduler jobs; copied into threadpool
+# calls and tasks started from them, like any context variable.
+correlation_id: ContextVar[Optional[str]] = ContextVar("correlation_id", default=None)
+
+
+def new_correlation_id() -> str:
+    return str(uuid.uuid4())
+
+
+@contextmanager
+def bind_correlation_id(value: Optional[str] = None) -> Iterator[str]:
+    """
+    Run the block under `value` (a fresh id by default).
+    """
+    value = value or new_correlation_id()
+    token = correlation_id.set(value)
+    try:
+        yield value
+    finally:
+        correlation_id.reset(token)
+
+
+_base_factory: Optional[Callable[..., logging.LogRecord]] = None
+
+
+def _record_factory(*args, **kwargs) -> logging.LogRecord:
+    record = _base_factory(*args, **kwargs)
+    # Runs on the thread creating the record, so a queued record keeps the id
+    # of the request or job that logged it
+    record.correlation_id = correlation_id.get()
+    if isinstance(record.msg, dict) and record.msg.get("correlation_id") is None:
+        record.msg = {"correlation_id": record.correlation_id, **record.msg}
+    return record
+
+
+def install_record_factory() -> None:
+    """
+    Stamp every log record with the current correlation id, and fill it
+    into structured (dict) messages that do not carry one.
+    """
+    global _base_factory
+    if _base_factory is None:
+        _base_factory = logging.getLogRecordFactory()
+        logging.setLogRecordFactory(_record_factory)
+
+
+# Loggers whose own handlers are moved behind the queue with the root's:
+# uvicorn's access and error output does not propagate to the root logger.
+QUEUED_LOGGERS = ("", "uvicorn", "uvicorn.error", "uvicorn.access")
+
+
+class _LoggingHandle:
+    def __init__(self, listeners: List[QueueListener], handlers: Dict[str, List[logging.Handler]]):
+        self.listeners = listeners
+        self.handlers = handlers
+
+
+def configure_logging() -> _LoggingHandle:
+    """
+    Install the correlation id record factory and, with LOG_QUEUE, move the
+    handlers of the root and uvicorn loggers behind queues drained by
+    listener threads, so a request or job only pays for creating the
+    record; formatting and writing happen off its thread.
+    """
+    install_record_factory()
+    root = logging.getLogger()
+    root.setLevel(settings.LOG_LEVEL)
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+        root.addHandler(handler)
+    handlers = {
+        name: list(logging.getLogger(name).handlers)
+        for name in QUEUED_LOGGERS if logging.getLogger(name).handlers
+    }
+    if not settings.LOG_QUEUE:
+        return _LoggingHandle([], handlers)
+
+    listeners = []
+    for name, logger_handlers in handlers.items():
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, *logger_handlers, respect_handler_level=True)
+        logging.getLogger(name).handlers = [QueueHandler(log_queue)]
+        listener.start()
+        listeners.append(listener)
+    return _LoggingHandle(listeners, handlers)
+
+
+def _stop_logging(handle: _LoggingHandle) -> None:
+    if not handle.listeners:
+        return
+    for name, handlers in handle.handlers.items():
+        logging.getLogger(name).handlers = handlers
+    # each stop drains what is queued before returning
+    for listener in handle.listeners:
+        listener.stop()
+
+
+logging_component = Component("logging", configure_logging, stop=_stop_logging)
@@ -1,15 +1,27 @@
 import asyncio
 import logging
+import time
 from contextlib import asynccontextmanager
-from typing import List, Optional, Union
+from datetime import datetime
+from typing import List, Optional, Tuple, Union
 
-from fastapi import FastAPI, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, Body
+from fastapi import APIRouter, FastAPI, Depends, HTTPException, Header, Query, WebSocket, WebSocketDisconnect, Body
+from fastapi.responses import Response, StreamingResponse
+from pydantic import TypeAdapter
 
-from src import crud, schemas, models
-from src.config import start_config_watcher
-from src.database import SessionLocal, engine, Base
+from src import admin, archive, components, crud, forecast, metrics, schemas, models, serialization, settings
+from src.broadcast import broadcast_component
+from src.cache import CachedResponse, response_cache
+from src.config import as_snapshot, config_component, get_sla_config, watcher_component
+from src.database import schema_component, session_scope
+from src.etag import etag_matches, make_etag
+from src.hotset import hot_set
 from src.logging_middleware import StructuredLoggingMiddleware
-from src.scheduler import start_scheduler, evaluate_slas_for_ticket
+from src.logs import logging_component
+from src.pagination import InvalidCursor
+from src.scheduler import evaluate_slas_for_ticket, scheduler_component
+from src.sse import alert_stream
+from src.stats import sla_stats
 from src.ws import manager
 
 for logger_name in [
@@ -24,38 +36,64 @@ for logger_name in [
 
 logger = logging.getLogger(__name__)
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Started in this order when the app starts; each at most once per process
+STARTUP_COMPONENTS = (
+    logging_component,  # correlation ids and the log queue
+    schema_component,  # create missing tables
+    config_component,  # load sla_config.yaml
+    watcher_component,  # reload it on change
+    broadcast_component,  # join the cross-worker alert fan-out
+    scheduler_component,  # background SLA evaluator
+)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Start the file‐watcher for sla_config.yaml
-    start_config_watcher()
-    # Start the background SLA evaluator
-    start_scheduler()
+    started = time.perf_counter()
+    for component in STARTUP_COMPONENTS:
+        component.ensure_started()
+    logger.info({
+        "operation": "startup",
+        "component": "app",
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+        "components": components.startup_report(),
+    })
     yield
-    # (no teardown needed at the moment)
+    components.stop_all()
 
 
-app = FastAPI(
-    title="Ticket Watchdog",
-    lifespan=lifespan
-)
-app.add_middleware(StructuredLoggingMiddleware)
+router = APIRouter()
+
+ticket_list_adapter = TypeAdapter(List[schemas.TicketSchema])
 
 
 def get_db():
-    db = SessionLocal()
-    try:
+    schema_component.ensure_started()
+    with session_scope() as db:
         yield db
-    finally:
-        db.close()
 
 
-@app.post("/tickets", response_model=List[schemas.TicketSchema])
+def get_include(
+        include: Optional[str] = Query(
+            None,
+            description="Comma-separated relationships to embed (status_history, alerts). "
+                        "Defaults to all; pass an empty value to skip them.",
+        )
+) -> Tuple[str, ...]:
+    if include is None:
+        return schemas.TICKET_RELATIONS
+    relations = tuple(r.strip() for r in include.split(",") if r.strip())
+    unknown = set(relations) - set(schemas.TICKET_RELATIONS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown include value(s): {', '.join(sorted(unknown))}")
+    return relations
+
+
+@router.post("/tickets", response_model=List[schemas.TicketSchema], response_model_exclude_unset=True)
 async def ingest_ticket_events(
     events: Union[schemas.TicketEvent, List[schemas.TicketEvent]] = Body(...),
+    include: Tuple[str, ...] = Depends(get_include),
+    fast: bool = Query(False, description="Serialize straight from row tuples (same JSON, less overhead)"),
     db = Depends(get_db)
 ):
     # Normalize to list
@@ -63,55 +101,295 @@ async def ingest_ticket_events(
         events = [schemas.TicketEvent(**events)]
     elif isinstance(events, schemas.TicketEvent):
         events = [events]
-    tickets = []
+    ticket_ids = []
     for e in events:
         ticket = crud.update_ticket(db, e)
-        tickets.append(ticket)
+        ticket_ids.append(ticket.id)
         evaluate_slas_for_ticket(ticket.id)
-    return [schemas.TicketSchema.model_validate(t) for t in tickets]
+    if fast:
+        return Response(content=serialization.dump_tickets_by_id(db, ticket_ids, include),
+                        media_type="application/json")
+    # Reload the batch with its relationships in a fixed number of queries
+    tickets = crud.get_tickets(db, ticket_ids, include)
+    return [schemas.TicketSchema.from_ticket(t, include) for t in tickets]
+
 
+@router.get("/tickets/at-risk", response_model=List[schemas.AtRiskTicketSchema])
+async def get_tickets_at_risk(
+        within: str = Query("30m", description="Look-ahead window, e.g. 30m, 2h or 90s (bare numbers are minutes)"),
+        customer_tier: Optional[str] = Query(None),
+        priority: Optional[str] = Query(None),
+        limit: int = Query(100, ge=1, le=1000),
+        db=Depends(get_db)
+):
+    """
+    Active tickets that will breach an SLA within `within`, soonest first,
+    with the SLA type and time of their next breach.
+    """
+    try:
+        window = forecast.parse_duration(within)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return forecast.tickets_at_risk(
+        db, as_snapshot(get_sla_config()), window, customer_tier=customer_tier, priority=priority, limit=limit
+    )
+
+
+@router.get("/tickets/{ticket_id}", response_model=schemas.TicketSchema, response_model_exclude_unset=True)
+async def get_ticket(
+        ticket_id: str,
+        include: Tuple[str, ...] = Depends(get_include),
+        latest: Optional[int] = Query(
+            None, ge=1, le=1000,
+            description="Embed only the N most recent history rows and alerts; "
+                        "page through the rest with /tickets/{id}/history and /tickets/{id}/alerts",
+        ),
+        archived: bool = Query(False, description="Also embed rows moved to the archive by the retention job"),
+        if_none_match: Optional[str] = Header(None),
+        db=Depends(get_db)
+):
+    if not include:
+        # Scalar fields only: answered from the hot set without a query
+        hot = hot_set.get(ticket_id)
+        if hot is not None:
+            body = schemas.TicketSchema.from_ticket(hot, include).model_dump_json(exclude_unset=True)
+            etag = crud.ticket_etag(ticket_id, include, latest, archived, (hot.updated_at, hot.escalation_level))
+            return _cached_response(CachedResponse(body.encode(), {"ETag": etag}), if_none_match)
 
-@app.get("/tickets/{ticket_id}", response_model=schemas.TicketSchema)
-async def get_ticket(ticket_id: str, db=Depends(get_db)):
-    ticket = crud.get_ticket(db, ticket_id)
+    key = response_cache.ticket_key(ticket_id, include, latest, archived)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return _cached_response(cached, if_none_match)
+    generation = response_cache.generation
+
+    # Answer unchanged polls before loading relationships or serializing
+    version = crud.ticket_version(db, ticket_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    etag = crud.ticket_etag(ticket_id, include, latest, archived, version)
+    if etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+
+    ticket = crud.get_ticket(db, ticket_id, include, latest)
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
-    return schemas.TicketSchema.model_validate(ticket)
+    if archived:
+        schema = archive.ticket_schema_with_archived(ticket, include, latest)
+    else:
+        schema = schemas.TicketSchema.from_ticket(ticket, include)
+    body = schema.model_dump_json(exclude_unset=True)
+    cached = CachedResponse(body.encode(), {"ETag": etag})
+    response_cache.set(key, cached, generation, ticket_id=ticket_id)
+    return _cached_response(cached)
+
+
+@router.get("/tickets/{ticket_id}/history", response_model=List[schemas.StatusHistorySchema])
+async def get_ticket_history(
+        ticket_id: str,
+        response: Response,
+        limit: int = Query(100, ge=1, le=1000),
+        cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+        since: Optional[datetime] = Query(None, description="Only rows at or after this time"),
+        until: Optional[datetime] = Query(None, description="Only rows before this time"),
+        db=Depends(get_db)
+):
+    """
+    A ticket's status history in chronological order, one page at a time.
+    """
+    return _ticket_children_page(db, "status_history", ticket_id, response, limit, cursor, since, until)
 
 
-@app.get("/dashboard", response_model=List[schemas.TicketSchema])
+@router.get("/tickets/{ticket_id}/alerts", response_model=List[schemas.AlertSchema])
+async def get_ticket_alerts(
+        ticket_id: str,
+        response: Response,
+        limit: int = Query(100, ge=1, le=1000),
+        cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+        since: Optional[datetime] = Query(None, description="Only alerts created at or after this time"),
+        until: Optional[datetime] = Query(None, description="Only alerts created before this time"),
+        db=Depends(get_db)
+):
+    """
+    A ticket's alerts in chronological order, one page at a time.
+    """
+    return _ticket_children_page(db, "alerts", ticket_id, response, limit, cursor, since, until)
+
+
+def _ticket_children_page(db, relation, ticket_id, response, limit, cursor, since, until):
+    try:
+        rows, next_cursor = crud.paginate_ticket_children(
+            db, relation, ticket_id, limit, cursor=cursor, since=since, until=until
+        )
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    # Only an empty page needs the extra lookup to tell "no rows" from "no ticket"
+    if not rows and crud.ticket_version(db, ticket_id) is None:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
+
+
+@router.get("/alerts", response_model=List[schemas.TicketAlertSchema])
+async def list_alerts(
+        min_percent_used: float = Query(
+            ..., ge=0, description="Only alerts raised at this share of the SLA time or more (1.0 = 100%)"
+        ),
+        limit: int = Query(100, ge=1, le=1000),
+        db=Depends(get_db)
+):
+    """
+    Alerts across all tickets by SLA time used, highest first.
+    """
+    return crud.alerts_by_percent_used(db, min_percent_used, limit)
+
+
+@router.get("/dashboard", response_model=List[schemas.TicketSchema], response_model_exclude_unset=True)
 async def list_tickets(
         state: Optional[schemas.SLAState] = Query(None),
+        customer_tier: Optional[str] = Query(None),
+        priority: Optional[str] = Query(None),
         offset: int = Query(0, ge=0),
         limit: int = Query(100, ge=1, le=1000),
+        cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+        include: Tuple[str, ...] = Depends(get_include),
+        fast: bool = Query(False, description="Serialize straight from row tuples (same JSON, less overhead)"),
+        if_none_match: Optional[str] = Header(None),
         db=Depends(get_db)
 ):
-    query = db.query(models.Ticket)
-
-    if state is not None:
-        # Convert Pydantic enum to SQLAlchemy enum
-        model_state = models.SLAState(state.value)
-        # If filtering for ALERT, include BREACH as well
-        valid_states = [model_state]
-        if model_state == models.SLAState.ALERT:
-            valid_states.append(models.SLAState.BREACH)
-
-        subq = (
-            db.query(models.Alert.ticket_id)
-            .filter(models.Alert.state.in_(valid_states))
-        )
-        query = query.filter(models.Ticket.id.in_(subq))
+    generation = response_cache.generation
+    params = (state, customer_tier, priority, offset, limit, cursor, include)
+    key = response_cache.dashboard_key(*params)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return _cached_response(cached, if_none_match)
+
+    etag = make_etag("dashboard", *params, *crud.dashboard_version(db))
+    if etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+
+    # Convert Pydantic enum to SQLAlchemy enum
+    model_state = models.SLAState(state.value) if state is not None else None
+    query = crud.dashboard_query(
+        db, model_state, () if fast else include, customer_tier=customer_tier, priority=priority
+    )
+    if fast:
+        query = serialization.ticket_rows(query)
+
+    try:
+        tickets, next_cursor = crud.paginate_tickets(query, limit, offset=offset, cursor=cursor)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    headers = {"ETag": etag}
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = next_cursor
+
+    if fast:
+        if len(tickets) > settings.SERIALIZATION_CHUNK_SIZE:
+            return StreamingResponse(
+                _stream_and_cache(tickets, include, key, generation, headers),
+                media_type="application/json",
+                headers={**headers, "Cache-Control": "no-cache"},
+            )
+        cached = CachedResponse(serialization.dump_tickets_json(db, tickets, include), headers)
+        response_cache.set(key, cached, generation)
+        return _cached_response(cached)
+
+    body = ticket_list_adapter.dump_json(
+        [schemas.TicketSchema.from_ticket(t, include) for t in tickets],
+        exclude_unset=True,
+    )
+    cached = CachedResponse(body, headers)
+    response_cache.set(key, cached, generation)
+    return _cached_response(cached)
 
-    tickets = query.offset(offset).limit(limit).all()
-    return [schemas.TicketSchema.model_validate(t) for t in tickets]
 
+@router.get("/stats", response_model=schemas.StatsSchema)
+async def get_stats():
+    """
+    Ticket counts by tier, priority and SLA state, and p50/p95 of the SLA
+    time used (1.0 = 100%) from the latest evaluation pass. Served from
+    in-memory counters, so the cost does not grow with the ticket count.
+    """
+    return sla_stats.snapshot()
 
 
-@app.websocket("/ws/alerts")
+def _cached_response(cached: CachedResponse, if_none_match: Optional[str] = None) -> Response:
+    # Serialized once on a miss; bypasses response_model re-validation
+    etag = cached.headers.get("ETag")
+    if etag is not None and etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+    return Response(
+        content=cached.body,
+        media_type="application/json",
+        headers={**cached.headers, "Cache-Control": "no-cache"},
+    )
+
+
+def _stream_and_cache(rows, include, key, generation, headers):
+    """
+    Stream a large page chunk by chunk, then cache the assembled body.
+
+    The body is sent after get_db() has closed the request's session, so
+    the relationship queries run in a session of their own.
+    """
+    chunks = []
+    with session_scope() as db:
+        for chunk in serialization.iter_tickets_json(db, rows, include, settings.SERIALIZATION_CHUNK_SIZE):
+            chunks.append(chunk)
+            yield chunk
+    response_cache.set(key, CachedResponse(b"".join(chunks), headers), generation)
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """
+    Request, ingest, evaluation, alerting, WebSocket and pool metrics of
+    this process in the Prometheus text format.
+    """
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@router.get("/alerts/stream")
+async def alerts_stream(last_event_id: Optional[str] = Header(None)):
+    """
+    Server-Sent Events feed of the same alerts pushed over /ws/alerts.
+    """
+    return StreamingResponse(
+        alert_stream.subscribe(last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws/alerts")
 async def alerts_ws(websocket: WebSocket):
     await manager.connect(websocket)
     try:
         # Hold the connection open indefinitely
         await asyncio.Future()
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
\ No newline at end of file
+        manager.disconnect(websocket)
+
+
+def create_app() -> FastAPI:
+    """
+    Build the application. Nothing is connected or started here: the
+    components in STARTUP_COMPONENTS start in the lifespan, or on first
+    use when the app is driven without one.
+    """
+    app = FastAPI(
+        title="Ticket Watchdog",
+        lifespan=lifespan
+    )
+    app.add_middleware(StructuredLoggingMiddleware)
+    app.include_router(admin.router)
+    app.include_router(router)
+    return app
+
+
+app = create_app()
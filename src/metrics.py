@@ -0,0 +1,221 @@
+import math
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+# Seconds; the upper bounds of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = Tuple[str, ...]
+Sample = Tuple[str, Labels, float]
+# a callback returns one value, or one value per label tuple
+Collect = Callable[[], Union[float, Dict[Labels, float]]]
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Metric:
+    """
+    One named metric family. Observations are a dict update under the
+    metric's own lock; nothing is formatted until a scrape.
+    """
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Labels, float] = {}
+        self._collect: Optional[Collect] = None
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            # an unlabeled series exists from the start, at zero
+            self.clear()
+
+    def set_function(self, collect: Collect) -> None:
+        """
+        Read the value(s) from `collect` at scrape time instead, for state
+        another module already keeps (pool occupancy, connection lists).
+        """
+        self._collect = collect
+
+    def samples(self) -> Iterator[Sample]:
+        if self._collect is not None:
+            values = self._collect()
+            if not isinstance(values, dict):
+                values = {(): values}
+        else:
+            with self._lock:
+                values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield self.name, labels, value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+            if not self.labelnames:
+                self._values[()] = 0.0
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(Metric):
+    """
+    Cumulative-bucket histogram: an observation is one bisect and two
+    additions; buckets are summed into the cumulative form when scraped.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        # per label tuple: [count per bucket..., count above the last bucket, sum]
+        self._series: Dict[Labels, List[float]] = {}
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = self._empty_series()
+            series[index] += 1
+            series[-1] += value
+
+    def _empty_series(self) -> List[float]:
+        return [0] * (len(self.buckets) + 1) + [0.0]
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return int(sum(series[:-1])) if series else 0
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for labels, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), values):
+                cumulative += count
+                yield self.name + "_bucket", labels + (_format_value(bound),), cumulative
+            yield self.name + "_sum", labels, values[-1]
+            yield self.name + "_count", labels, cumulative
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+            if not self.labelnames:
+                self._series[()] = self._empty_series()
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """
+        Every metric in the Prometheus text exposition format.
+        """
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            labelnames = metric.labelnames + (("le",) if isinstance(metric, Histogram) else ())
+            for name, labels, value in metric.samples():
+                if labels:
+                    pairs = ",".join(f'{key}="{_escape(label)}"' for key, label in zip(labelnames, labels))
+                    name = f"{name}{{{pairs}}}"
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route", "status"),
+)
+ticket_events = registry.counter(
+    "ticket_events_total", "Ticket events ingested: accepted, or stale (not newer than the stored ticket).",
+    ("result",),
+)
+sla_evaluation_duration = registry.histogram(
+    "sla_evaluation_duration_seconds", "Wall time of a full SLA evaluation pass.",
+)
+sla_evaluation_tickets = registry.counter(
+    "sla_evaluation_tickets_scanned_total", "Tickets scanned by SLA evaluation passes.",
+)
+alerts_emitted = registry.counter(
+    "sla_alerts_total", "Alerts emitted, by SLA type and state.", ("sla_type", "state"),
+)
+slack_send_duration = registry.histogram(
+    "slack_send_duration_seconds", "Latency of Slack webhook calls.",
+)
+slack_send_failures = registry.counter(
+    "slack_send_failures_total", "Slack webhook calls that failed.",
+)
+websocket_connections = registry.gauge(
+    "websocket_connections", "Open /ws/alerts connections in this process.",
+)
+websocket_queue_depth = registry.gauge(
+    "websocket_send_queue_depth", "Alerts handed to the event loop and not yet sent to every client.",
+)
+db_pool_connections = registry.gauge(
+    "db_pool_connections", "Database connections by pool state.", ("state",),
+)
+db_pool_timeouts = registry.counter(
+    "db_pool_checkout_timeouts_total", "Connection checkouts that gave up waiting for the pool.",
+)
+hot_set_tickets = registry.gauge(
+    "hot_set_tickets", "Active tickets held in the in-process hot set.",
+)
+config_version = registry.gauge(
+    "sla_config_version", "Version of the SLA config snapshot in use (0 until loaded).",
+)
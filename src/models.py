@@ -1,17 +1,21 @@
 import uuid
 from datetime import datetime, timezone
 from enum import Enum as PyEnum
+from typing import Any, Dict, Optional
 
 from sqlalchemy import (
     String,
     DateTime,
     Integer,
+    Float,
     ForeignKey,
     Enum,
+    Index,
     JSON,
 )
 from sqlalchemy.orm import relationship, mapped_column, Mapped
 
+from src.codes import Encoded, LookupValue  # noqa: F401 -- LookupValue is part of the schema
 from src.database import Base
 
 
@@ -20,22 +24,47 @@ class SLAState(PyEnum):
     ALERT = "alert"
     BREACH = "breach"
 
+    @property
+    def severity(self) -> int:
+        """
+        Rank used to keep the worst state: ok < alert < breach.
+        """
+        return list(SLAState).index(self)
+
 
 class Ticket(Base):
     __tablename__ = "tickets"
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    priority: Mapped[str] = mapped_column(String, nullable=False)
-    customer_tier: Mapped[str] = mapped_column(String, nullable=False)
+    priority: Mapped[str] = mapped_column(Encoded("priority"), ForeignKey("lookup_values.id"), nullable=False)
+    customer_tier: Mapped[str] = mapped_column(Encoded("customer_tier"), ForeignKey("lookup_values.id"),
+                                               nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc),
                                                  nullable=False)
     escalation_level: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
-
-    # relationships
-    status_history: Mapped[list["TicketStatusHistory"]] = relationship("TicketStatusHistory", back_populates="ticket",
-                                                                       cascade="all, delete-orphan")
-    alerts: Mapped[list["Alert"]] = relationship("Alert", back_populates="ticket", cascade="all, delete-orphan")
+    # worst SLA state alerted so far, maintained by crud.create_alert()
+    sla_state: Mapped[SLAState] = mapped_column(Enum(SLAState), default=SLAState.OK, nullable=False)
+    sla_state_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    # latest status_history entry, kept in step by crud
+    status: Mapped[Optional[str]] = mapped_column(Encoded("status"), ForeignKey("lookup_values.id"), nullable=True)
+
+    # relationships, in id order however they are loaded (serialization's fast path reads them the same way)
+    status_history: Mapped[list["TicketStatusHistory"]] = relationship(
+        "TicketStatusHistory", back_populates="ticket", cascade="all, delete-orphan",
+        order_by="TicketStatusHistory.id",
+    )
+    alerts: Mapped[list["Alert"]] = relationship(
+        "Alert", back_populates="ticket", cascade="all, delete-orphan", order_by="Alert.id"
+    )
+
+    __table_args__ = (
+        # keyset pagination order for the dashboard, unfiltered and by SLA state
+        Index("ix_tickets_updated_at_id", "updated_at", "id"),
+        Index("ix_tickets_sla_state_updated_at", "sla_state", "updated_at", "id"),
+        # per (tier, priority) cell, in creation order: creation order is breach order within a cell
+        Index("ix_tickets_customer_tier_priority_created_at", "customer_tier", "priority", "created_at", "id"),
+    )
 
     def __repr__(self) -> str:
         return f"<Ticket id={self.id} state={self.escalation_level}>"
@@ -46,11 +75,19 @@ class TicketStatusHistory(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     ticket_id: Mapped[str] = mapped_column(String, ForeignKey("tickets.id"), nullable=False)
-    status: Mapped[str] = mapped_column(String, nullable=False)
+    status: Mapped[str] = mapped_column(Encoded("status"), ForeignKey("lookup_values.id"), nullable=False)
     timestamp: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
 
     ticket: Mapped[Ticket] = relationship("Ticket", back_populates="status_history")
 
+    __table_args__ = (
+        # GET /tickets/{id}/history: range scans and keyset pages per ticket
+        Index("ix_ticket_status_history_ticket_id_timestamp", "ticket_id", "timestamp", "id"),
+        # ids are never reused once archived rows are deleted: the archive
+        # dedupes by id and the ETag fingerprints use max(id)
+        {"sqlite_autoincrement": True},
+    )
+
     def __repr__(self) -> str:
         return f"<StatusHistory ticket_id={self.ticket_id} status={self.status}>"
 
@@ -60,12 +97,87 @@ class Alert(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     ticket_id: Mapped[str] = mapped_column(String, ForeignKey("tickets.id"), nullable=False)
-    sla_type: Mapped[str] = mapped_column(String, nullable=False)  # e.g. "response" or "resolution"
+    # e.g. "response" or "resolution"
+    sla_type: Mapped[str] = mapped_column(Encoded("sla_type"), ForeignKey("lookup_values.id"), nullable=False)
     state: Mapped[SLAState] = mapped_column(Enum(SLAState), default=SLAState.ALERT, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
-    details: Mapped[dict] = mapped_column(JSON, default={})
+    # the details every evaluation records, as typed columns; anything else goes to `extra`
+    elapsed_minutes: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    target_minutes: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    percent_used: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    # the SLA config snapshot the alert was evaluated against
+    config_version: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    config_digest: Mapped[Optional[str]] = mapped_column(String(12), nullable=True)
+    extra: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
 
     ticket: Mapped[Ticket] = relationship("Ticket", back_populates="alerts")
 
+    __table_args__ = (
+        # GET /tickets/{id}/alerts: range scans and keyset pages per ticket;
+        # also the max(id) per ticket of crud.ticket_version
+        Index("ix_alerts_ticket_id_created_at", "ticket_id", "created_at", "id"),
+        # GET /alerts?min_percent_used=
+        Index("ix_alerts_percent_used", "percent_used", "id"),
+        # see TicketStatusHistory
+        {"sqlite_autoincrement": True},
+    )
+
+    # detail key -> the values its column stores; others stay in `extra`
+    DETAIL_TYPES = {
+        "elapsed_minutes": (int, float),
+        "target_minutes": (int, float),
+        "percent_used": (int, float),
+        "config_version": int,
+        "config_digest": str,
+    }
+    DETAIL_COLUMNS = tuple(DETAIL_TYPES)
+
+    @property
+    def details(self) -> Dict[str, Any]:
+        return alert_details(self)
+
+    @details.setter
+    def details(self, details: Optional[Dict[str, Any]]) -> None:
+        extra = dict(details or {})
+        for key, types in self.DETAIL_TYPES.items():
+            value = extra.get(key)
+            if isinstance(value, types) and not isinstance(value, bool):
+                setattr(self, key, extra.pop(key))
+            else:
+                setattr(self, key, None)
+        self.extra = extra or None
+
     def __repr__(self) -> str:
         return f"<Alert ticket_id={self.ticket_id} sla_type={self.sla_type} state={self.state}>"
+
+
+class ArchiveRun(Base):
+    """
+    One retention pass that moved rows to the archive. Its id is part of
+    the ETag fingerprints, since archiving changes what responses embed.
+    """
+    __tablename__ = "archive_runs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    cutoff: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    status_history_rows: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    alert_rows: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    finished_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<ArchiveRun id={self.id} cutoff={self.cutoff}>"
+
+
+def alert_details(row: Any) -> Dict[str, Any]:
+    """
+    Reassemble the `details` dict of an alert from its stored columns, read
+    from an Alert or any row with the Alert.DETAIL_COLUMNS and `extra`.
+    """
+    details = {}
+    for key in Alert.DETAIL_COLUMNS:
+        value = getattr(row, key)
+        if value is not None:
+            details[key] = value
+    if row.extra:
+        details.update(row.extra)
+    return details
@@ -0,0 +1,220 @@
+import cProfile
+import functools
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from src import settings
+
+logger = logging.getLogger(__name__)
+
+# cProfile: every call, written as pstats. sample: the profiled thread's
+# stack every PROFILE_SAMPLE_INTERVAL_MS, written as collapsed stacks
+# (one "outer;inner count" line per stack, the flame graph input format).
+MODES = ("cprofile", "sample")
+EXTENSIONS = {"cprofile": ".pstats", "sample": ".collapsed"}
+
+
+class StackSampler:
+    """
+    Samples the stack of one thread from a background thread.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class Profiler:
+    """
+    Opt-in profiling of the next N requests and/or the next run of named
+    scheduler jobs. Until armed, checking costs one attribute read per
+    request or run; nothing is profiled or started.
+    """
+
+    def __init__(self, profile_dir: str, keep: int):
+        self.profile_dir = profile_dir
+        self.keep = keep
+        self.mode = "cprofile"
+        self._requests = 0
+        self._jobs: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._sequence = 0
+        # held while a cProfile capture runs: profilers of concurrent requests
+        # on the event loop thread would overlap (a second enable() raises on
+        # 3.12+, which registers the profiler process-wide)
+        self._cprofile = threading.Lock()
+
+    def arm(self, requests: int = 0, jobs: tuple = (), mode: str = "cprofile") -> Dict[str, Any]:
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode {mode!r}; expected one of {', '.join(MODES)}")
+        with self._lock:
+            self.mode = mode
+            self._requests = requests
+            for job in jobs:
+                self._jobs[job] = mode
+        return self.status()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"mode": self.mode, "requests": self._requests, "jobs": sorted(self._jobs)}
+
+    def take_request(self, forced: bool = False) -> Optional[str]:
+        """
+        The mode to profile this request with, or None.
+        """
+        if not self._requests and not forced:
+            return None
+        with self._lock:
+            if self._requests:
+                self._requests -= 1
+            elif not forced:
+                return None
+            return self.mode
+
+    def take_job(self, name: str) -> Optional[str]:
+        if not self._jobs:
+            return None
+        with self._lock:
+            return self._jobs.pop(name, None)
+
+    @contextmanager
+    def capture(self, label: str, mode: str) -> Iterator[Dict[str, Any]]:
+        """
+        Profile the block on the calling thread and write the result to a
+        new file in profile_dir, named in the yielded dict. One cProfile
+        capture runs at a time; others fall back to sampling.
+        """
+        if mode == "cprofile" and not self._cprofile.acquire(blocking=False):
+            mode = "sample"
+        result: Dict[str, Any] = {"name": self._name(label, mode)}
+        started = time.perf_counter()
+        if mode == "sample":
+            sampler = StackSampler(threading.get_ident(), settings.PROFILE_SAMPLE_INTERVAL_MS / 1000)
+            sampler.start()
+            try:
+                yield result
+            finally:
+                sampler.stop()
+                self._write(result["name"], lambda path: _write_text(path, sampler.collapsed()))
+        else:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+                yield result
+            finally:
+                profile.disable()
+                self._cprofile.release()
+                self._write(result["name"], profile.dump_stats)
+        logger.info({
+            "operation": "profile",
+            "label": label,
+            "mode": mode,
+            "file": result["name"],
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+        })
+
+    def profiles(self) -> List[Dict[str, Any]]:
+        """
+        Stored profiles, newest first.
+        """
+        if not os.path.isdir(self.profile_dir):
+            return []
+        entries = []
+        for name in os.listdir(self.profile_dir):
+            if not name.endswith(tuple(EXTENSIONS.values())):
+                continue
+            stat = os.stat(os.path.join(self.profile_dir, name))
+            entries.append({
+                "name": name,
+                "size": stat.st_size,
+                "created_at": datetime.fromtimestamp(stat.st_mtime, timezone.utc),
+            })
+        return sorted(entries, key=lambda entry: entry["name"], reverse=True)
+
+    def path(self, name: str) -> Optional[str]:
+        """
+        Path of a stored profile, or None for names not in profile_dir.
+        """
+        if name != os.path.basename(name) or not name.endswith(tuple(EXTENSIONS.values())):
+            return None
+        path = os.path.join(self.profile_dir, name)
+        return path if os.path.isfile(path) else None
+
+    def _name(self, label: str, mode: str) -> str:
+        with self._lock:
+            self._sequence += 1
+            sequence = self._sequence
+        return "{}-{:04d}-{}{}".format(
+            datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S"),
+            sequence % 10000,
+            re.sub(r"[^A-Za-z0-9]+", "_", label).strip("_") or "root",
+            EXTENSIONS[mode],
+        )
+
+    def _write(self, name: str, write: Callable[[str], None]) -> None:
+        os.makedirs(self.profile_dir, exist_ok=True)
+        write(os.path.join(self.profile_dir, name))
+        self._prune()
+
+    def _prune(self) -> None:
+        for entry in self.profiles()[self.keep:]:
+            try:
+                os.remove(os.path.join(self.profile_dir, entry["name"]))
+            except OSError:
+                pass
+
+
+def _write_text(path: str, text: str) -> None:
+    with open(path, "w", encoding="utf-8") as profile_file:
+        profile_file.write(text)
+
+
+def profiled_job(name: str) -> Callable[[Callable[[], Any]], Callable[[], Any]]:
+    """
+    Wrap a scheduler job so a run is profiled when the job is armed.
+    """
+    def decorate(job: Callable[[], Any]) -> Callable[[], Any]:
+        @functools.wraps(job)
+        def run() -> Any:
+            mode = profiler.take_job(name)
+            if mode is None:
+                return job()
+            with profiler.capture(name, mode):
+                return job()
+        return run
+    return decorate
+
+
+profiler = Profiler(settings.PROFILE_DIR, settings.PROFILE_KEEP)
@@ -0,0 +1,129 @@
+import functools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src import settings
+from src.logs import bind_correlation_id
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("src.querylog.slow")
+
+
+class QueryStats:
+    """
+    Statements executed and time spent in the database by one unit of
+    work (a request or a scheduler job run).
+    """
+    __slots__ = ("correlation_id", "name", "count", "seconds")
+
+    def __init__(self, correlation_id: str, name: str):
+        self.correlation_id = correlation_id
+        self.name = name
+        self.count = 0
+        self.seconds = 0.0
+
+    @property
+    def ms(self) -> float:
+        return round(self.seconds * 1000, 2)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"queries": self.count, "query_ms": self.ms}
+
+
+# The unit of work running in this context. Threadpool calls made by the
+# request copy the context, so they add to the same QueryStats.
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+@contextmanager
+def track_queries(correlation_id: str, name: str) -> Iterator[QueryStats]:
+    """
+    Count the statements executed in this context until the block exits.
+    """
+    stats = QueryStats(correlation_id, name)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def tracked_job(name: str) -> Callable[[Callable[[], Any]], Callable[[], Any]]:
+    """
+    Wrap a scheduler job so each run gets its own correlation id and logs
+    the statements it executed.
+    """
+    def decorate(job: Callable[[], Any]) -> Callable[[], Any]:
+        @functools.wraps(job)
+        def run() -> Any:
+            started = time.perf_counter()
+            with bind_correlation_id() as correlation_id, track_queries(correlation_id, name) as stats:
+                try:
+                    return job()
+                finally:
+                    logger.info({
+                        "correlation_id": stats.correlation_id,
+                        "operation": "job",
+                        "job": name,
+                        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                        **stats.as_dict(),
+                    })
+        return run
+    return decorate
+
+
+def redact(parameters: Any) -> Any:
+    """
+    The shape of bound parameters without their values: ticket ids,
+    statuses and alert details never reach the log.
+    """
+    if isinstance(parameters, dict):
+        return {key: "?" for key in parameters}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            # executemany: the first row stands for all of them
+            return {"rows": len(parameters), "first": redact(parameters[0])}
+        return ["?"] * len(parameters)
+    return "?"
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info["query_started"].pop()
+    elapsed = time.perf_counter() - started
+    stats = _current.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+    if settings.SLOW_QUERY_MS and elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        slow_query_logger.warning({
+            "correlation_id": stats.correlation_id if stats is not None else None,
+            "operation": "slow_query",
+            "source": stats.name if stats is not None else None,
+            "duration_ms": round(elapsed * 1000, 2),
+            "statement": statement,
+            "parameters": redact(parameters),
+        })
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context) -> None:
+    # after_cursor_execute does not run for a failed statement
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
@@ -1,99 +1,296 @@
 import logging
+import time
 from datetime import datetime, timezone
+from typing import Any, Callable, Collection, Dict, List, Optional, Set, Tuple
 
 from apscheduler.schedulers.background import BackgroundScheduler
+from sqlalchemy import and_, or_
 
-from src import models, settings
+from src import metrics, models, settings
 from src.alerts import process_alert
-from src.config import get_sla_config
-from src.database import SessionLocal
+from src.archive import archive_expired_rows
+from src.codes import codebook
+from src.components import Component
+from src.config import (
+    SLA_TYPES,
+    SLAConfigSnapshot,
+    SLATarget,
+    add_reload_listener,
+    as_snapshot,
+    config_component,
+    get_sla_config,
+)
+from src.database import schema_component, session_scope
+from src.hotset import active_tickets, hot_set
+from src.profiling import profiled_job
+from src.querylog import tracked_job
+from src.stats import QuantileSketch, sla_stats
 
 logger = logging.getLogger(__name__)
 
-db = SessionLocal()
+# The ticket columns SLA evaluation reads; rows are used without ORM objects
+EVALUATION_COLUMNS = (
+    models.Ticket.id,
+    models.Ticket.customer_tier,
+    models.Ticket.priority,
+    models.Ticket.created_at,
+)
+
+
+def _active_tickets() -> List[Any]:
+    """
+    Every active ticket: from the hot set when it holds all of them,
+    otherwise read from the database. Either way no connection is held
+    once this returns, so process_alert() can write through its own.
+    """
+    with session_scope() as db:
+        hot_set.ensure_loaded(db)
+        tickets = hot_set.tickets()
+        if tickets is None:
+            tickets = active_tickets(db.query(*EVALUATION_COLUMNS), hot_set.closed_statuses).all()
+    return tickets
 
 
 def evaluate_slas() -> None:
     """
-    Scan all tickets and generate an ALERT per ticket/SLA type
-    by calling process_alert(), using whatever config.get_sla_config() returns.
+    Scan all active tickets and generate an ALERT (or BREACH, past the breach
+    threshold) per ticket/SLA type by calling process_alert(), using the
+    config snapshot current when the pass starts.
     """
+    started = time.perf_counter()
     try:
-        sla_config = get_sla_config()  # dynamic lookup
+        sla_config = as_snapshot(get_sla_config())  # one snapshot for the whole pass
         now = datetime.now(timezone.utc)
 
-        tickets = db.query(models.Ticket).all()
+        tickets = _active_tickets()
+        percent_used_sketches = {sla_type: QuantileSketch() for sla_type in SLA_TYPES}
 
         for ticket in tickets:
-            created = ticket.created_at
-            if created.tzinfo is None:
-                created = created.replace(tzinfo=timezone.utc)
-            elapsed_minutes = (now - created).total_seconds() / 60
-
-            for sla_type in ("response", "resolution"):
-                try:
-                    target = sla_config[ticket.customer_tier][ticket.priority][sla_type]
-                except KeyError:
-                    logger.warning(
-                        "No SLA config for %s/%s/%s",
-                        ticket.customer_tier,
-                        ticket.priority,
-                        sla_type
-                    )
-                    continue
-
-                percent_used = elapsed_minutes / target
-                if percent_used < settings.ALERT_THRESHOLD:
-                    continue
-
-                # Always emit an ALERT
-                state = models.SLAState.ALERT
-                details = {
-                    "elapsed_minutes": elapsed_minutes,
-                    "target_minutes": target,
-                    "percent_used": percent_used,
-                }
-
-                # Single call: persist + notify + broadcast
-                process_alert(ticket.id, sla_type, state, details)
+            _evaluate_ticket(ticket, sla_config, now, SLA_TYPES, percent_used_sketches)
+
+        sla_stats.set_percent_used(percent_used_sketches)
+        metrics.sla_evaluation_tickets.inc(amount=len(tickets))
 
     except Exception:
         logger.exception("Error during SLA evaluation")
-    finally:
-        db.close()
+    metrics.sla_evaluation_duration.observe(time.perf_counter() - started)
+
+
+def reevaluate_changed_cells(previous: SLAConfigSnapshot, current: SLAConfigSnapshot) -> int:
+    """
+    Reload listener: re-evaluate only the tickets whose (tier, priority,
+    sla_type) target changed between the two snapshots, and only for the
+    changed SLA types. Returns the number of tickets evaluated.
+    """
+    changed: Dict[Tuple[str, str], Set[str]] = {}
+    for tier, priority, sla_type in current.changed_cells(previous):
+        # Removed targets have nothing left to evaluate against
+        if sla_type in SLA_TYPES and current.target(tier, priority, sla_type) is not None:
+            changed.setdefault((tier, priority), set()).add(sla_type)
+    if not changed:
+        return 0
+
+    try:
+        tickets = hot_set.tickets()
+        if tickets is not None:
+            tickets = [t for t in tickets if (t.customer_tier, t.priority) in changed]
+        else:
+            with session_scope() as db:
+                # one ix_tickets_customer_tier_priority_created_at probe per changed cell
+                query = db.query(*EVALUATION_COLUMNS).filter(or_(*(
+                    and_(models.Ticket.customer_tier == tier, models.Ticket.priority == priority)
+                    for tier, priority in changed
+                )))
+                tickets = active_tickets(query, hot_set.closed_statuses).all()
+        now = datetime.now(timezone.utc)
+        for ticket in tickets:
+            _evaluate_ticket(ticket, current, now, changed[(ticket.customer_tier, ticket.priority)])
+    except Exception:
+        logger.exception("Error re-evaluating tickets after SLA config reload")
+        return 0
+
+    logger.info({
+        "operation": "config_reevaluate",
+        "config_version": current.version,
+        "cells": sum(len(sla_types) for sla_types in changed.values()),
+        "tickets": len(tickets),
+    })
+    return len(tickets)
+
+
+def _evaluate_ticket(
+        ticket: Any,
+        sla_config: SLAConfigSnapshot,
+        now: datetime,
+        sla_types: Collection[str],
+        percent_used_sketches: Optional[Dict[str, QuantileSketch]] = None
+) -> None:
+    targets = sla_config.cell(ticket.customer_tier, ticket.priority)
+    if targets is None:
+        logger.warning("No SLA config for %s/%s", ticket.customer_tier, ticket.priority)
+        return
+
+    created = ticket.created_at
+    if created.tzinfo is None:
+        created = created.replace(tzinfo=timezone.utc)
+    elapsed_minutes = (now - created).total_seconds() / 60
+
+    for sla_type in SLA_TYPES:
+        if sla_type not in sla_types:
+            continue
+        target = targets.get(sla_type)
+        if target is None:
+            logger.warning(
+                "No SLA config for %s/%s/%s",
+                ticket.customer_tier,
+                ticket.priority,
+                sla_type
+            )
+            continue
+
+        percent_used = elapsed_minutes / target.target_minutes
+        if percent_used_sketches is not None:
+            percent_used_sketches[sla_type].add(percent_used)
+        if elapsed_minutes < target.alert_minutes:
+            continue
+
+        if elapsed_minutes >= target.breach_minutes:
+            state = models.SLAState.BREACH
+        else:
+            state = models.SLAState.ALERT
+
+        # Single call: persist + notify + broadcast
+        process_alert(ticket.id, sla_type, state, _alert_details(elapsed_minutes, target, sla_config))
 
 
 def evaluate_slas_for_ticket(ticket_id: str) -> None:
     """
-    Compute SLA usage for one ticket and call process_alert()
+    Compute SLA usage for one active ticket and call process_alert()
     if the ALERT threshold is breached.
     """
+    sla_config = as_snapshot(get_sla_config())
+    # just written through by crud on the ingestion path
+    ticket = hot_set.get(ticket_id)
+    if ticket is None:
+        with session_scope() as db:
+            query = db.query(*EVALUATION_COLUMNS).filter(models.Ticket.id == ticket_id)
+            ticket = active_tickets(query, hot_set.closed_statuses).first()
+        if ticket is None:
+            return
+    target = sla_config.target(ticket.customer_tier, ticket.priority, "response")
+    if target is None:
+        logger.warning("No SLA config for %s/%s/response", ticket.customer_tier, ticket.priority)
+        return
+    created = ticket.created_at
+    if created.tzinfo is None:
+        created = created.replace(tzinfo=timezone.utc)
+    elapsed = (datetime.now(timezone.utc) - created).total_seconds() / 60
+    if elapsed >= target.alert_minutes:
+        state = models.SLAState.BREACH if elapsed >= target.breach_minutes else models.SLAState.ALERT
+        process_alert(ticket.id, "response", state, _alert_details(elapsed, target, sla_config))
+
+
+def _alert_details(elapsed_minutes: float, target: SLATarget, sla_config: SLAConfigSnapshot) -> Dict[str, Any]:
+    # the same details whether the scheduler or ingestion raised the alert
+    return {
+        "elapsed_minutes": elapsed_minutes,
+        "target_minutes": target.target_minutes,
+        "percent_used": elapsed_minutes / target.target_minutes,
+        "config_version": sla_config.version,
+        "config_digest": sla_config.digest,
+    }
+
+
+def reconcile_stats() -> None:
+    """
+    Recount the incrementally maintained ticket statistics from the
+    database, and reload the lookup codes so filter values another worker
+    has added since this one found them unknown stop matching nothing.
+    """
     try:
-        sla_conf = get_sla_config()
-        ticket = db.query(models.Ticket).filter(models.Ticket.id == ticket_id).one()
-        now = datetime.now(timezone.utc)
-        elapsed = (now - ticket.created_at).total_seconds() / 60
-        target = sla_conf[ticket.customer_tier][ticket.priority]["response"]
-        if elapsed / target >= settings.ALERT_THRESHOLD:
-            process_alert(ticket.id, "response", models.SLAState.ALERT,
-                          {"elapsed_minutes": elapsed, "target_minutes": target})
-    finally:
-        db.close()
+        codebook.reload()
+        with session_scope() as db:
+            sla_stats.reconcile(db)
+    except Exception:
+        logger.exception("Error reconciling SLA statistics")
+
+
+def verify_hot_set() -> None:
+    """
+    Re-read the hot set from the database, picking up writes from other workers.
+    """
+    try:
+        with session_scope() as db:
+            hot_set.verify(db)
+    except Exception:
+        logger.exception("Error verifying the ticket hot set")
+
+
+def archive_history() -> None:
+    """
+    Move status history and alerts past the retention window to the archive.
+    """
+    try:
+        archive_expired_rows()
+    except Exception:
+        logger.exception("Error archiving expired history")
+
+
+# The scheduled jobs, by the name their runs are logged and profiled under
+JOB_NAMES = ("evaluate_slas", "reconcile_stats", "verify_hot_set", "archive_history")
+
+
+def _job(func: Callable[[], Any]) -> Callable[[], Any]:
+    return tracked_job(func.__name__)(profiled_job(func.__name__)(func))
 
 
-def start_scheduler() -> None:
+def start_scheduler():
     """
-    Start a background scheduler that runs evaluate_slas() every N minutes.
+    Start a background scheduler that runs evaluate_slas() every N minutes
+    and reconciles the SLA statistics every STATS_RECONCILE_MINUTES, plus
+    the hot set verification (every HOTSET_VERIFY_SECONDS) and the
+    retention job when they are enabled. Each run logs the queries it made
+    and is profiled when armed through POST /admin/profile.
+    Returns the started scheduler.
     """
     scheduler = BackgroundScheduler()
     scheduler.add_job(
-        evaluate_slas,
+        _job(evaluate_slas),
         trigger="interval",
         minutes=settings.SCHEDULER_INTERVAL_MINUTES,
         next_run_time=datetime.now(timezone.utc)
     )
+    scheduler.add_job(
+        _job(reconcile_stats),
+        trigger="interval",
+        minutes=settings.STATS_RECONCILE_MINUTES,
+        next_run_time=datetime.now(timezone.utc)
+    )
+    if hot_set.enabled:
+        scheduler.add_job(
+            _job(verify_hot_set),
+            trigger="interval",
+            seconds=settings.HOTSET_VERIFY_SECONDS,
+        )
+    if settings.RETENTION_DAYS > 0:
+        scheduler.add_job(
+            _job(archive_history),
+            trigger="interval",
+            minutes=settings.RETENTION_INTERVAL_MINUTES,
+            next_run_time=datetime.now(timezone.utc)
+        )
     scheduler.start()
     logger.info(
         "Scheduler started: evaluate_slas every %d minute(s)",
         settings.SCHEDULER_INTERVAL_MINUTES
     )
+    return scheduler
+
+
+add_reload_listener(reevaluate_changed_cells)
+scheduler_component = Component(
+    "scheduler",
+    start_scheduler,
+    stop=lambda scheduler: scheduler.shutdown(wait=False),
+    requires=(schema_component, config_component),
+)
@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterable, List, Optional
 
 from pydantic import BaseModel, Field, ConfigDict
 
@@ -62,6 +62,10 @@ class AlertSchema(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class TicketAlertSchema(AlertSchema):
+    ticket_id: str
+
+
 class TicketBase(BaseModel):
     id: str
     priority: str
@@ -69,6 +73,8 @@ class TicketBase(BaseModel):
     created_at: datetime
     updated_at: datetime
     escalation_level: int
+    sla_state: SLAState = SLAState.OK
+    sla_state_at: Optional[datetime] = None
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -77,6 +83,56 @@ class TicketCreate(TicketBase):
     pass
 
 
+# Relationships TicketSchema can embed; callers may ask for a subset
+TICKET_RELATIONS = ("status_history", "alerts")
+
+
 class TicketSchema(TicketBase):
     status_history: List[StatusHistorySchema] = []
     alerts: List[AlertSchema] = []
+
+    @classmethod
+    def from_ticket(cls, ticket: Any, include: Iterable[str] = TICKET_RELATIONS) -> "TicketSchema":
+        """
+        Validate a Ticket, reading only the relationships in `include`.
+        Skipped relationships are left unset, so routes using
+        response_model_exclude_unset drop them from the payload.
+        """
+        include = set(include)
+        if include.issuperset(TICKET_RELATIONS):
+            return cls.model_validate(ticket)
+        data = {name: getattr(ticket, name) for name in TicketBase.model_fields}
+        for relation in TICKET_RELATIONS:
+            if relation in include:
+                data[relation] = getattr(ticket, relation)
+        return cls.model_validate(data)
+
+
+class AtRiskTicketSchema(BaseModel):
+    id: str
+    customer_tier: str
+    priority: str
+    status: Optional[str] = None
+    created_at: datetime
+    escalation_level: int
+    sla_state: SLAState
+    sla_type: str = Field(..., description="SLA type of the next breach")
+    breach_at: datetime
+    minutes_to_breach: float
+
+
+class PercentUsedSchema(BaseModel):
+    count: int
+    p50: Optional[float] = None
+    p95: Optional[float] = None
+    max: Optional[float] = None
+
+
+class StatsSchema(BaseModel):
+    tickets: int
+    by_customer_tier: Dict[str, int]
+    by_priority: Dict[str, int]
+    by_sla_state: Dict[str, int]
+    percent_used: Dict[str, PercentUsedSchema]
+    evaluated_at: Optional[datetime] = None
+    reconciled_at: Optional[datetime] = None
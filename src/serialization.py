@@ -0,0 +1,120 @@
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Sequence
+
+from pydantic_core import to_json
+from sqlalchemy import select
+from sqlalchemy.orm import Query, Session
+
+from src import models, schemas
+
+# Same field order as schemas.TicketSchema, so both paths emit identical JSON
+TICKET_COLUMNS = (
+    models.Ticket.id,
+    models.Ticket.priority,
+    models.Ticket.customer_tier,
+    models.Ticket.created_at,
+    models.Ticket.updated_at,
+    models.Ticket.escalation_level,
+    models.Ticket.sla_state,
+    models.Ticket.sla_state_at,
+)
+
+
+def ticket_rows(query: Query) -> Query:
+    """
+    Turn a Ticket query into one returning plain column tuples.
+    """
+    return query.with_entities(*TICKET_COLUMNS)
+
+
+def iter_tickets_json(
+        db: Session,
+        rows: Sequence[Any],
+        include: Iterable[str] = schemas.TICKET_RELATIONS,
+        chunk_size: int = 250
+) -> Iterator[bytes]:
+    """
+    Serialize ticket rows (see ticket_rows()) to a JSON array, chunk by chunk.
+
+    Relationships are fetched as tuples with one query per relationship and
+    chunk, and the output is built with pydantic-core directly: no ORM
+    objects, no model validation. The bytes match TicketSchema's JSON.
+    """
+    include = set(include)
+    yield b"["
+    for start in range(0, len(rows), chunk_size):
+        chunk = _build_tickets(db, rows[start:start + chunk_size], include)
+        if start:
+            yield b","
+        # strip the brackets so chunks concatenate into one array
+        yield to_json(chunk)[1:-1]
+    yield b"]"
+
+
+def dump_tickets_json(
+        db: Session,
+        rows: Sequence[Any],
+        include: Iterable[str] = schemas.TICKET_RELATIONS
+) -> bytes:
+    return b"".join(iter_tickets_json(db, rows, include, chunk_size=max(len(rows), 1)))
+
+
+def dump_tickets_by_id(
+        db: Session,
+        ticket_ids: Sequence[str],
+        include: Iterable[str] = schemas.TICKET_RELATIONS
+) -> bytes:
+    """
+    Serialize the given tickets, in the order of `ticket_ids`.
+    """
+    rows = db.execute(select(*TICKET_COLUMNS).where(models.Ticket.id.in_(set(ticket_ids)))).all()
+    by_id = {row.id: row for row in rows}
+    return dump_tickets_json(db, [by_id[tid] for tid in ticket_ids if tid in by_id], include)
+
+
+def _build_tickets(db: Session, rows: Sequence[Any], include: set) -> List[Dict[str, Any]]:
+    tickets = []
+    for row in rows:
+        ticket = row._asdict()
+        ticket["sla_state"] = ticket["sla_state"].value if ticket["sla_state"] else schemas.SLAState.OK.value
+        tickets.append(ticket)
+    ids = [t["id"] for t in tickets]
+
+    if "status_history" in include:
+        history = _group(db.execute(
+            select(
+                models.TicketStatusHistory.ticket_id,
+                models.TicketStatusHistory.status,
+                models.TicketStatusHistory.timestamp,
+            )
+            .where(models.TicketStatusHistory.ticket_id.in_(ids))
+            .order_by(models.TicketStatusHistory.id)
+        ), lambda r: {"status": r.status, "timestamp": r.timestamp})
+        for ticket in tickets:
+            ticket["status_history"] = history.get(ticket["id"], [])
+
+    if "alerts" in include:
+        alerts = _group(db.execute(
+            select(
+                models.Alert.ticket_id,
+                models.Alert.sla_type,
+                models.Alert.state,
+                models.Alert.created_at,
+                *(getattr(models.Alert, key) for key in models.Alert.DETAIL_COLUMNS),
+                models.Alert.extra,
+            )
+            .where(models.Alert.ticket_id.in_(ids))
+            .order_by(models.Alert.id)
+        ), lambda r: {"sla_type": r.sla_type, "state": r.state.value, "created_at": r.created_at,
+                      "details": models.alert_details(r)})
+        for ticket in tickets:
+            ticket["alerts"] = alerts.get(ticket["id"], [])
+
+    return tickets
+
+
+def _group(result, build) -> Dict[str, List[Dict[str, Any]]]:
+    grouped: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for row in result:
+        grouped[row.ticket_id].append(build(row))
+    return grouped
@@ -5,10 +5,37 @@ PROJECT_DIR = Path(__file__).ancestor(2)
 
 # Logging
 LOG_LEVEL = config("LOG_LEVEL", default="INFO")
+# Log records are handed to a queue and written by a listener thread
+LOG_QUEUE = config("LOG_QUEUE", cast=config.boolean, default="true")
+# Adds X-Query-Count / X-Query-Time-Ms to every response
+DEBUG = config("DEBUG", cast=config.boolean, default="false")
+# Statements slower than this are logged with their parameters redacted (0 disables it)
+SLOW_QUERY_MS = config("SLOW_QUERY_MS", cast=float, default=200.0)
+# The /admin endpoints (profiling, backtests, pool/cache/config status) answer 404 unless enabled;
+# with ADMIN_TOKEN set they also require it in an X-Admin-Token header
+ADMIN_ENABLED = config("ADMIN_ENABLED", cast=config.boolean, default="false")
+ADMIN_TOKEN = config("ADMIN_TOKEN", default="")
+# On-demand profiles (armed through POST /admin/profile) are written here, newest PROFILE_KEEP kept;
+# with PROFILE_HEADER_ENABLED a request sending "X-Profile: 1" is profiled too
+PROFILE_DIR = config("PROFILE_DIR", default='{}/profiles'.format(PROJECT_DIR))
+PROFILE_KEEP = config("PROFILE_KEEP", cast=int, default=50)
+PROFILE_SAMPLE_INTERVAL_MS = config("PROFILE_SAMPLE_INTERVAL_MS", cast=float, default=5.0)
+PROFILE_HEADER_ENABLED = config("PROFILE_HEADER_ENABLED", cast=config.boolean, default="false")
 
 # Database
 default_db_url = 'sqlite:///{}/db.sqlite3'.format(PROJECT_DIR)
 DATABASE_URL = config("DATABASE_URL", default=default_db_url)
+# Connection pool (server databases and SQLite files)
+DB_POOL_SIZE = config("DB_POOL_SIZE", cast=int, default=5)
+DB_MAX_OVERFLOW = config("DB_MAX_OVERFLOW", cast=int, default=10)
+DB_POOL_TIMEOUT = config("DB_POOL_TIMEOUT", cast=float, default=30.0)  # seconds to wait for a free connection
+DB_POOL_RECYCLE = config("DB_POOL_RECYCLE", cast=int, default=1800)  # seconds before a connection is replaced
+DB_POOL_PRE_PING = config("DB_POOL_PRE_PING", cast=config.boolean, default="true")
+# SQLite file databases (single-node deployments)
+SQLITE_JOURNAL_MODE = config("SQLITE_JOURNAL_MODE", default="WAL")
+SQLITE_SYNCHRONOUS = config("SQLITE_SYNCHRONOUS", default="NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = config("SQLITE_BUSY_TIMEOUT_MS", cast=int, default=5000)
+SQLITE_CACHE_SIZE_KB = config("SQLITE_CACHE_SIZE_KB", cast=int, default=65536)
 
 # Slack
 SLACK_WEBHOOK_URL = config("SLACK_WEBHOOK_URL", default="")
@@ -18,6 +45,11 @@ SLACK_TIMEOUT = config("SLACK_TIMEOUT", cast=int, default=5)
 SLA_CONFIG_PATH = config("SLA_CONFIG_PATH", default="sla_config.yaml")
 ALERT_THRESHOLD = config("ALERT_THRESHOLD", default=0.85, cast=float)  # when 85% of SLA time has elapsed → ALERT
 BREACH_THRESHOLD = config("BREACH_THRESHOLD", default=1.00, cast=float)  # when 100% of SLA time has elapsed → BREACH
+# How config changes are noticed: inotify (watchdog) or poll (stat the file every CONFIG_POLL_SECONDS)
+CONFIG_WATCH_MODE = config("CONFIG_WATCH_MODE", default="inotify")
+CONFIG_POLL_SECONDS = config("CONFIG_POLL_SECONDS", cast=float, default=5.0)
+# Reload once this long after the last change event of a burst
+CONFIG_RELOAD_DEBOUNCE_SECONDS = config("CONFIG_RELOAD_DEBOUNCE_SECONDS", cast=float, default=0.5)
 
 # Scheduler
 SCHEDULER_INTERVAL_MINUTES = config(
@@ -26,6 +58,40 @@ SCHEDULER_INTERVAL_MINUTES = config(
     default=1
 )
 
+# GET /stats counters are recounted from the database this often
+STATS_RECONCILE_MINUTES = config("STATS_RECONCILE_MINUTES", cast=int, default=5)
+
+# In-process hot set of active tickets (0 disables it); tickets whose last
+# status is in CLOSED_STATUSES are not active and are no longer evaluated
+HOTSET_MAX_TICKETS = config("HOTSET_MAX_TICKETS", cast=int, default=50000)
+HOTSET_VERIFY_SECONDS = config("HOTSET_VERIFY_SECONDS", cast=int, default=60)
+CLOSED_STATUSES = config("CLOSED_STATUSES", cast=config.list, default="closed,resolved")
+
+# Retention: status history and alerts older than RETENTION_DAYS are moved to
+# gzip JSONL files under ARCHIVE_DIR every RETENTION_INTERVAL_MINUTES (0 days disables it)
+RETENTION_DAYS = config("RETENTION_DAYS", cast=int, default=0)
+RETENTION_INTERVAL_MINUTES = config("RETENTION_INTERVAL_MINUTES", cast=int, default=60)
+RETENTION_BATCH_SIZE = config("RETENTION_BATCH_SIZE", cast=int, default=5000)
+ARCHIVE_DIR = config("ARCHIVE_DIR", default='{}/archive'.format(PROJECT_DIR))
+ARCHIVE_SHARDS = config("ARCHIVE_SHARDS", cast=int, default=64)  # files per month, picked by ticket id
+
+# Alert broadcast across worker processes: local, unix or postgres
+BROADCAST_BACKEND = config("BROADCAST_BACKEND", default="local")
+BROADCAST_SOCKET_PATH = config("BROADCAST_SOCKET_PATH", default="/tmp/ticket-watchdog-alerts.sock")
+BROADCAST_CHANNEL = config("BROADCAST_CHANNEL", default="ticket_watchdog_alerts")
+
+# Server-Sent Events alert stream
+SSE_BUFFER_SIZE = config("SSE_BUFFER_SIZE", cast=int, default=1000)  # alerts kept for Last-Event-ID resume
+SSE_HEARTBEAT_SECONDS = config("SSE_HEARTBEAT_SECONDS", cast=float, default=15.0)
+
+# Read-through cache for GET /tickets/{id} and GET /dashboard (0 entries disables it)
+RESPONSE_CACHE_MAX_ENTRIES = config("RESPONSE_CACHE_MAX_ENTRIES", cast=int, default=1024)
+RESPONSE_CACHE_MAX_BYTES = config("RESPONSE_CACHE_MAX_BYTES", cast=int, default=64 * 1024 * 1024)
+RESPONSE_CACHE_TTL_SECONDS = config("RESPONSE_CACHE_TTL_SECONDS", cast=float, default=5.0)
+
+# Fast serialization path (?fast=true): larger pages are streamed in chunks of this size
+SERIALIZATION_CHUNK_SIZE = config("SERIALIZATION_CHUNK_SIZE", cast=int, default=250)
+
 # FastAPI settings
 API_HOST = config("API_HOST", default="0.0.0.0")
 API_PORT = config("API_PORT", cast=int, default=8000)
@@ -0,0 +1,123 @@
+import asyncio
+import itertools
+import json
+import threading
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+from src import settings
+from src.broadcast import broadcaster
+
+HEARTBEAT_FRAME = b": keep-alive\n\n"
+
+
+def encode_event(message: Dict[str, Any], event_id: Optional[int] = None) -> bytes:
+    """
+    Encode an alert message as a single Server-Sent Events frame.
+    """
+    data = json.dumps(message, separators=(",", ":"), default=str)
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: alert\ndata: {data}\n\n".encode()
+
+
+class AlertEventStream:
+    """
+    Fan-out hub for SSE subscribers.
+
+    Each alert is encoded once into a bytes frame and appended to a bounded
+    replay buffer shared by every subscriber. Subscribers keep no queue of
+    their own: they remember the last buffer position they sent and wait on a
+    single asyncio.Event that is swapped out on every publish.
+    """
+
+    def __init__(self, buffer_size: int = 1000, heartbeat_seconds: float = 15.0):
+        self.heartbeat_seconds = heartbeat_seconds
+        # (position, event_id, frame)
+        self._buffer: Deque[Tuple[int, Optional[int], bytes]] = deque(maxlen=buffer_size)
+        self._position = 0
+        # highest alert id dropped from the buffer: clients behind it missed events
+        self._evicted_id: Optional[int] = None
+        self._changed = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self.subscribers = 0
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        """
+        Encode and append an alert. Safe to call from any thread.
+        """
+        event_id = message.get("alert_id")
+        frame = encode_event(message, event_id)
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._append, event_id, frame)
+        else:
+            self._append(event_id, frame)
+
+    def _append(self, event_id: Optional[int], frame: bytes) -> None:
+        with self._lock:
+            self._position += 1
+            if len(self._buffer) == self._buffer.maxlen and self._buffer[0][1] is not None:
+                self._evicted_id = self._buffer[0][1]
+            self._buffer.append((self._position, event_id, frame))
+            changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def _frames_after(self, position: int):
+        with self._lock:
+            if not self._buffer:
+                return [], position
+            first = self._buffer[0][0]
+            start = max(position - first + 1, 0)
+            entries = list(itertools.islice(self._buffer, start, None))
+        if not entries:
+            return [], position
+        return [frame for _, _, frame in entries], entries[-1][0]
+
+    def _resume_position(self, last_event_id: Optional[str]) -> int:
+        """
+        Buffer position right after the event the client last saw, so it
+        replays what it missed. Unknown ids, and ids older than an event
+        already dropped from the buffer (the gap cannot be replayed in
+        full), resume from now.
+        """
+        with self._lock:
+            if last_event_id is not None:
+                try:
+                    last_id = int(last_event_id)
+                except ValueError:
+                    last_id = None
+                if last_id is not None and (self._evicted_id is None or last_id >= self._evicted_id):
+                    for position, event_id, _ in self._buffer:
+                        if event_id is not None and event_id > last_id:
+                            return position - 1
+            return self._position
+
+    async def subscribe(self, last_event_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """
+        Yield pre-encoded frames for one client, with heartbeats while idle.
+        """
+        self._loop = asyncio.get_running_loop()
+        position = self._resume_position(last_event_id)
+        self.subscribers += 1
+        try:
+            yield f"retry: {int(self.heartbeat_seconds * 1000)}\n\n".encode()
+            while True:
+                changed = self._changed
+                frames, position = self._frames_after(position)
+                if frames:
+                    yield b"".join(frames)
+                    continue
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=self.heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT_FRAME
+        finally:
+            self.subscribers -= 1
+
+
+alert_stream = AlertEventStream(
+    buffer_size=settings.SSE_BUFFER_SIZE,
+    heartbeat_seconds=settings.SSE_HEARTBEAT_SECONDS,
+)
+broadcaster.subscribe(alert_stream.publish)
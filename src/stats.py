@@ -0,0 +1,177 @@
+import logging
+import math
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from src import models
+from src.config import SLA_TYPES
+
+logger = logging.getLogger(__name__)
+
+# (customer_tier, priority, sla_state)
+Cell = Tuple[str, str, str]
+
+
+def ticket_cell(customer_tier: str, priority: str, sla_state: Optional[models.SLAState]) -> Cell:
+    return customer_tier, priority, (sla_state or models.SLAState.OK).value
+
+
+class QuantileSketch:
+    """
+    Streaming quantile sketch over positive values (DDSketch-style).
+
+    Values are counted in logarithmic buckets, so any quantile is returned
+    within `relative_accuracy` of the true value while memory depends only
+    on the range of the values, never on how many were added.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets: Dict[int, int] = {}
+        self._zeros = 0
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        if value <= 0:
+            self._zeros += 1
+        else:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self._buckets[key] = self._buckets.get(key, 0) + 1
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self._zeros
+        if rank < seen:
+            return 0.0
+        for key in sorted(self._buckets):
+            seen += self._buckets[key]
+            if seen > rank:
+                # midpoint of the bucket (gamma^(key-1), gamma^key]
+                return min(2 * self._gamma ** key / (self._gamma + 1), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "max": self.max if self.count else None,
+        }
+
+
+class SLAStats:
+    """
+    Ticket counts by tier, priority and SLA state, plus percent-used
+    quantiles, kept up to date as tickets are written so that reading them
+    costs the same however many tickets are stored.
+
+    Counts are held per (tier, priority, state) cell and moved by
+    ticket_changed() on every committed ticket write. Percent-used sketches
+    are rebuilt by each SLA evaluation pass and swapped in whole. reconcile()
+    recounts the cells with one GROUP BY, correcting any drift (writes
+    from other worker processes, or a write racing a reconcile).
+    """
+
+    def __init__(self):
+        self._cells: Counter = Counter()
+        self._percent_used: Dict[str, QuantileSketch] = {}
+        self._lock = threading.Lock()
+        self.evaluated_at: Optional[datetime] = None
+        self.reconciled_at: Optional[datetime] = None
+
+    def ticket_changed(self, before: Optional[Cell], after: Optional[Cell]) -> None:
+        """
+        Move one ticket from cell `before` to cell `after` (None for a
+        ticket that did not exist before).
+        """
+        if before == after:
+            return
+        with self._lock:
+            if before is not None:
+                self._cells[before] -= 1
+                if self._cells[before] <= 0:
+                    del self._cells[before]
+            if after is not None:
+                self._cells[after] += 1
+
+    def set_percent_used(self, sketches: Dict[str, QuantileSketch]) -> None:
+        """
+        Replace the percent-used sketches with those of a full evaluation pass.
+        """
+        with self._lock:
+            self._percent_used = dict(sketches)
+            self.evaluated_at = datetime.now(timezone.utc)
+
+    def reconcile(self, db: Session) -> int:
+        """
+        Recount every cell from the database and return how many tickets
+        the incremental counts were off by.
+        """
+        rows = db.execute(
+            select(
+                models.Ticket.customer_tier,
+                models.Ticket.priority,
+                models.Ticket.sla_state,
+                func.count(),
+            ).group_by(models.Ticket.customer_tier, models.Ticket.priority, models.Ticket.sla_state)
+        ).all()
+        cells: Counter = Counter()
+        for customer_tier, priority, sla_state, count in rows:
+            cells[ticket_cell(customer_tier, priority, sla_state)] += count
+        with self._lock:
+            drift = sum(abs(cells[cell] - self._cells[cell]) for cell in set(cells) | set(self._cells))
+            self._cells = cells
+            self.reconciled_at = datetime.now(timezone.utc)
+        if drift:
+            logger.warning({
+                "operation": "stats_reconcile",
+                "drift": drift,
+            })
+        return drift
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            cells = list(self._cells.items())
+            percent_used = dict(self._percent_used)
+            evaluated_at, reconciled_at = self.evaluated_at, self.reconciled_at
+        return {
+            "tickets": sum(count for _, count in cells),
+            "by_customer_tier": _totals(cells, 0),
+            "by_priority": _totals(cells, 1),
+            "by_sla_state": _totals(cells, 2),
+            "percent_used": {
+                sla_type: (percent_used[sla_type] if sla_type in percent_used else QuantileSketch()).summary()
+                for sla_type in SLA_TYPES
+            },
+            "evaluated_at": evaluated_at,
+            "reconciled_at": reconciled_at,
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._cells = Counter()
+            self._percent_used = {}
+            self.evaluated_at = None
+            self.reconciled_at = None
+
+
+def _totals(cells: Iterable[Tuple[Cell, int]], position: int) -> Dict[str, int]:
+    totals: Dict[str, int] = {}
+    for cell, count in cells:
+        totals[cell[position]] = totals.get(cell[position], 0) + count
+    return totals
+
+
+sla_stats = SLAStats()
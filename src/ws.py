@@ -1,15 +1,28 @@
 import asyncio
-from typing import List
+import logging
+import threading
+from typing import List, Optional
 
 from fastapi import WebSocket
 
+from src import metrics
+from src.broadcast import broadcaster
+
+logger = logging.getLogger(__name__)
+
 
 class AlertWebSocketManager:
     def __init__(self):
         self.connections: List[WebSocket] = []
+        # broadcasts handed to the loop and not finished yet
+        self.pending = 0
+        self._pending_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
 
     async def connect(self, ws: WebSocket):
         await ws.accept()
+        # Remember the serving loop so other threads can hand us messages
+        self._loop = asyncio.get_running_loop()
         self.connections.append(ws)
 
     def disconnect(self, ws: WebSocket):
@@ -17,21 +30,32 @@ class AlertWebSocketManager:
             self.connections.remove(ws)
 
     async def broadcast(self, message: dict):
-        for conn in self.connections:
-            await conn.send_json(message)
-
-    def broadcast_sync(self, message: dict):
+        for conn in list(self.connections):
+            try:
+                await conn.send_json(message)
+            except Exception:
+                logger.warning("Dropping WebSocket client after failed send")
+                self.disconnect(conn)
+
+    def broadcast_threadsafe(self, message: dict):
         """
-        Thread-safe enqueue of the async broadcast coroutine
-        on the running event loop—no circular imports required.
+        Deliver a message received from the broadcast backbone, from any thread,
+        on the loop serving this process' WebSocket clients.
         """
-        try:
-            loop = asyncio.get_running_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-        # Schedule the broadcast coroutine to run on the loop
-        loop.call_soon_threadsafe(asyncio.create_task, self.broadcast(message))
+        loop = self._loop
+        if not self.connections or loop is None or loop.is_closed():
+            return
+        with self._pending_lock:
+            self.pending += 1
+        future = asyncio.run_coroutine_threadsafe(self.broadcast(message), loop)
+        future.add_done_callback(self._broadcast_done)
+
+    def _broadcast_done(self, future) -> None:
+        with self._pending_lock:
+            self.pending -= 1
 
 
 manager = AlertWebSocketManager()
+broadcaster.subscribe(manager.broadcast_threadsafe)
+metrics.websocket_connections.set_function(lambda: len(manager.connections))
+metrics.websocket_queue_depth.set_function(lambda: manager.pending)
@@ -1,14 +1,17 @@
+from datetime import datetime, timedelta, timezone
+
 import pytest
 from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 from starlette.testclient import WebSocketTestSession
 
-import src.alerts as alerts_module
 import src.database as database_module
 import src.main as main_module
-import src.scheduler as scheduler_module
-from src import settings
+from src import schemas, settings
+from src.cache import response_cache
+from src.codes import codebook
+from src.hotset import hot_set
 from src.database import Base
 
 _orig_receive_json = WebSocketTestSession.receive_json
@@ -35,6 +38,18 @@ def engine():
         poolclass=StaticPool,
         future=True
     )
+
+    # pysqlite defers BEGIN until the first write, so the outer transaction of
+    # db_session would not exist and releasing its first SAVEPOINT would
+    # commit; let SQLAlchemy emit BEGIN itself (SQLAlchemy's pysqlite recipe)
+    @event.listens_for(engine, "connect")
+    def disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def emit_begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
     Base.metadata.create_all(bind=engine)
     return engine
 
@@ -48,18 +63,13 @@ def db_session(engine):
     # Open a connection and begin a transaction
     connection = engine.connect()
     transaction = connection.begin()
-    SessionTest = sessionmaker(bind=connection, expire_on_commit=False, future=True)
+    # Commits and rollbacks of the session (including those of every
+    # session_scope() that shares it) only end SAVEPOINTs inside the outer
+    # transaction, so the test stays isolated to the end
+    SessionTest = sessionmaker(bind=connection, expire_on_commit=False, future=True,
+                               join_transaction_mode="create_savepoint")
     session = SessionTest()
 
-    # Establish a SAVEPOINT for nested transactions
-    session.begin_nested()
-
-    # Restart SAVEPOINT after each nested rollback (needed for some libraries)
-    @event.listens_for(session, "after_transaction_end")
-    def restart_savepoint(sess, trans):
-        if trans.nested and not trans._parent.nested:
-            sess.begin_nested()
-
     try:
         yield session
     finally:
@@ -75,19 +85,100 @@ def override_session_local(db_session, monkeypatch):
     Monkey-patch SessionLocal everywhere so that all parts of the app
     (endpoints, alerts, scheduler) use the same test session.
     """
-    # Patch the core factory
+    # Patch the core factory; session_scope() (alerts, scheduler) opens sessions through it
     monkeypatch.setattr(database_module, "SessionLocal", lambda: db_session)
-    # Also patch the copies imported in scheduler.py and alerts.py
-    monkeypatch.setattr(scheduler_module, "SessionLocal", lambda: db_session)
-    monkeypatch.setattr(alerts_module, "SessionLocal", lambda: db_session)
 
     # Override FastAPI’s get_db() as well
     main_module.app.dependency_overrides[main_module.get_db] = lambda: db_session  # type: ignore[attr-defined]
 
+    # Lookup values are read and added in the test's own transaction
+    codebook.use(db_session.bind)
+
+    yield
+    codebook.use(None)
+
+
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    """
+    Each test rolls its data back, so cached responses must not outlive it.
+    """
+    response_cache.clear()
+    yield
+    response_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_codebook():
+    """
+    Lookup values added by a rolled back test are gone from the database.
+    """
+    codebook.clear()
     yield
 
 
+@pytest.fixture(autouse=True)
+def clear_hot_set():
+    """
+    The hot set is loaded from, and must not outlive, each test's data.
+    """
+    hot_set.clear()
+    yield
+    hot_set.clear()
+
+
 @pytest.fixture(autouse=True)
 def set_dummy_slack_webhook(monkeypatch):
     monkeypatch.setattr(settings, "SLACK_WEBHOOK_URL", "http://test-slack.local")
     yield
+
+
+@pytest.fixture
+def ticket_event():
+    """
+    Build TicketEvents: an open high-priority gold ticket created now,
+    `minutes_ago` before `now` or at `created_at`, and updated when created
+    unless `updated_at` is given.
+    """
+    def make(
+            ticket_id,
+            priority="high",
+            customer_tier="gold",
+            status="open",
+            minutes_ago=0,
+            now=None,
+            created_at=None,
+            updated_at=None
+    ):
+        if created_at is None:
+            created_at = (now or datetime.now(timezone.utc)) - timedelta(minutes=minutes_ago)
+        return schemas.TicketEvent(
+            id=ticket_id, priority=priority, created_at=created_at, updated_at=updated_at or created_at,
+            status=status, customer_tier=customer_tier,
+        )
+    return make
+
+
+@pytest.fixture
+def count_queries(engine):
+    """
+    Record the SELECT statements issued against the test engine.
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def admin_enabled(monkeypatch):
+    """
+    Mount the /admin endpoints, which are off by default, without a token.
+    """
+    monkeypatch.setattr(settings, "ADMIN_ENABLED", True)
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "")
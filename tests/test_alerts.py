@@ -1,3 +1,4 @@
+import logging
 from datetime import datetime, timezone
 
 import pytest
@@ -197,7 +198,7 @@ def test_process_alert_send_slack_notification_exception(monkeypatch, db_session
     alerts.process_alert("failslack", "response", models.SLAState.ALERT, {"a": 1})
 
 
-def test_process_alert_broadcast_sync_exception(monkeypatch, db_session):
+def test_process_alert_publish_exception(monkeypatch, db_session, caplog):
     from src import alerts
     # Prepare ticket in DB
     ticket = models.Ticket(
@@ -211,8 +212,39 @@ def test_process_alert_broadcast_sync_exception(monkeypatch, db_session):
     db_session.add(ticket)
     db_session.commit()
     monkeypatch.setattr("src.crud.create_alert", lambda db, tid, sla_type, state, details: models.Alert(
-        id=1, ticket_id=tid, sla_type=sla_type, state=state, created_at=datetime.now(timezone.utc), details={}))
+        id=1, ticket_id=tid, sla_type=sla_type, state=state, created_at=datetime.now(timezone.utc), details=details))
     monkeypatch.setattr("src.crud.get_ticket", lambda db, tid: ticket)
     monkeypatch.setattr("src.alerts.send_slack_notification", lambda ticket, alert: None)
-    monkeypatch.setattr("src.ws.manager.broadcast_sync", lambda message: (_ for _ in ()).throw(Exception("broadcast error")))
-    alerts.process_alert("failbroadcast", "response", models.SLAState.ALERT, {"a": 1})
+    monkeypatch.setattr("src.alerts.broadcaster.publish", lambda message: (_ for _ in ()).throw(Exception("broadcast error")))
+    with caplog.at_level(logging.ERROR, logger="src.alerts"):
+        alerts.process_alert("failbroadcast", "response", models.SLAState.ALERT,
+                             {"elapsed_minutes": 50.0, "target_minutes": 60, "percent_used": 0.83})
+    (record,) = caplog.records
+    assert record.getMessage() == "Error processing alert for ticket failbroadcast"
+    assert str(record.exc_info[1]) == "broadcast error"
+
+
+def test_process_alert_notifies_slack_after_the_session_closes(monkeypatch, db_session):
+    from contextlib import contextmanager
+
+    from src import alerts, database
+    db_session.add(models.Ticket(
+        id="slack-outside", priority="high", customer_tier="gold", status="open",
+        created_at=datetime.now(timezone.utc), updated_at=datetime.now(timezone.utc), escalation_level=0
+    ))
+    db_session.commit()
+
+    scope = {"open": False}
+
+    @contextmanager
+    def tracked_scope():
+        with database.session_scope() as db:
+            scope["open"] = True
+            yield db
+        scope["open"] = False
+
+    sent = []
+    monkeypatch.setattr(alerts, "session_scope", tracked_scope)
+    monkeypatch.setattr(alerts, "send_slack_notification", lambda payload, alert_id: sent.append(scope["open"]))
+    alerts.process_alert("slack-outside", "response", models.SLAState.ALERT, {"elapsed_minutes": 30.0})
+    assert sent == [False]
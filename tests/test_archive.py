@@ -0,0 +1,99 @@
+import gzip
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from src import archive, crud, models, settings
+from src.main import app
+
+client = TestClient(app)
+
+
+def _ticket_with_old_alerts(db_session, ticket_event, ticket_id, old, recent):
+    now = datetime.now(timezone.utc)
+    created = now - timedelta(days=60)
+    crud.create_ticket(db_session, ticket_event(ticket_id, created_at=created))
+    # a recent status change: the old "open" row is no longer the current status
+    crud.update_ticket(db_session, ticket_event(
+        ticket_id, status="pending", created_at=created, updated_at=now - timedelta(days=1)
+    ))
+    for i in range(old + recent):
+        alert = crud.create_alert(db_session, ticket_id, "response", models.SLAState.ALERT, {"n": i})
+        if i < old:
+            alert.created_at = now - timedelta(days=60 - i)
+    db_session.commit()
+
+
+def _hot_alerts(db_session, ticket_id):
+    return db_session.query(models.Alert).filter_by(ticket_id=ticket_id).count()
+
+
+def test_archive_moves_expired_rows_and_reads_them_back(db_session, tmp_path, ticket_event):
+    _ticket_with_old_alerts(db_session, ticket_event, "arch-1", old=3, recent=2)
+    moved = archive.archive_expired_rows(retention_days=30, archive_dir=str(tmp_path), batch_size=2)
+    assert moved["alerts"] >= 3 and moved["status_history"] >= 1
+
+    assert _hot_alerts(db_session, "arch-1") == 2
+    archived = archive.read_archived("alerts", "arch-1", str(tmp_path))
+    assert [row["details"]["n"] for row in archived] == [0, 1, 2]
+    assert [row["status"] for row in archive.read_archived("status_history", "arch-1", str(tmp_path))] == ["open"]
+
+    # Nothing left past the cutoff: a second run is a no-op
+    assert archive.archive_expired_rows(retention_days=30, archive_dir=str(tmp_path)) == {
+        "status_history": 0, "alerts": 0,
+    }
+
+
+def test_archive_keeps_the_current_status_of_old_active_tickets(db_session, tmp_path, ticket_event):
+    created = datetime.now(timezone.utc) - timedelta(days=90)
+    crud.create_ticket(db_session, ticket_event("arch-idle", "low", created_at=created))
+    db_session.commit()
+
+    assert archive.archive_expired_rows(retention_days=30, archive_dir=str(tmp_path))["status_history"] == 0
+    history = client.get("/tickets/arch-idle").json()["status_history"]
+    assert [h["status"] for h in history] == ["open"]
+
+
+def test_archived_ids_are_not_reused(db_session, tmp_path, ticket_event):
+    _ticket_with_old_alerts(db_session, ticket_event, "arch-ids", old=2, recent=0)
+    archived_ids = {a.id for a in db_session.query(models.Alert).filter_by(ticket_id="arch-ids")}
+    archive.archive_expired_rows(retention_days=30, archive_dir=str(tmp_path))
+    assert db_session.query(models.Alert).count() == 0
+
+    alert = crud.create_alert(db_session, "arch-ids", "response", models.SLAState.ALERT, {"n": 2})
+    assert alert.id > max(archived_ids)
+
+
+def test_read_archived_drops_duplicates_and_survives_truncation(db_session, tmp_path, ticket_event):
+    _ticket_with_old_alerts(db_session, ticket_event, "arch-2", old=2, recent=0)
+    rows = [archive._row_to_dict(models.Alert, a) for a in db_session.query(models.Alert).filter_by(ticket_id="arch-2")]
+    # the same batch written twice, as after a crash between write and delete
+    archive._append_rows(str(tmp_path), "alerts", "created_at", rows)
+    archive._append_rows(str(tmp_path), "alerts", "created_at", rows)
+    path = next(tmp_path.glob("alerts/*/*.jsonl.gz"))
+    with open(path, "ab") as f:
+        f.write(gzip.compress(b'{"id": 1}\n')[:10])
+    assert len(archive.read_archived("alerts", "arch-2", str(tmp_path))) == 2
+
+
+def test_get_ticket_with_archived_rows(db_session, tmp_path, monkeypatch, admin_enabled, ticket_event):
+    monkeypatch.setattr(settings, "ARCHIVE_DIR", str(tmp_path))
+    _ticket_with_old_alerts(db_session, ticket_event, "arch-3", old=2, recent=1)
+    before = client.get("/tickets/arch-3")
+    assert len(before.json()["alerts"]) == 3
+
+    archive.archive_expired_rows(retention_days=30)
+    after = client.get("/tickets/arch-3")
+    assert after.headers["ETag"] != before.headers["ETag"]
+    assert len(after.json()["alerts"]) == 1
+
+    assert [h["status"] for h in after.json()["status_history"]] == ["pending"]
+
+    data = client.get("/tickets/arch-3", params={"archived": "true"}).json()
+    assert [a["details"]["n"] for a in data["alerts"]] == [0, 1, 2]
+    assert [h["status"] for h in data["status_history"]] == ["open", "pending"]
+    latest = client.get("/tickets/arch-3", params={"archived": "true", "latest": 2}).json()
+    assert [a["details"]["n"] for a in latest["alerts"]] == [1, 2]
+
+    runs = client.get("/admin/archive").json()["runs"]
+    assert runs and runs[0]["alert_rows"] >= 2
@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src import crud
+from src.backtest import evaluate, load_lifetimes
+from src.config import SLAConfigSnapshot
+from src.main import app
+
+client = TestClient(app)
+
+CLOSED = ("closed", "resolved")
+
+
+def _history(end):
+    # tier "backtest-tier", all created 10 days before `end`
+    created = end - timedelta(days=10)
+    return created, {
+        "bt-open": ("high", None, "open"),  # active until end: 10 days old
+        "bt-fast": ("high", timedelta(minutes=30), "closed"),
+        "bt-slow": ("high", timedelta(minutes=90), "resolved"),
+        "bt-low": ("low", timedelta(minutes=300), "closed"),
+    }
+
+
+def test_lifetimes_and_counts(db_session, ticket_event):
+    end = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    created, tickets = _history(end)
+    for ticket_id, (priority, closed_after, status) in tickets.items():
+        updated = created + closed_after if closed_after else created
+        crud.update_ticket(db_session, ticket_event(
+            ticket_id, priority, "backtest-tier", status, created_at=created, updated_at=updated
+        ))
+    # outside the window
+    crud.update_ticket(db_session, ticket_event(
+        "bt-old", "high", "backtest-tier", created_at=end - timedelta(days=40)
+    ))
+
+    lifetimes = load_lifetimes(db_session, end - timedelta(days=30), end, CLOSED)
+    assert list(lifetimes[("backtest-tier", "high")]) == pytest.approx([30, 90, 10 * 24 * 60])
+    assert list(lifetimes[("backtest-tier", "low")]) == pytest.approx([300])
+
+    candidate = SLAConfigSnapshot({
+        "backtest-tier": {"high": {"response": 60}},
+    }, alert_threshold=0.5, breach_threshold=1.0)
+    result = evaluate(lifetimes, candidate)
+    # alert at 30 min reached by all three high tickets, breach at 60 by two
+    assert result["total"] == {"response": {"alerts": 3, "breaches": 2}}
+    assert result["by_priority"]["high"]["response"] == {"alerts": 3, "breaches": 2}
+    assert result["unconfigured_tickets"] == 1
+
+
+def test_status_at_end_comes_from_history(db_session, ticket_event):
+    end = datetime(2026, 4, 1, tzinfo=timezone.utc)
+    created = end - timedelta(hours=5)
+    # closed an hour in, reopened after the window
+    for ticket_id, priority, updated, status in (
+        ("bt-reopened", "high", created + timedelta(hours=1), "closed"),
+        ("bt-reopened", "high", end + timedelta(hours=1), "open"),
+        # closed only after the window: active at its end
+        ("bt-late-close", "low", end + timedelta(hours=1), "closed"),
+    ):
+        crud.update_ticket(db_session, ticket_event(
+            ticket_id, priority, "backtest-tier", status, created_at=created, updated_at=updated
+        ))
+
+    lifetimes = load_lifetimes(db_session, end - timedelta(days=1), end, CLOSED)
+    assert list(lifetimes[("backtest-tier", "high")]) == pytest.approx([60])
+    assert list(lifetimes[("backtest-tier", "low")]) == pytest.approx([300])
+
+
+def test_backtest_endpoint(db_session, admin_enabled):
+    candidate = {"tiers": {"nobody": {"high": {"response": 30}}}}
+    response = client.post("/admin/backtest", json=candidate, params={"days": 7})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["candidate"]["by_customer_tier"] == {}
+    assert set(body["current"]) == set(body["candidate"])
+
+    invalid = client.post("/admin/backtest", json={"tiers": {"nobody": {"high": {"uptime": 30}}}})
+    assert invalid.status_code == 400
+    assert "unknown SLA type" in invalid.json()["detail"]
+
+
+def test_backtest_endpoint_window_is_bounded(db_session, admin_enabled):
+    candidate = {"tiers": {"nobody": {"high": {"response": 30}}}}
+    assert client.post("/admin/backtest", json=candidate, params={"days": 366}).status_code == 422
+    too_long = client.post("/admin/backtest", json=candidate, params={
+        "start": "2020-01-01T00:00:00", "end": "2026-01-01T00:00:00+00:00",
+    })
+    assert too_long.status_code == 400
+    assert "python -m src.backtest" in too_long.json()["detail"]
+    assert client.post("/admin/backtest", json=candidate, params={
+        "start": "2025-06-01T00:00:00", "end": "2026-01-01T00:00:00",
+    }).status_code == 200
@@ -0,0 +1,107 @@
+import multiprocessing
+import queue
+import time
+
+import pytest
+
+from src import broadcast
+from src.broadcast import LocalBroadcast, UnixSocketBroadcast, create_broadcaster
+
+
+def _collect(received, expected, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while len(received) < expected and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # Give duplicates a chance to show up
+    time.sleep(0.2)
+    return sorted(str(m["origin"]) for m in received)
+
+
+def _worker(path, origin, barrier, results):
+    received = []
+    backend = UnixSocketBroadcast(path)
+    backend.subscribe(received.append)
+    backend.start()
+    backend.wait_ready(timeout=5)
+    barrier.wait(timeout=10)
+    backend.publish({"origin": origin})
+    results.put((origin, _collect(received, expected=3)))
+    backend.stop()
+
+
+def test_local_broadcast_delivers_to_subscribers():
+    backend = LocalBroadcast()
+    received = []
+    backend.subscribe(received.append)
+    backend.publish({"origin": "local"})
+    assert received == [{"origin": "local"}]
+
+
+def test_broadcast_subscriber_error_does_not_stop_delivery():
+    backend = LocalBroadcast()
+    received = []
+    backend.subscribe(lambda message: (_ for _ in ()).throw(Exception("subscriber error")))
+    backend.subscribe(received.append)
+    backend.publish({"origin": "local"})
+    assert received == [{"origin": "local"}]
+
+
+def test_unix_socket_broadcast_fans_out_across_processes(tmp_path):
+    path = str(tmp_path / "alerts.sock")
+    hub = UnixSocketBroadcast(path)
+    received = []
+    hub.subscribe(received.append)
+    hub.start()
+    assert hub.wait_ready(timeout=5)
+    assert hub.is_hub
+
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(3)
+    results = ctx.Queue()
+    workers = [ctx.Process(target=_worker, args=(path, i, barrier, results)) for i in range(2)]
+    for w in workers:
+        w.start()
+    try:
+        barrier.wait(timeout=30)
+        hub.publish({"origin": "hub"})
+        expected = ["0", "1", "hub"]
+        assert _collect(received, expected=3) == expected
+        for _ in workers:
+            origin, worker_received = results.get(timeout=10)
+            assert worker_received == expected, f"worker {origin} got {worker_received}"
+    finally:
+        for w in workers:
+            w.join(timeout=10)
+        hub.stop()
+
+
+def test_unix_socket_broadcast_elects_new_hub(tmp_path):
+    path = str(tmp_path / "alerts.sock")
+    first = UnixSocketBroadcast(path)
+    first.start()
+    assert first.wait_ready(timeout=5)
+    second = UnixSocketBroadcast(path)
+    received = []
+    second.subscribe(received.append)
+    second.start()
+    assert second.wait_ready(timeout=5)
+    assert not second.is_hub
+
+    first.stop()
+    deadline = time.monotonic() + 5
+    while not second.is_hub and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert second.is_hub
+    second.publish({"origin": "second"})
+    assert received == [{"origin": "second"}]
+    second.stop()
+
+
+def test_create_broadcaster_backends(monkeypatch):
+    monkeypatch.setattr(broadcast.settings, "DATABASE_URL", "postgresql+psycopg://user:pass@db:5432/sla_db")
+    assert isinstance(create_broadcaster("local"), LocalBroadcast)
+    assert isinstance(create_broadcaster("unix"), UnixSocketBroadcast)
+    pg = create_broadcaster("postgres")
+    assert pg._dsn == "postgresql://user:pass@db:5432/sla_db"
+    with pytest.raises(ValueError):
+        create_broadcaster("carrier-pigeon")
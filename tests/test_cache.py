@@ -0,0 +1,107 @@
+import time
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+
+from src.cache import CachedResponse, ResponseCache, response_cache
+from src.main import app
+
+client = TestClient(app)
+
+
+def _response(body=b"{}"):
+    return CachedResponse(body, {})
+
+
+def test_cache_hit_and_miss_counters():
+    cache = ResponseCache(max_entries=10, max_bytes=1024, ttl_seconds=60)
+    key = cache.ticket_key("t1", ())
+    assert cache.get(key) is None
+    cache.set(key, _response(), cache.generation, ticket_id="t1")
+    assert cache.get(key).body == b"{}"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2, max_bytes=1024, ttl_seconds=60)
+    for name in ("a", "b"):
+        cache.set(cache.ticket_key(name), _response(), cache.generation, ticket_id=name)
+    cache.get(cache.ticket_key("a"))
+    cache.set(cache.ticket_key("c"), _response(), cache.generation, ticket_id="c")
+    assert cache.get(cache.ticket_key("b")) is None
+    assert cache.get(cache.ticket_key("a")) is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_bounds_total_bytes():
+    cache = ResponseCache(max_entries=100, max_bytes=10, ttl_seconds=60)
+    cache.set(cache.ticket_key("a"), _response(b"x" * 6), cache.generation, ticket_id="a")
+    cache.set(cache.ticket_key("b"), _response(b"x" * 6), cache.generation, ticket_id="b")
+    assert cache.stats()["bytes"] == 6
+    # Larger than the whole budget: never stored
+    cache.set(cache.ticket_key("c"), _response(b"x" * 11), cache.generation, ticket_id="c")
+    assert cache.get(cache.ticket_key("c")) is None
+
+
+def test_cache_entries_expire():
+    cache = ResponseCache(max_entries=10, max_bytes=1024, ttl_seconds=0.01)
+    cache.set(cache.ticket_key("a"), _response(), cache.generation, ticket_id="a")
+    time.sleep(0.02)
+    assert cache.get(cache.ticket_key("a")) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_invalidate_ticket_is_precise():
+    cache = ResponseCache(max_entries=10, max_bytes=1024, ttl_seconds=60)
+    cache.set(cache.ticket_key("a"), _response(), cache.generation, ticket_id="a")
+    cache.set(cache.ticket_key("b"), _response(), cache.generation, ticket_id="b")
+    dashboard = cache.dashboard_key(None, 0, 100)
+    cache.set(dashboard, _response(), cache.generation)
+
+    cache.invalidate_ticket("a")
+    assert cache.get(cache.ticket_key("a")) is None
+    assert cache.get(cache.ticket_key("b")) is not None
+    assert cache.get(dashboard) is None
+    assert cache.dashboard_key(None, 0, 100) != dashboard
+
+
+def test_cache_rejects_responses_from_an_older_generation():
+    cache = ResponseCache(max_entries=10, max_bytes=1024, ttl_seconds=60)
+    generation = cache.generation
+    cache.invalidate_ticket("a")  # a write lands while the response is being built
+    cache.set(cache.ticket_key("a"), _response(), generation, ticket_id="a")
+    assert cache.get(cache.ticket_key("a")) is None
+
+
+def test_ticket_detail_is_cached_until_written(monkeypatch, db_session):
+    monkeypatch.setattr("src.main.evaluate_slas_for_ticket", lambda ticket_id: None)
+    now = datetime.now(timezone.utc)
+    event = {"id": "cached1", "priority": "low", "created_at": now.isoformat(),
+             "updated_at": now.isoformat(), "status": "open", "customer_tier": "gold"}
+    client.post("/tickets", json=[event])
+
+    first = client.get("/tickets/cached1")
+    assert client.get("/tickets/cached1").content == first.content
+    assert response_cache.stats()["hits"] == 1
+
+    later = now.replace(year=now.year + 1).isoformat()
+    client.post("/tickets", json=[dict(event, priority="high", updated_at=later)])
+    refreshed = client.get("/tickets/cached1")
+    assert refreshed.json()["priority"] == "high"
+
+
+def test_dashboard_cache_invalidated_by_alert(db_session, ticket_event):
+    from src import crud, models
+    crud.create_ticket(db_session, ticket_event("cached2"))
+    params = {"state": "alert", "include": ""}
+    assert client.get("/dashboard", params=params).json() == []
+    assert client.get("/dashboard", params=params).json() == []
+    crud.create_alert(db_session, "cached2", "response", models.SLAState.ALERT, {})
+    assert [t["id"] for t in client.get("/dashboard", params=params).json()] == ["cached2"]
+
+
+def test_admin_cache_stats(admin_enabled):
+    response = client.get("/admin/cache")
+    assert response.status_code == 200
+    assert {"hits", "misses", "entries", "bytes", "generation"} <= set(response.json())
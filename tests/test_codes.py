@@ -0,0 +1,109 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select, text
+
+from src import crud, models
+from src.codes import LookupValue, check_encoded_columns, codebook
+from src.main import app
+
+client = TestClient(app)
+
+
+def test_strings_are_stored_as_codes(db_session, ticket_event):
+    ticket = crud.create_ticket(db_session, ticket_event("codes-1", "codes-high", "codes-gold", "codes-open"))
+    assert (ticket.priority, ticket.customer_tier) == ("codes-high", "codes-gold")
+
+    stored = db_session.execute(
+        text("SELECT priority, customer_tier FROM tickets WHERE id = 'codes-1'")
+    ).one()
+    assert all(isinstance(code, int) for code in stored)
+    values = dict(db_session.query(LookupValue.id, LookupValue.value).filter(LookupValue.id.in_(stored)).all())
+    assert values == {stored[0]: "codes-high", stored[1]: "codes-gold"}
+
+
+def test_each_value_is_added_to_the_dictionary_once(db_session, ticket_event):
+    crud.create_ticket(db_session, ticket_event("codes-2", "codes-high", "codes-silver", "codes-open"))
+    crud.create_ticket(db_session, ticket_event("codes-3", "codes-high", "codes-silver", "codes-open"))
+    assert db_session.query(LookupValue).filter_by(kind="customer_tier", value="codes-silver").count() == 1
+
+
+def test_filters_compare_strings(db_session, ticket_event):
+    crud.create_ticket(db_session, ticket_event("codes-4", "codes-low", "codes-bronze", "codes-open"))
+    query = db_session.query(models.Ticket.id)
+    assert query.filter(models.Ticket.customer_tier == "codes-bronze").all() == [("codes-4",)]
+    assert query.filter(models.Ticket.priority.in_(["codes-low", "codes-none"])).all() == [("codes-4",)]
+    assert query.filter(models.Ticket.customer_tier == "codes-unknown").all() == []
+
+
+def test_reads_decode_in_process_and_filters_never_add_values(db_session, ticket_event):
+    crud.create_ticket(db_session, ticket_event("codes-6", "codes-high", "codes-iron", "codes-open"))
+    statement = str(select(models.Ticket.customer_tier).compile())
+    assert "lookup_values" not in statement
+
+    query = db_session.query(models.Ticket.id)
+    assert query.filter(models.Ticket.customer_tier.in_(["codes-never-stored"])).all() == []
+    assert query.filter(models.Ticket.customer_tier != "codes-never-stored").filter_by(id="codes-6").count() == 1
+    assert db_session.query(LookupValue).filter_by(value="codes-never-stored").count() == 0
+
+
+def test_codes_added_by_another_process_are_reloaded(db_session, ticket_event):
+    crud.create_ticket(db_session, ticket_event("codes-7", "codes-high", "codes-gold", "codes-open"))
+    # another worker adds a value and writes it; this process has never seen it
+    db_session.execute(text("INSERT INTO lookup_values (kind, value) VALUES ('customer_tier', 'codes-elsewhere')"))
+    db_session.execute(text(
+        "UPDATE tickets SET customer_tier = (SELECT id FROM lookup_values WHERE value = 'codes-elsewhere') "
+        "WHERE id = 'codes-7'"
+    ))
+    db_session.expire_all()
+    assert db_session.get(models.Ticket, "codes-7").customer_tier == "codes-elsewhere"
+
+
+def test_startup_refuses_text_categorical_columns():
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE tickets (id VARCHAR PRIMARY KEY, priority VARCHAR, customer_tier VARCHAR)"))
+    with pytest.raises(RuntimeError, match="tickets.priority"):
+        check_encoded_columns(engine)
+
+
+def test_alert_details_round_trip_through_typed_columns(db_session, ticket_event):
+    crud.create_ticket(db_session, ticket_event("codes-5", "codes-high", "codes-gold", "codes-open"))
+    details = {"elapsed_minutes": 55.0, "target_minutes": 60, "percent_used": 0.92, "config_version": 3,
+               "config_digest": "0123456789ab", "note": "ad hoc"}
+    alert = crud.create_alert(db_session, "codes-5", "response", models.SLAState.ALERT, details)
+    db_session.expire_all()
+    alert = db_session.get(models.Alert, alert.id)
+    assert (alert.percent_used, alert.config_version, alert.config_digest) == (0.92, 3, "0123456789ab")
+    assert alert.extra == {"note": "ad hoc"}
+    assert alert.details == details
+
+    response = client.get("/alerts", params={"min_percent_used": 0.9})
+    assert {"ticket_id": "codes-5", "details": details}.items() <= next(
+        a for a in response.json() if a["ticket_id"] == "codes-5"
+    ).items()
+    assert all(a["details"]["percent_used"] >= 0.9 for a in response.json())
+
+
+def test_unknown_filter_values_are_remembered_until_a_load_finds_them(db_session, count_queries, ticket_event):
+    crud.create_ticket(db_session, ticket_event("codes-8", "codes-high", "codes-known", "codes-open"))
+    query = db_session.query(models.Ticket.id)
+    assert query.filter(models.Ticket.customer_tier == "codes-later").all() == []
+    count_queries.clear()
+    for _ in range(3):
+        assert query.filter(models.Ticket.customer_tier == "codes-later").all() == []
+    assert not [statement for statement in count_queries if "lookup_values" in statement]
+
+    # added by another worker: found by the next explicit reload
+    db_session.execute(text("INSERT INTO lookup_values (kind, value) VALUES ('customer_tier', 'codes-later')"))
+    assert query.filter(models.Ticket.customer_tier == "codes-later").all() == []
+    codebook.reload()
+    db_session.execute(text(
+        "UPDATE tickets SET customer_tier = (SELECT id FROM lookup_values WHERE value = 'codes-later') "
+        "WHERE id = 'codes-8'"
+    ))
+    assert query.filter(models.Ticket.customer_tier == "codes-later").all() == [("codes-8",)]
+
+    # and by registering it here
+    assert query.filter(models.Ticket.priority == "codes-urgent").all() == []
+    crud.create_ticket(db_session, ticket_event("codes-9", "codes-urgent", "codes-gold", "codes-open"))
+    assert query.filter(models.Ticket.priority == "codes-urgent").all() == [("codes-9",)]
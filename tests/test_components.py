@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+from src import components
+from src.components import Component
+
+
+def test_component_starts_once_after_its_requirements():
+    calls = []
+    first = Component("first", lambda: calls.append("first") or "handle-1")
+    second = Component("second", lambda: calls.append("second"), requires=(first,))
+
+    threads = [threading.Thread(target=second.ensure_started) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ["first", "second"]
+    assert first.ensure_started() == "handle-1"
+    assert first.startup_ms is not None and second.started
+    second.stop()
+    first.stop()
+
+
+def test_stop_all_stops_in_reverse_start_order():
+    stopped = []
+    first = Component("first", lambda: "a", stop=stopped.append)
+    second = Component("second", lambda: "b", stop=stopped.append)
+    first.ensure_started()
+    second.ensure_started()
+    assert {"first", "second"} <= set(components.startup_report())
+
+    components.stop_all()
+    assert stopped == ["b", "a"]
+    assert not first.started and not second.started
+    # stopping again is a no-op
+    first.stop()
+    assert stopped == ["b", "a"]
+
+
+def test_importing_the_app_has_no_side_effects(tmp_path):
+    db_file = tmp_path / "import.sqlite3"
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_file}")
+    script = (
+        "import threading\n"
+        "import src.main\n"
+        "assert threading.active_count() == 1, threading.enumerate()\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], env=env, cwd=Path(__file__).parent.parent,
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert not db_file.exists()
@@ -1,8 +1,16 @@
+import pytest
 import yaml
 
 from src.config import load_sla_config, get_sla_config
 
 
+@pytest.fixture(autouse=True)
+def no_reload_listeners(monkeypatch):
+    """
+    Reloads in these tests must not re-evaluate the tickets of other tests.
+    """
+    monkeypatch.setattr("src.config._reload_listeners", [])
+
 def test_load_and_get_sla_config(tmp_path, monkeypatch):
     cfg = {
         "tiers": {
@@ -45,3 +53,151 @@ def test_config_handler_on_modified(monkeypatch, tmp_path):
         def __init__(self, path):
             self.src_path = path
     handler.on_modified(DummyEvent(str(config_file)))
+
+
+def test_sla_config_snapshot_is_compiled_and_immutable():
+    from src.config import SLAConfigSnapshot
+
+    snapshot = SLAConfigSnapshot(
+        {"gold": {"high": {"response": 30, "resolution": 180}}},
+        version=3, alert_threshold=0.5, breach_threshold=1.0,
+    )
+    target = snapshot.target("gold", "high", "response")
+    assert (target.target_minutes, target.alert_minutes, target.breach_minutes) == (30.0, 15.0, 30.0)
+    assert snapshot.cell("gold", "high")["resolution"].alert_minutes == 90.0
+    assert snapshot.cell("gold", "low") is None
+    # still reads like the YAML mapping
+    assert snapshot["gold"]["high"]["response"] == 30
+    with pytest.raises(TypeError):
+        snapshot["gold"]["high"]["response"] = 1
+    with pytest.raises(AttributeError):
+        snapshot.version = 4
+
+
+def test_reload_publishes_new_version_and_keeps_old_on_error(tmp_path):
+    config_file = tmp_path / "sla.yaml"
+    config_file.write_text(yaml.dump({"tiers": {"gold": {"high": {"response": 10, "resolution": 20}}}}))
+    load_sla_config(str(config_file))
+    first = get_sla_config()
+
+    config_file.write_text(yaml.dump({"tiers": {"gold": {"high": {"response": -1, "resolution": 20}}}}))
+    load_sla_config(str(config_file))
+    assert get_sla_config() is first
+
+    config_file.write_text(yaml.dump({"tiers": {"gold": {"high": {"response": 15, "resolution": 20}}}}))
+    load_sla_config(str(config_file))
+    second = get_sla_config()
+    assert second.version == first.version + 1
+    assert second.digest != first.digest
+    assert first.target("gold", "high", "response").target_minutes == 10
+
+
+def test_reload_notifies_listeners_with_changed_cells(tmp_path):
+    from src.config import add_reload_listener
+    config_file = tmp_path / "sla.yaml"
+    tiers = {"gold": {"high": {"response": 10, "resolution": 20}, "low": {"response": 60, "resolution": 120}}}
+    config_file.write_text(yaml.dump({"tiers": tiers}))
+    load_sla_config(str(config_file))
+
+    calls = []
+    add_reload_listener(lambda previous, current: calls.append(current.changed_cells(previous)))
+    load_sla_config(str(config_file))  # same content: nothing to notify
+    assert calls == []
+
+    tiers["gold"]["high"]["response"] = 15
+    tiers["silver"] = {"high": {"response": 30}}
+    config_file.write_text(yaml.dump({"tiers": tiers}))
+    load_sla_config(str(config_file))
+    assert calls == [{("gold", "high", "response"), ("silver", "high", "response")}]
+
+
+@pytest.mark.parametrize("content", [
+    {"something": {}},
+    {"tiers": {}},
+    {"tiers": {"gold": {"high": {"response": 0, "resolution": 20}}}},
+    {"tiers": {"gold": {"high": {"response": True}}}},
+    {"tiers": {"gold": {"high": {"first_reply": 10}}}},
+])
+def test_invalid_config_is_rejected_and_recorded(tmp_path, content):
+    from src.config import SLAConfigError, get_reload_status, validate_sla_config
+    with pytest.raises(SLAConfigError):
+        validate_sla_config(content)
+
+    good = tmp_path / "good.yaml"
+    good.write_text(yaml.dump({"tiers": {"gold": {"high": {"response": 10, "resolution": 20}}}}))
+    assert load_sla_config(str(good))
+    current = get_sla_config()
+    failures = get_reload_status()["failures"]
+
+    bad = tmp_path / "bad.yaml"
+    bad.write_text(yaml.dump(content))
+    assert not load_sla_config(str(bad))
+    assert get_sla_config() is current
+    status = get_reload_status()
+    assert status["failures"] == failures + 1
+    assert str(bad) in status["last_error"]
+
+
+def test_handler_debounces_bursts_and_follows_renames(tmp_path, monkeypatch):
+    import time
+    from src.config import SLAConfigHandler
+
+    class DummyEvent:
+        def __init__(self, src_path, dest_path=None):
+            self.src_path = src_path
+            self.dest_path = dest_path
+
+    reloads = []
+    monkeypatch.setattr("src.config.reload_if_changed", lambda path: reloads.append(path))
+    config_file = str(tmp_path / "sla.yaml")
+    handler = SLAConfigHandler(config_file, debounce_seconds=0.05)
+    for _ in range(5):
+        handler.on_modified(DummyEvent(config_file))
+    handler.on_modified(DummyEvent(str(tmp_path / "other.yaml")))
+    time.sleep(0.2)
+    assert reloads == [config_file]
+
+    handler.on_moved(DummyEvent(str(tmp_path / ".sla.yaml.swp"), dest_path=config_file))
+    time.sleep(0.2)
+    assert reloads == [config_file, config_file]
+
+
+def test_reload_if_changed_skips_unchanged_file(tmp_path):
+    from src.config import get_reload_status, reload_if_changed
+    config_file = tmp_path / "sla.yaml"
+    config_file.write_text(yaml.dump({"tiers": {"gold": {"high": {"response": 10, "resolution": 20}}}}))
+    assert reload_if_changed(str(config_file))
+    unchanged = get_reload_status()["unchanged"]
+    assert not reload_if_changed(str(config_file))
+    assert get_reload_status()["unchanged"] == unchanged + 1
+
+
+def test_poller_reloads_on_mtime_change(tmp_path):
+    import os
+    import time
+    from src.config import ConfigPoller
+    config_file = tmp_path / "sla.yaml"
+    config_file.write_text(yaml.dump({"tiers": {"gold": {"high": {"response": 10, "resolution": 20}}}}))
+    load_sla_config(str(config_file))
+    version = get_sla_config().version
+
+    poller = ConfigPoller(str(config_file), interval=0.02)
+    poller.start()
+    try:
+        config_file.write_text(yaml.dump({"tiers": {"gold": {"high": {"response": 12, "resolution": 20}}}}))
+        os.utime(config_file, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+        deadline = time.monotonic() + 2
+        while get_sla_config().version == version and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        poller.stop()
+        poller.join(1)
+    assert get_sla_config().target("gold", "high", "response").target_minutes == 12
+
+
+def test_admin_config_status(admin_enabled):
+    from fastapi.testclient import TestClient
+    from src.main import app
+    data = TestClient(app).get("/admin/config").json()
+    assert data["version"] == get_sla_config().version
+    assert {"reloads", "failures", "last_error", "mode"} <= set(data)
@@ -1,6 +1,9 @@
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+
+import pytest
 
 from src import crud, schemas, models
+from src.pagination import InvalidCursor, decode_cursor, encode_cursor
 
 
 def test_create_and_get_ticket(db_session):
@@ -77,3 +80,101 @@ def test_create_alert_increments_escalation(db_session):
     # Check escalation increment
     updated_ticket = crud.get_ticket(db_session, "alert-test")
     assert updated_ticket.escalation_level == 1
+
+
+def test_pagination_cursor_round_trip():
+    ts = datetime(2025, 6, 17, 12, 0, 0)
+    cursor = encode_cursor(ts, "ticket-1")
+    assert decode_cursor(cursor, (datetime.fromisoformat, str)) == (ts, "ticket-1")
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, (datetime.fromisoformat,))
+    with pytest.raises(InvalidCursor):
+        decode_cursor("%%%", (str,))
+
+
+def test_create_alert_materializes_worst_sla_state(db_session):
+    ticket = models.Ticket(
+        id="state-test",
+        priority="high",
+        customer_tier="gold",
+        created_at=datetime.now(timezone.utc),
+        updated_at=datetime.now(timezone.utc)
+    )
+    db_session.add(ticket)
+    db_session.commit()
+    assert ticket.sla_state == models.SLAState.OK
+    assert ticket.sla_state_at is None
+
+    crud.create_alert(db_session, "state-test", "response", models.SLAState.ALERT, {})
+    assert ticket.sla_state == models.SLAState.ALERT
+    alerted_at = ticket.sla_state_at
+    assert alerted_at is not None
+
+    crud.create_alert(db_session, "state-test", "resolution", models.SLAState.BREACH, {})
+    assert ticket.sla_state == models.SLAState.BREACH
+
+    # A later, milder alert does not downgrade the ticket
+    crud.create_alert(db_session, "state-test", "response", models.SLAState.ALERT, {})
+    assert ticket.sla_state == models.SLAState.BREACH
+    assert ticket.escalation_level == 3
+
+
+def test_dashboard_query_filters_on_ticket_columns(db_session, count_queries, ticket_event):
+    for ticket_id, tier, state in (("dq-ok", "gold", None), ("dq-alert", "gold", models.SLAState.ALERT),
+                                   ("dq-breach", "silver", models.SLAState.BREACH)):
+        crud.create_ticket(db_session, ticket_event(ticket_id, customer_tier=tier))
+        if state is not None:
+            crud.create_alert(db_session, ticket_id, "response", state, {})
+
+    def ids(**filters):
+        query = crud.dashboard_query(db_session, include=(), **filters)
+        return {t.id for t in query.all() if t.id.startswith("dq-")}
+
+    assert ids(state=models.SLAState.ALERT) == {"dq-alert", "dq-breach"}
+    assert ids(state=models.SLAState.BREACH) == {"dq-breach"}
+    assert ids(state=models.SLAState.OK) == {"dq-ok"}
+    assert ids(customer_tier="gold", priority="high") == {"dq-ok", "dq-alert"}
+
+    count_queries.clear()
+    ids(state=models.SLAState.ALERT)
+    # No semi-join over the alerts history
+    assert "alerts" not in count_queries[0]
+
+
+def test_ticket_version_reads_alerts_through_an_index(db_session, count_queries, ticket_event):
+    crud.create_ticket(db_session, ticket_event("version-plan"))
+    count_queries.clear()
+    assert crud.ticket_version(db_session, "version-plan") is not None
+
+    cursor = db_session.connection().connection.cursor()
+    details = [row[-1] for row in cursor.execute("EXPLAIN QUERY PLAN " + count_queries[0], ("version-plan",))]
+    assert not any(detail.startswith("SCAN alerts") for detail in details), details
+    assert any("ix_alerts_ticket_id_created_at" in detail for detail in details), details
+
+
+def test_backfill_sla_state_from_existing_alerts(db_session, ticket_event):
+    now = datetime.now(timezone.utc)
+    for ticket_id in ("backfill-breach", "backfill-alert", "backfill-ok"):
+        crud.create_ticket(db_session, ticket_event(ticket_id, created_at=now))
+    # alerts written before tickets carried their SLA state
+    first, breached = now - timedelta(minutes=30), now - timedelta(minutes=10)
+    db_session.add_all([
+        models.Alert(ticket_id="backfill-breach", sla_type="response", state=models.SLAState.ALERT, created_at=first),
+        models.Alert(ticket_id="backfill-breach", sla_type="response", state=models.SLAState.BREACH,
+                     created_at=breached),
+        models.Alert(ticket_id="backfill-alert", sla_type="response", state=models.SLAState.ALERT, created_at=first),
+    ])
+    db_session.commit()
+
+    assert crud.backfill_sla_state(db_session.connection()) == 2
+    assert crud.backfill_sla_state(db_session.connection()) == 0
+    db_session.expire_all()
+    states = {t.id: (t.sla_state, t.sla_state_at) for t in db_session.query(models.Ticket).filter(
+        models.Ticket.id.like("backfill-%"))}
+    assert states == {
+        "backfill-breach": (models.SLAState.BREACH, breached.replace(tzinfo=None)),
+        "backfill-alert": (models.SLAState.ALERT, first.replace(tzinfo=None)),
+        "backfill-ok": (models.SLAState.OK, None),
+    }
+    assert {t.id for t in crud.dashboard_query(db_session, state=models.SLAState.OK)
+            if t.id.startswith("backfill-")} == {"backfill-ok"}
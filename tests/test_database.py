@@ -0,0 +1,63 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from src import database
+from src.database import InstrumentedQueuePool, build_engine, pool_status, session_scope
+
+
+def test_sqlite_file_engine_uses_wal_and_instrumented_pool(tmp_path):
+    engine = build_engine(f"sqlite:///{tmp_path / 'wal.sqlite3'}")
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+    assert isinstance(engine.pool, InstrumentedQueuePool)
+    assert pool_status(engine)["checkouts"] == 1
+    engine.dispose()
+
+
+def test_in_memory_sqlite_keeps_default_pool():
+    engine = build_engine("sqlite://")
+    assert not isinstance(engine.pool, InstrumentedQueuePool)
+    assert "checkouts" not in pool_status(engine)
+
+
+def test_pool_records_checkout_timeouts(tmp_path):
+    engine = build_engine(f"sqlite:///{tmp_path / 'pool.sqlite3'}", pool_size=1, max_overflow=0, pool_timeout=0.05)
+    with engine.connect():
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+    status = pool_status(engine)
+    assert status["timeouts"] == 1
+    assert status["wait_ms_max"] >= 50
+    assert status["checked_out"] == 0
+    engine.dispose()
+
+
+def test_session_scope_commits_or_rolls_back(monkeypatch):
+    events = []
+
+    class FakeSession:
+        def commit(self):
+            events.append("commit")
+
+        def rollback(self):
+            events.append("rollback")
+
+        def close(self):
+            events.append("close")
+
+    monkeypatch.setattr(database, "SessionLocal", FakeSession)
+    with session_scope():
+        pass
+    with pytest.raises(ValueError):
+        with session_scope():
+            raise ValueError("boom")
+    assert events == ["commit", "close", "rollback", "close"]
+
+
+def test_admin_db_status(admin_enabled):
+    from src.main import app
+    data = TestClient(app).get("/admin/db").json()
+    assert data["pool"] == type(database.engine.pool).__name__
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src import crud
+from src.config import SLAConfigSnapshot
+from src.forecast import parse_duration, tickets_at_risk
+from src.main import app
+
+client = TestClient(app)
+
+CONFIG = SLAConfigSnapshot({
+    "risk-tier": {
+        "high": {"response": 60, "resolution": 240},
+        "low": {"response": 120},
+    },
+}, breach_threshold=1.0)
+
+
+def test_parse_duration():
+    assert parse_duration("30m") == timedelta(minutes=30)
+    assert parse_duration("2h") == timedelta(hours=2)
+    assert parse_duration("90s") == timedelta(seconds=90)
+    assert parse_duration("15") == timedelta(minutes=15)
+    with pytest.raises(ValueError):
+        parse_duration("soon")
+
+
+def test_tickets_at_risk_ordered_by_time_to_breach(db_session, ticket_event):
+    now = datetime.now(timezone.utc)
+    for ticket_id, priority, minutes_ago, status in (
+        ("risk-10", "high", 50, "open"),  # response breach in 10 min
+        ("risk-20", "high", 40, "open"),  # in 20 min
+        ("risk-late", "high", 70, "open"),  # response breached, resolution in 170 min
+        ("risk-25", "low", 95, "open"),  # in 25 min
+        ("risk-closed", "high", 45, "closed"),
+    ):
+        crud.update_ticket(db_session, ticket_event(
+            ticket_id, priority, "risk-tier", status, minutes_ago=minutes_ago, now=now
+        ))
+
+    at_risk = tickets_at_risk(db_session, CONFIG, timedelta(minutes=30), now=now)
+    assert [t["id"] for t in at_risk] == ["risk-10", "risk-20", "risk-25"]
+    assert at_risk[0]["sla_type"] == "response"
+    assert at_risk[0]["minutes_to_breach"] == pytest.approx(10)
+
+    assert [t["id"] for t in tickets_at_risk(db_session, CONFIG, timedelta(minutes=30), now=now,
+                                             priority="low")] == ["risk-25"]
+    assert [t["id"] for t in tickets_at_risk(db_session, CONFIG, timedelta(minutes=30), now=now,
+                                             limit=1)] == ["risk-10"]
+    # further out, the resolution breach of the ticket that already missed its response
+    later = tickets_at_risk(db_session, CONFIG, timedelta(hours=3), now=now)
+    assert later[-1]["id"] == "risk-late" and later[-1]["sla_type"] == "resolution"
+
+
+def test_at_risk_endpoint(db_session, monkeypatch, ticket_event):
+    response = client.get("/tickets/at-risk", params={"within": "30m", "customer_tier": "nobody"})
+    assert response.status_code == 200
+    assert response.json() == []
+
+    monkeypatch.setattr("src.main.get_sla_config", lambda: CONFIG)
+    now = datetime.now(timezone.utc)
+    crud.update_ticket(db_session, ticket_event("risk-api", "high", "risk-tier", minutes_ago=50, now=now))
+    (item,) = client.get("/tickets/at-risk", params={"within": "30m", "customer_tier": "risk-tier"}).json()
+    # both naive UTC, like the timestamps of every other endpoint
+    created_at, breach_at = datetime.fromisoformat(item["created_at"]), datetime.fromisoformat(item["breach_at"])
+    assert created_at.tzinfo is None and breach_at.tzinfo is None
+    assert breach_at - created_at == timedelta(minutes=60)
+    assert created_at == now.replace(tzinfo=None) - timedelta(minutes=50)
+    assert client.get("/tickets/at-risk", params={"within": "soon"}).status_code == 400
@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from src import crud, models, scheduler
+from src.hotset import HotSet, hot_set
+from src.main import app
+
+client = TestClient(app)
+
+
+def test_write_through_and_closed_tickets_leave(db_session, ticket_event):
+    crud.create_ticket(db_session, ticket_event("hot-1"))
+    assert hot_set.get("hot-1").status == "open"
+
+    crud.create_alert(db_session, "hot-1", "response", models.SLAState.BREACH, {})
+    assert hot_set.get("hot-1").escalation_level == 1
+    assert hot_set.get("hot-1").sla_state == models.SLAState.BREACH
+
+    crud.update_ticket(db_session, ticket_event(
+        "hot-1", status="closed", updated_at=datetime.now(timezone.utc) + timedelta(seconds=1)
+    ))
+    assert hot_set.get("hot-1") is None
+
+
+def test_bounded_lru(db_session, ticket_event):
+    tickets = [crud.create_ticket(db_session, ticket_event(f"hot-lru-{i}")) for i in range(3)]
+    hot = HotSet(max_tickets=2, closed_statuses=("closed",))
+    # more active tickets in the database than fit: never a stand-in for a scan
+    hot.load(db_session)
+    assert not hot.complete and hot.tickets() is None
+
+    hot.clear()
+    hot.put(tickets[0])
+    hot.put(tickets[1])
+    hot.get("hot-lru-0")
+    hot.put(tickets[2])
+    assert hot.get("hot-lru-1") is None
+    assert hot.get("hot-lru-0") and hot.get("hot-lru-2")
+    assert hot.stats()["evictions"] == 1
+
+
+def test_verify_reports_and_repairs_drift(db_session, ticket_event):
+    crud.create_ticket(db_session, ticket_event("hot-drift"))
+    hot = HotSet(max_tickets=10 ** 6, closed_statuses=("closed",))
+    hot.load(db_session)
+    assert hot.verify(db_session) == 0
+
+    # a write that did not go through this process
+    db_session.get(models.Ticket, "hot-drift").escalation_level = 5
+    db_session.commit()
+    assert hot.verify(db_session) == 1
+    assert hot.get("hot-drift").escalation_level == 5
+
+
+def test_scheduler_evaluates_active_tickets_from_hot_set(monkeypatch, db_session, ticket_event):
+    monkeypatch.setattr(scheduler, "get_sla_config", lambda: {"hot-tier": {"high": {"response": 1, "resolution": 2}}})
+    created = []
+    monkeypatch.setattr("src.scheduler.process_alert", lambda tid, sla_type, state, details: created.append(tid))
+    crud.create_ticket(db_session, ticket_event("hot-open", customer_tier="hot-tier", minutes_ago=5))
+    crud.create_ticket(db_session, ticket_event("hot-closed", "high", "hot-tier", "resolved", minutes_ago=5))
+    hot_set.load(db_session)
+
+    def no_query(*args, **kwargs):
+        raise AssertionError("evaluated from the database")
+    monkeypatch.setattr(db_session, "query", no_query)
+    scheduler.evaluate_slas()
+    assert set(created) == {"hot-open"}
+
+
+def test_get_ticket_scalars_from_hot_set(db_session, count_queries, ticket_event):
+    crud.create_ticket(db_session, ticket_event("hot-get"))
+    from_db = client.get("/tickets/hot-get").json()
+    count_queries.clear()
+    response = client.get("/tickets/hot-get", params={"include": ""})
+    assert count_queries == []
+    assert response.json() == {k: v for k, v in from_db.items() if k not in ("status_history", "alerts")}
+    assert client.get("/tickets/hot-get", params={"include": ""},
+                      headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+
+
+def test_get_ticket_etag_same_from_hot_set_and_database(db_session, ticket_event):
+    crud.create_ticket(db_session, ticket_event("hot-etag"))
+    params = {"include": ""}
+    hit = client.get("/tickets/hot-etag", params=params)
+    etag = hit.headers["ETag"]
+    # a poller alternating between a hot-set hit and a miss stays 304
+    for _ in range(2):
+        hot_set.clear()
+        miss = client.get("/tickets/hot-etag", params=params, headers={"If-None-Match": etag})
+        assert miss.status_code == 304
+        assert miss.headers["ETag"] == etag
+        hot_set.load(db_session)
+        assert client.get("/tickets/hot-etag", params=params, headers={"If-None-Match": etag}).status_code == 304
+    hot_set.clear()
+    assert client.get("/tickets/hot-etag", params=params).content == hit.content
@@ -0,0 +1,104 @@
+import logging
+import threading
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src import settings
+from src.logs import _stop_logging, bind_correlation_id, configure_logging, correlation_id, install_record_factory
+from src.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def record_factory():
+    install_record_factory()
+
+
+def test_structured_logs_pick_up_the_bound_correlation_id(caplog):
+    log = logging.getLogger("tests.logs")
+    with caplog.at_level(logging.INFO, logger="tests.logs"):
+        with bind_correlation_id("cid-bound"):
+            log.info({"operation": "probe"})
+        log.info({"operation": "unbound"})
+        log.info({"correlation_id": "explicit", "operation": "explicit"})
+
+    bound, unbound, explicit = (record.msg for record in caplog.records)
+    assert bound == {"correlation_id": "cid-bound", "operation": "probe"}
+    assert unbound["correlation_id"] is None
+    assert explicit["correlation_id"] == "explicit"
+    assert correlation_id.get() is None
+
+
+def test_request_correlation_id_reaches_crud_logs(db_session, caplog):
+    ts = datetime.now(timezone.utc).isoformat()
+    event = {"id": "logs-1", "priority": "high", "created_at": ts, "updated_at": ts, "status": "open",
+             "customer_tier": "gold"}
+    with caplog.at_level(logging.INFO, logger="src.crud"):
+        response = client.post("/tickets", json=[event], headers={"X-Correlation-ID": "cid-request"})
+
+    assert response.status_code == 200
+    assert response.headers["X-Correlation-ID"] == "cid-request"
+    created = next(r.msg for r in caplog.records if r.name == "src.crud" and r.msg.get("operation") == "ingest")
+    assert created["correlation_id"] == "cid-request"
+    # a fresh id when the caller sends none
+    assert client.get("/stats").headers["X-Correlation-ID"] != "cid-request"
+
+
+def test_log_queue_moves_handlers_off_the_calling_thread(monkeypatch):
+    class ListHandler(logging.Handler):
+        def __init__(self):
+            super().__init__()
+            self.records = []
+
+        def emit(self, record):
+            self.records.append(record)
+
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers, root.level
+    target = ListHandler()
+    root.handlers = [target]
+    monkeypatch.setattr(settings, "LOG_QUEUE", True)
+    try:
+        handle = configure_logging()
+        assert type(root.handlers[0]).__name__ == "QueueHandler"
+        with bind_correlation_id("cid-queued"):
+            logging.getLogger("tests.logs").warning({"operation": "queued"})
+        _stop_logging(handle)
+    finally:
+        root.handlers, root.level = saved_handlers, saved_level
+
+    assert root.handlers is saved_handlers
+    (record,) = target.records
+    assert record.correlation_id == "cid-queued"
+    assert "cid-queued" in record.getMessage()
+
+
+def test_queue_also_takes_uvicorn_access_handlers(monkeypatch):
+    class ThreadHandler(logging.Handler):
+        def __init__(self):
+            super().__init__()
+            self.threads = []
+
+        def emit(self, record):
+            self.threads.append(threading.get_ident())
+
+    root, access = logging.getLogger(), logging.getLogger("uvicorn.access")
+    saved = root.handlers, root.level, access.handlers, access.propagate
+    target = ThreadHandler()
+    access.handlers, access.propagate = [target], False
+    monkeypatch.setattr(settings, "LOG_QUEUE", True)
+    try:
+        handle = configure_logging()
+        assert type(access.handlers[0]).__name__ == "QueueHandler"
+        access.warning("GET / 200")
+        _stop_logging(handle)
+        assert access.handlers == [target]
+    finally:
+        root.handlers, root.level, access.handlers, access.propagate = saved
+
+    # written by the listener, not the thread that logged
+    assert len(target.threads) == 1
+    assert target.threads[0] != threading.get_ident()
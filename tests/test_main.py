@@ -8,6 +8,7 @@ from fastapi.testclient import TestClient
 import httpx
 
 from src import schemas
+from src.codes import codebook
 from src.main import app, get_db
 from src.scheduler import evaluate_slas
 
@@ -144,7 +145,7 @@ def test_websocket_broadcast(monkeypatch):
     monkeypatch.setattr("src.crud.create_alert", lambda db, tid, sla_type, state, details: None)
     # Patch send_json to store the message and allow receive_json to return it
     sent_messages = []
-    def fake_send_json(self, message):
+    async def fake_send_json(self, message):
         sent_messages.append(message)
     monkeypatch.setattr("starlette.websockets.WebSocket.send_json", fake_send_json)
     # Patch receive_json to return the sent message
@@ -157,14 +158,13 @@ def test_websocket_broadcast(monkeypatch):
     with client.websocket_connect("/ws/alerts") as ws:
         # Ingest and evaluate to trigger broadcast
         client.post("/tickets", json=[event.model_dump()])
-        monkeypatch.setattr("src.config.get_sla_config",
-                            lambda: {"gold": {"high": {"response": 1, "resolution": 1000}}})
-        # Force manual broadcast
+        # Publish the way process_alert does; delivered on the loop serving the socket
+        from src.broadcast import broadcaster
         from src.ws import manager
-        manager.broadcast_sync({"ticket_id": "ws1", "sla_type": "response", "state": "alert", "details": {}, "timestamp": datetime.now(timezone.utc).isoformat()})
-        # Force event loop to process broadcast
-        import asyncio
-        asyncio.get_event_loop().run_until_complete(asyncio.sleep(0))
+        broadcaster.publish({"ticket_id": "ws1", "sla_type": "response", "state": "alert", "details": {}, "timestamp": datetime.now(timezone.utc).isoformat()})
+        deadline = time.monotonic() + 5
+        while (manager.pending or not sent_messages) and time.monotonic() < deadline:
+            time.sleep(0.01)
         try:
             message = ws.receive_json(timeout=5)
         except Exception as e:
@@ -241,3 +241,312 @@ def test_model_repr():
     assert "Ticket" in repr(t)
     assert "StatusHistory" in repr(s)
     assert "Alert" in repr(a)
+
+
+def _ingest_spaced_tickets(monkeypatch, prefix, count):
+    monkeypatch.setattr("src.main.evaluate_slas_for_ticket", lambda ticket_id: None)
+    base = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    events = []
+    for i in range(count):
+        ts = base.replace(minute=i).isoformat()
+        events.append({
+            "id": f"{prefix}{i}",
+            "priority": "high",
+            "created_at": ts,
+            "updated_at": ts,
+            "status": "open",
+            "customer_tier": "gold"
+        })
+    assert client.post("/tickets", json=events).status_code == 200
+    return [e["id"] for e in events]
+
+
+def test_dashboard_cursor_pagination(monkeypatch):
+    ids = _ingest_spaced_tickets(monkeypatch, "page", 5)
+    # Skip anything ordered before our tickets
+    first = client.get("/dashboard", params={"limit": 1000})
+    seen_before = [t["id"] for t in first.json() if t["id"] not in ids]
+
+    pages = []
+    response = client.get("/dashboard", params={"limit": 2, "offset": len(seen_before)})
+    while True:
+        assert response.status_code == 200
+        pages.append([t["id"] for t in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        response = client.get("/dashboard", params={"limit": 2, "cursor": cursor})
+
+    assert [tid for page in pages for tid in page] == ids
+    assert [len(page) for page in pages][:2] == [2, 2]
+
+
+def test_dashboard_offset_mode_is_ordered(monkeypatch):
+    ids = _ingest_spaced_tickets(monkeypatch, "offset", 3)
+    data = client.get("/dashboard", params={"limit": 1000}).json()
+    ours = [t["id"] for t in data if t["id"] in ids]
+    assert ours == ids
+
+
+def test_dashboard_invalid_cursor():
+    response = client.get("/dashboard", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def _ingest_tickets_with_relations(db_session, ticket_event, prefix, count):
+    from src import crud, models
+    now = datetime.now(timezone.utc)
+    for i in range(count):
+        ticket_id = f"{prefix}{i}"
+        crud.create_ticket(db_session, ticket_event(ticket_id, created_at=now))
+        crud.create_alert(db_session, ticket_id, "response", models.SLAState.ALERT, {"percent_used": 0.9})
+    db_session.expire_all()
+
+
+def test_dashboard_query_count_is_constant(db_session, count_queries, ticket_event):
+    _ingest_tickets_with_relations(db_session, ticket_event, "nplus", 10)
+    count_queries.clear()
+    response = client.get("/dashboard", params={"limit": 1000})
+    assert response.status_code == 200
+    data = response.json()
+    assert all(t["status_history"] and t["alerts"] for t in data if t["id"].startswith("nplus"))
+    # ETag version probe + tickets + status_history + alerts, whatever the page size
+    assert len(count_queries) == 4
+
+
+def test_dashboard_include_skips_relationships(db_session, count_queries, ticket_event):
+    _ingest_tickets_with_relations(db_session, ticket_event, "skip", 3)
+    count_queries.clear()
+    response = client.get("/dashboard", params={"include": ""})
+    assert response.status_code == 200
+    assert len(count_queries) == 2
+    for ticket in response.json():
+        assert "status_history" not in ticket
+        assert "alerts" not in ticket
+
+    count_queries.clear()
+    response = client.get("/dashboard", params={"include": "alerts"})
+    assert len(count_queries) == 3
+    assert all("alerts" in t and "status_history" not in t for t in response.json())
+
+
+def test_get_ticket_query_count(db_session, count_queries, ticket_event):
+    _ingest_tickets_with_relations(db_session, ticket_event, "detail", 1)
+    count_queries.clear()
+    response = client.get("/tickets/detail0")
+    assert response.status_code == 200
+    assert len(response.json()["alerts"]) == 1
+    assert len(count_queries) == 4
+
+
+def test_ingest_query_count_does_not_grow_with_relations(monkeypatch, count_queries):
+    monkeypatch.setattr("src.main.evaluate_slas_for_ticket", lambda ticket_id: None)
+    now = datetime.now(timezone.utc).isoformat()
+    events = [{"id": f"ingestq{i}", "priority": "high", "created_at": now, "updated_at": now,
+               "status": "open", "customer_tier": "gold"} for i in range(5)]
+    # the first write of each value adds it to lookup_values
+    codebook.register({("priority", "high"), ("status", "open"), ("customer_tier", "gold")})
+    count_queries.clear()
+    response = client.post("/tickets", json=events, params={"include": ""})
+    assert response.status_code == 200
+    assert all("status_history" not in t for t in response.json())
+    per_event = len(count_queries)
+
+    count_queries.clear()
+    events = [dict(e, id=f"ingestq-full{i}") for i, e in enumerate(events)]
+    client.post("/tickets", json=events)
+    # Embedding history and alerts costs two extra SELECTs for the whole batch
+    assert len(count_queries) == per_event + 2
+
+
+def test_invalid_include():
+    response = client.get("/dashboard", params={"include": "everything"})
+    assert response.status_code == 400
+
+
+def test_dashboard_filters_by_tier_and_priority(monkeypatch):
+    monkeypatch.setattr("src.main.evaluate_slas_for_ticket", lambda ticket_id: None)
+    now = datetime.now(timezone.utc).isoformat()
+    events = [
+        {"id": "tierp1", "priority": "high", "created_at": now, "updated_at": now, "status": "open",
+         "customer_tier": "platinum"},
+        {"id": "tierp2", "priority": "low", "created_at": now, "updated_at": now, "status": "open",
+         "customer_tier": "platinum"},
+    ]
+    client.post("/tickets", json=events)
+    response = client.get("/dashboard", params={"customer_tier": "platinum", "priority": "high"})
+    assert response.status_code == 200
+    data = response.json()
+    assert [t["id"] for t in data] == ["tierp1"]
+    assert data[0]["sla_state"] == "ok"
+
+
+def test_get_ticket_conditional_get(db_session, count_queries, ticket_event):
+    from src import crud, models
+    from src.cache import response_cache
+    _ingest_tickets_with_relations(db_session, ticket_event, "etag", 1)
+    response = client.get("/tickets/etag0")
+    etag = response.headers["ETag"]
+
+    # Served from the response cache without touching the database
+    count_queries.clear()
+    not_modified = client.get("/tickets/etag0", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
+    assert count_queries == []
+
+    # Without the cache, only the version probe runs before answering 304
+    response_cache.clear()
+    not_modified = client.get("/tickets/etag0", headers={"If-None-Match": f'W/{etag}'})
+    assert not_modified.status_code == 304
+    assert len(count_queries) == 1
+
+    crud.create_alert(db_session, "etag0", "response", models.SLAState.BREACH, {})
+    changed = client.get("/tickets/etag0", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_dashboard_conditional_get(monkeypatch):
+    from src.cache import response_cache
+    ids = _ingest_spaced_tickets(monkeypatch, "etagd", 2)
+    params = {"limit": 1000, "include": ""}
+    etag = client.get("/dashboard", params=params).headers["ETag"]
+    response_cache.clear()
+    assert client.get("/dashboard", params=params, headers={"If-None-Match": etag}).status_code == 304
+    # Different parameters, different representation
+    other = client.get("/dashboard", params={"limit": 10}, headers={"If-None-Match": etag})
+    assert other.status_code == 200
+
+    later = datetime(2031, 1, 1, tzinfo=timezone.utc).isoformat()
+    client.post("/tickets", json=[{"id": ids[0], "priority": "low", "created_at": later, "updated_at": later,
+                                   "status": "pending", "customer_tier": "gold"}])
+    response_cache.clear()
+    assert client.get("/dashboard", params=params, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_get_missing_ticket_with_etag():
+    response = client.get("/tickets/missing", headers={"If-None-Match": "*"})
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("include", [None, "", "alerts"])
+def test_dashboard_fast_path_matches_model_path(db_session, include, ticket_event):
+    from src.cache import response_cache
+    _ingest_tickets_with_relations(db_session, ticket_event, f"fast-{include}-", 3)
+    params = {"limit": 1000}
+    if include is not None:
+        params["include"] = include
+    regular = client.get("/dashboard", params=params)
+    response_cache.clear()
+    fast = client.get("/dashboard", params=dict(params, fast="true"))
+    assert fast.status_code == 200
+    assert fast.content == regular.content
+    assert fast.headers["ETag"] == regular.headers["ETag"]
+
+
+def test_dashboard_model_path_orders_relationships_like_the_fast_path(db_session, count_queries, ticket_event):
+    _ingest_tickets_with_relations(db_session, ticket_event, "ordered-", 2)
+    count_queries.clear()
+    assert client.get("/dashboard", params={"limit": 1000}).status_code == 200
+    relation_queries = [q for q in count_queries if "ticket_id IN" in q]
+    assert len(relation_queries) == 2
+    for statement in relation_queries:
+        assert "ORDER BY ticket_status_history.id" in statement or "ORDER BY alerts.id" in statement
+
+
+def test_dashboard_fast_path_streams_large_pages(db_session, monkeypatch, ticket_event):
+    from src.cache import response_cache
+    _ingest_tickets_with_relations(db_session, ticket_event, "stream", 5)
+    monkeypatch.setattr("src.main.settings.SERIALIZATION_CHUNK_SIZE", 2)
+    regular = client.get("/dashboard", params={"limit": 1000})
+    response_cache.clear()
+    streamed = client.get("/dashboard", params={"limit": 1000, "fast": "true"})
+    assert streamed.status_code == 200
+    assert streamed.content == regular.content
+    # The streamed body is cached once complete
+    hits = response_cache.stats()["hits"]
+    assert client.get("/dashboard", params={"limit": 1000, "fast": "true"}).content == regular.content
+    assert response_cache.stats()["hits"] == hits + 1
+
+
+def test_ingest_fast_path_matches_model_path(monkeypatch):
+    monkeypatch.setattr("src.main.evaluate_slas_for_ticket", lambda ticket_id: None)
+    now = datetime.now(timezone.utc).isoformat()
+    event = {"id": "fastingest", "priority": "high", "created_at": now, "updated_at": now,
+             "status": "open", "customer_tier": "gold"}
+    fast = client.post("/tickets", json=[event, dict(event, id="fastingest2")], params={"fast": "true"})
+    regular = client.post("/tickets", json=[event, dict(event, id="fastingest2")])
+    assert fast.status_code == 200
+    assert fast.json() == regular.json()
+    assert [t["id"] for t in fast.json()] == ["fastingest", "fastingest2"]
+
+
+def _ticket_with_alerts(db_session, ticket_event, ticket_id, count):
+    from src import crud, models
+    crud.create_ticket(db_session, ticket_event(ticket_id))
+    for i in range(count):
+        crud.create_alert(db_session, ticket_id, "response", models.SLAState.ALERT, {"percent_used": 0.85 + i / 100})
+    db_session.expire_all()
+
+
+def test_ticket_alerts_cursor_pagination(db_session, ticket_event):
+    _ticket_with_alerts(db_session, ticket_event, "subres-1", 5)
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+        response = client.get("/tickets/subres-1/alerts", params=params)
+        assert response.status_code == 200
+        seen.extend(a["details"]["percent_used"] for a in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert seen == sorted(seen) and len(seen) == 5
+
+    history = client.get("/tickets/subres-1/history")
+    assert [h["status"] for h in history.json()] == ["open"]
+
+
+def test_ticket_alerts_time_range(db_session, ticket_event):
+    from src import models
+    _ticket_with_alerts(db_session, ticket_event, "subres-2", 3)
+    alerts = db_session.query(models.Alert).filter_by(ticket_id="subres-2").order_by(models.Alert.id).all()
+    since = alerts[1].created_at.isoformat()
+    response = client.get("/tickets/subres-2/alerts", params={"since": since})
+    assert len(response.json()) == 2
+    response = client.get("/tickets/subres-2/alerts", params={"until": since})
+    assert len(response.json()) == 1
+
+
+def test_ticket_subresources_missing_ticket_and_bad_cursor():
+    assert client.get("/tickets/no-such-ticket/alerts").status_code == 404
+    assert client.get("/tickets/no-such-ticket/history").status_code == 404
+    assert client.get("/tickets/x/alerts", params={"cursor": "bogus"}).status_code == 400
+
+
+def test_get_ticket_latest_bounds_embedded_rows(db_session, ticket_event):
+    _ticket_with_alerts(db_session, ticket_event, "subres-3", 4)
+    response = client.get("/tickets/subres-3", params={"latest": 2})
+    assert response.status_code == 200
+    data = response.json()
+    assert [a["details"]["percent_used"] for a in data["alerts"]] == [0.87, 0.88]
+    assert len(data["status_history"]) == 1
+    assert len(client.get("/tickets/subres-3").json()["alerts"]) == 4
+
+
+def test_alerts_raised_on_ingest_record_percent_used(monkeypatch):
+    from src.config import SLAConfigSnapshot
+    snapshot = SLAConfigSnapshot({"gold": {"high": {"response": 60, "resolution": 240}}})
+    monkeypatch.setattr("src.scheduler.get_sla_config", lambda: snapshot)
+    created = datetime(2000, 1, 1, tzinfo=timezone.utc).isoformat()
+    event = {"id": "ingest-breach", "priority": "high", "created_at": created, "updated_at": created,
+             "status": "open", "customer_tier": "gold"}
+    assert client.post("/tickets", json=[event]).status_code == 200
+
+    alerts = client.get("/alerts", params={"min_percent_used": 0}).json()
+    (alert,) = [a for a in alerts if a["ticket_id"] == "ingest-breach"]
+    assert alert["state"] == "breach"
+    assert alert["details"]["percent_used"] > 1
+    assert alert["details"]["percent_used"] == pytest.approx(
+        alert["details"]["elapsed_minutes"] / alert["details"]["target_minutes"]
+    )
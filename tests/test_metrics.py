@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+from fastapi.testclient import TestClient
+
+from src import crud, metrics
+from src.main import app
+from src.metrics import MetricsRegistry
+
+client = TestClient(app)
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram("op_seconds", "Op latency.", ("op",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        latency.observe(value, "read")
+    registry.counter("ops_total", "Ops.")
+    registry.gauge("depth", "Depth.").set_function(lambda: 7)
+
+    text = registry.render()
+    assert '# TYPE op_seconds histogram' in text
+    assert 'op_seconds_bucket{op="read",le="0.1"} 1' in text
+    assert 'op_seconds_bucket{op="read",le="1"} 3' in text
+    assert 'op_seconds_bucket{op="read",le="+Inf"} 4' in text
+    assert 'op_seconds_sum{op="read"} 4.25' in text
+    assert 'op_seconds_count{op="read"} 4' in text
+    # unlabeled series are exported before their first observation
+    assert "ops_total 0" in text
+    assert "depth 7" in text
+
+
+def test_ingest_counts_accepted_and_stale_events(db_session, ticket_event):
+    accepted = metrics.ticket_events.value("accepted")
+    stale = metrics.ticket_events.value("stale")
+    event = ticket_event("metrics-1")
+    crud.update_ticket(db_session, event)
+    crud.update_ticket(db_session, event)
+    crud.update_ticket(db_session, event.model_copy(update={"updated_at": event.created_at + timedelta(minutes=1)}))
+
+    assert metrics.ticket_events.value("accepted") == accepted + 2
+    assert metrics.ticket_events.value("stale") == stale + 1
+
+
+def test_metrics_endpoint_reports_route_templates(db_session):
+    before = metrics.http_request_duration.count("GET", "/tickets/{ticket_id}", "404")
+    client.get("/tickets/metrics-missing")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert metrics.http_request_duration.count("GET", "/tickets/{ticket_id}", "404") == before + 1
+    assert 'route="/tickets/{ticket_id}"' in response.text
+    assert "sla_config_version" in response.text
+    assert "# TYPE websocket_connections gauge" in response.text
@@ -0,0 +1,103 @@
+import asyncio
+import pstats
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from src import settings
+from src.logging_middleware import StructuredLoggingMiddleware
+from src.main import app
+from src.profiling import profiled_job, profiler
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler, "profile_dir", str(tmp_path))
+    yield tmp_path
+    profiler.arm(0, mode="cprofile")
+
+
+def test_armed_requests_are_profiled_once(profile_dir, db_session, admin_enabled):
+    assert client.post("/admin/profile", params={"requests": 1}).json()["requests"] == 1
+
+    response = client.get("/tickets/profile-missing")
+    name = response.headers["X-Profile"]
+    assert name.endswith(".pstats")
+    stats = pstats.Stats(str(profile_dir / name))
+    assert stats.total_calls > 0
+
+    assert "X-Profile" not in client.get("/tickets/profile-missing").headers
+    listing = client.get("/admin/profiles").json()
+    assert [p["name"] for p in listing["profiles"]] == [name]
+    assert listing["armed"]["requests"] == 0
+    assert client.get(f"/admin/profiles/{name}").content == (profile_dir / name).read_bytes()
+    assert client.get("/admin/profiles/..%2Fsettings.py").status_code == 404
+
+
+def test_profile_header_requires_opt_in(profile_dir, db_session, monkeypatch):
+    assert "X-Profile" not in client.get("/tickets/profile-missing", headers={"X-Profile": "1"}).headers
+    monkeypatch.setattr(settings, "PROFILE_HEADER_ENABLED", True)
+    assert "X-Profile" in client.get("/tickets/profile-missing", headers={"X-Profile": "1"}).headers
+
+
+def test_armed_job_run_is_sampled_as_collapsed_stacks(profile_dir, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_SAMPLE_INTERVAL_MS", 1.0)
+
+    def evaluate_slas():
+        time.sleep(0.05)
+
+    job = profiled_job("evaluate_slas")(evaluate_slas)
+    profiler.arm(jobs=("evaluate_slas",), mode="sample")
+    job()
+    job()  # only the next run
+
+    (profile,) = profile_dir.iterdir()
+    assert profile.name.endswith("-evaluate_slas.collapsed")
+    stack, count = profile.read_text().splitlines()[0].rsplit(" ", 1)
+    assert stack.split(";")[-1].startswith("evaluate_slas (test_profiling.py")
+    assert int(count) > 1
+
+
+def test_arming_rejects_unknown_jobs_and_modes(admin_enabled):
+    assert client.post("/admin/profile", params={"job": "nope"}).status_code == 400
+    assert client.post("/admin/profile", params={"mode": "perf"}).status_code == 400
+
+
+def test_concurrent_armed_requests_run_one_cprofile(profile_dir, db_session):
+    async def slow_app(scope, receive, send):
+        # both requests are in flight on the event loop before either ends
+        await asyncio.sleep(0.05)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=StructuredLoggingMiddleware(slow_app))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+            return await asyncio.gather(async_client.get("/first"), async_client.get("/second"))
+
+    profiler.arm(2, mode="cprofile")
+    responses = asyncio.run(scenario())
+    assert [response.status_code for response in responses] == [200, 200]
+    names = sorted(response.headers["X-Profile"] for response in responses)
+    assert sorted(name.rsplit(".", 1)[1] for name in names) == ["collapsed", "pstats"]
+    assert sorted(path.name for path in profile_dir.iterdir()) == names
+
+
+def test_admin_endpoints_are_off_by_default_and_take_a_token(monkeypatch):
+    paths = ["/admin/profiles", "/admin/profiles/x.pstats", "/admin/db", "/admin/hotset", "/admin/config",
+             "/admin/cache", "/admin/archive"]
+    assert settings.ADMIN_ENABLED is False
+    assert [client.get(path).status_code for path in paths] == [404] * len(paths)
+    assert client.post("/admin/profile", params={"requests": 1}).status_code == 404
+    assert client.post("/admin/backtest", json={"tiers": {}}).status_code == 404
+    assert profiler.status()["requests"] == 0
+
+    monkeypatch.setattr(settings, "ADMIN_ENABLED", True)
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "s3cret")
+    assert client.get("/admin/db").status_code == 403
+    assert client.get("/admin/db", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.get("/admin/db", headers={"X-Admin-Token": "s3cret"}).status_code == 200
@@ -0,0 +1,64 @@
+import logging
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from src import settings
+from src.main import app
+from src.querylog import current_stats, redact, track_queries, tracked_job
+
+client = TestClient(app)
+
+
+def _connection():
+    # outside the db_session fixture, whose savepoints are statements too
+    return create_engine("sqlite://").connect()
+
+
+def test_track_queries_counts_statements_in_context():
+    conn = _connection()
+    with track_queries("cid-1", "test") as stats:
+        conn.execute(text("SELECT 1"))
+        conn.execute(text("SELECT 2"))
+        assert current_stats() is stats
+    conn.execute(text("SELECT 3"))
+
+    assert stats.count == 2
+    assert stats.seconds > 0
+    assert current_stats() is None
+
+
+def test_slow_queries_are_logged_with_parameters_redacted(monkeypatch, caplog):
+    conn = _connection()
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 1e-6)
+    with caplog.at_level(logging.WARNING, logger="src.querylog.slow"):
+        with track_queries("cid-slow", "test"):
+            conn.execute(text("SELECT :ticket_id"), {"ticket_id": "secret-ticket"})
+
+    record = next(r.msg for r in caplog.records if r.name == "src.querylog.slow")
+    assert record["correlation_id"] == "cid-slow"
+    assert record["statement"].startswith("SELECT")
+    assert "secret-ticket" not in repr(record)
+    assert redact([{"a": 1}, {"a": 2}]) == {"rows": 2, "first": {"a": "?"}}
+
+
+def test_debug_mode_adds_query_headers(db_session, monkeypatch):
+    response = client.get("/tickets/querylog-missing")
+    assert "X-Query-Count" not in response.headers
+
+    monkeypatch.setattr(settings, "DEBUG", True)
+    response = client.get("/tickets/querylog-missing")
+    assert response.status_code == 404
+    assert int(response.headers["X-Query-Count"]) >= 1
+    assert float(response.headers["X-Query-Time-Ms"]) >= 0
+
+
+def test_tracked_job_logs_queries_per_run(caplog):
+    conn = _connection()
+    job = tracked_job("probe")(lambda: conn.execute(text("SELECT 1")))
+    with caplog.at_level(logging.INFO, logger="src.querylog"):
+        job()
+
+    record = next(r.msg for r in caplog.records if isinstance(r.msg, dict) and r.msg.get("job") == "probe")
+    assert record["queries"] == 1
+    assert record["correlation_id"]
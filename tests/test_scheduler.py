@@ -6,9 +6,6 @@ from src import scheduler, models, crud
 def test_evaluate_slas_triggers_alert(monkeypatch, db_session):
     # Fake config: target 1 minute so breach immediately
     monkeypatch.setattr(scheduler, "get_sla_config", lambda: {"gold": {"high": {"response": 1, "resolution": 2}}})
-    # Chunk SessionLocal
-    monkeypatch.setattr(scheduler, "SessionLocal", lambda: db_session)
-    monkeypatch.setattr("src.scheduler.db", db_session)
     # Capture created alerts
     created = []
     monkeypatch.setattr("src.crud.create_alert", lambda db, tid, sla_type, state, details: created.append((tid, sla_type, state)))
@@ -33,8 +30,6 @@ def test_evaluate_slas_config_error(monkeypatch, db_session):
     def bad_config():
         raise Exception("Config error!")
     monkeypatch.setattr(scheduler, "get_sla_config", bad_config)
-    monkeypatch.setattr(scheduler, "SessionLocal", lambda: db_session)
-    monkeypatch.setattr("src.scheduler.db", db_session)
     # Should not raise, just log error
     scheduler.evaluate_slas()
 
@@ -45,8 +40,6 @@ def test_evaluate_slas_db_error(monkeypatch, db_session):
     def bad_query(*args, **kwargs):
         raise Exception("DB error!")
     monkeypatch.setattr(db_session, "query", bad_query)
-    monkeypatch.setattr(scheduler, "SessionLocal", lambda: db_session)
-    monkeypatch.setattr("src.scheduler.db", db_session)
     # Should not raise, just log error
     scheduler.evaluate_slas()
 
@@ -66,3 +59,42 @@ def test_start_scheduler(monkeypatch):
     monkeypatch.setattr("src.scheduler.BackgroundScheduler", lambda: dummy_scheduler)
     scheduler.start_scheduler()
     assert started.get("job") and started.get("started")
+
+
+def test_evaluate_slas_breach_and_config_version(monkeypatch, db_session):
+    from src.config import SLAConfigSnapshot
+    snapshot = SLAConfigSnapshot({"sched-tier": {"high": {"response": 10, "resolution": 100}}}, version=7)
+    monkeypatch.setattr(scheduler, "get_sla_config", lambda: snapshot)
+    created = []
+    monkeypatch.setattr("src.scheduler.process_alert", lambda tid, sla_type, state, details: created.append((sla_type, state, details)))
+    old_time = datetime.now(timezone.utc) - timedelta(minutes=20)
+    db_session.add(models.Ticket(id="sched-breach", priority="high", customer_tier="sched-tier",
+                                 created_at=old_time, updated_at=old_time, escalation_level=0))
+    db_session.commit()
+
+    scheduler.evaluate_slas()
+
+    # 20 of 10 minutes used: breached; 20 of 100: below the alert threshold
+    assert [(sla_type, state) for sla_type, state, _ in created] == [("response", models.SLAState.BREACH)]
+    assert created[0][2]["config_version"] == 7
+    assert created[0][2]["config_digest"] == snapshot.digest
+
+
+def test_reevaluate_changed_cells_only_touches_changed_tickets(monkeypatch, db_session):
+    from src.config import SLAConfigSnapshot
+    previous = SLAConfigSnapshot({"reeval": {"high": {"response": 100, "resolution": 200},
+                                             "low": {"response": 100, "resolution": 200}}}, version=1)
+    current = SLAConfigSnapshot({"reeval": {"high": {"response": 10, "resolution": 200},
+                                            "low": {"response": 100, "resolution": 200}}}, version=2)
+    created = []
+    monkeypatch.setattr("src.scheduler.process_alert", lambda tid, sla_type, state, details: created.append((tid, sla_type)))
+    old_time = datetime.now(timezone.utc) - timedelta(minutes=50)
+    for ticket_id, priority in (("reeval-high", "high"), ("reeval-low", "low")):
+        db_session.add(models.Ticket(id=ticket_id, priority=priority, customer_tier="reeval",
+                                     created_at=old_time, updated_at=old_time, escalation_level=0))
+    db_session.commit()
+
+    assert scheduler.reevaluate_changed_cells(previous, current) == 1
+    # only the changed cell is looked at, and only for the changed SLA type
+    assert created == [("reeval-high", "response")]
+    assert scheduler.reevaluate_changed_cells(current, current) == 0
@@ -0,0 +1,102 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.sse import HEARTBEAT_FRAME, AlertEventStream, encode_event
+
+
+async def _take(agen, count):
+    frames = []
+    async for frame in agen:
+        frames.append(frame)
+        if len(frames) == count:
+            break
+    await agen.aclose()
+    return frames
+
+
+def test_encode_event():
+    frame = encode_event({"alert_id": 7, "ticket_id": "t1"}, 7)
+    assert frame == b'id: 7\nevent: alert\ndata: {"alert_id":7,"ticket_id":"t1"}\n\n'
+
+
+def test_stream_shares_one_encoded_frame_between_subscribers():
+    stream = AlertEventStream(heartbeat_seconds=5)
+
+    async def scenario():
+        first = stream.subscribe()
+        second = stream.subscribe()
+        # Consume the retry preamble so both subscribers are live
+        await first.__anext__()
+        await second.__anext__()
+        pending = [asyncio.ensure_future(first.__anext__()), asyncio.ensure_future(second.__anext__())]
+        await asyncio.sleep(0)
+        stream.publish({"alert_id": 1, "ticket_id": "t1"})
+        frames = await asyncio.gather(*pending)
+        assert stream.subscribers == 2
+        await first.aclose()
+        await second.aclose()
+        return frames
+
+    frames = asyncio.run(scenario())
+    assert frames[0] is frames[1]
+    assert frames[0].startswith(b"id: 1\n")
+    assert stream.subscribers == 0
+
+
+def test_stream_resumes_from_last_event_id():
+    stream = AlertEventStream(heartbeat_seconds=5)
+    for alert_id in (1, 2, 3):
+        stream.publish({"alert_id": alert_id, "ticket_id": "t1"})
+
+    frames = asyncio.run(_take(stream.subscribe(last_event_id="1"), 2))
+    assert frames[0].startswith(b"retry:")
+    assert b"id: 2\n" in frames[1] and b"id: 3\n" in frames[1]
+    assert b"id: 1\n" not in frames[1]
+
+
+def test_stream_unknown_last_event_id_starts_live():
+    stream = AlertEventStream(heartbeat_seconds=0.01)
+    stream.publish({"alert_id": 1, "ticket_id": "t1"})
+
+    frames = asyncio.run(_take(stream.subscribe(last_event_id="not-a-number"), 2))
+    assert frames[1] == HEARTBEAT_FRAME
+
+
+def test_stream_buffer_is_bounded():
+    stream = AlertEventStream(buffer_size=2, heartbeat_seconds=5)
+    for alert_id in (1, 2, 3):
+        stream.publish({"alert_id": alert_id, "ticket_id": "t1"})
+
+    # the client saw 1, the event dropped from the buffer: nothing is missing
+    frames = asyncio.run(_take(stream.subscribe(last_event_id="1"), 2))
+    assert b"id: 1\n" not in frames[1]
+    assert b"id: 2\n" in frames[1] and b"id: 3\n" in frames[1]
+
+
+def test_stream_expired_last_event_id_starts_live():
+    stream = AlertEventStream(buffer_size=2, heartbeat_seconds=0.01)
+    for alert_id in (1, 2, 3):
+        stream.publish({"alert_id": alert_id, "ticket_id": "t1"})
+
+    # 1 was dropped before the client saw it: no partial replay
+    frames = asyncio.run(_take(stream.subscribe(last_event_id="0"), 2))
+    assert frames[1] == HEARTBEAT_FRAME
+
+
+def test_alerts_stream_endpoint(monkeypatch):
+    seen = {}
+
+    async def fake_subscribe(last_event_id=None):
+        seen["last_event_id"] = last_event_id
+        yield encode_event({"alert_id": 5, "ticket_id": "t1"}, 5)
+
+    monkeypatch.setattr("src.main.alert_stream.subscribe", fake_subscribe)
+    client = TestClient(app)
+    response = client.get("/alerts/stream", headers={"Last-Event-ID": "4"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+    assert response.text.startswith("id: 5\n")
+    assert seen["last_event_id"] == "4"
@@ -0,0 +1,79 @@
+import random
+from datetime import timedelta
+
+from fastapi.testclient import TestClient
+
+from src import crud, models, scheduler
+from src.main import app
+from src.stats import QuantileSketch, SLAStats, sla_stats
+
+client = TestClient(app)
+
+
+def test_quantile_sketch_relative_accuracy():
+    rng = random.Random(42)
+    values = [rng.lognormvariate(0, 1) for _ in range(10000)]
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+    values.sort()
+    for q in (0.5, 0.95):
+        exact = values[int(q * (len(values) - 1))]
+        assert abs(sketch.quantile(q) - exact) / exact <= 0.011
+    assert sketch.count == 10000
+    assert QuantileSketch().quantile(0.5) is None
+
+
+def test_counters_follow_ticket_writes(db_session, ticket_event):
+    before = sla_stats.snapshot()["by_customer_tier"].get("stats-tier", 0)
+    crud.update_ticket(db_session, ticket_event("stats-1", customer_tier="stats-tier"))
+    crud.update_ticket(db_session, ticket_event("stats-2", "low", "stats-tier"))
+    crud.create_alert(db_session, "stats-1", "response", models.SLAState.BREACH, {})
+
+    snapshot = sla_stats.snapshot()
+    assert snapshot["by_customer_tier"]["stats-tier"] == before + 2
+
+    # moving a ticket to another tier moves its count along
+    later = ticket_event("stats-2", "low", "stats-other")
+    later.updated_at += timedelta(minutes=1)
+    crud.update_ticket(db_session, later)
+    snapshot = sla_stats.snapshot()
+    assert snapshot["by_customer_tier"]["stats-tier"] == before + 1
+    assert snapshot["by_customer_tier"]["stats-other"] >= 1
+
+
+def test_reconcile_corrects_drift(db_session, ticket_event):
+    crud.update_ticket(db_session, ticket_event("stats-rec-1", customer_tier="stats-rec"))
+    crud.update_ticket(db_session, ticket_event("stats-rec-2", customer_tier="stats-rec"))
+    stats = SLAStats()
+    stats.ticket_changed(None, ("stats-rec", "high", "ok"))
+
+    assert stats.reconcile(db_session) >= 1
+    assert stats.snapshot()["by_customer_tier"]["stats-rec"] == 2
+    assert stats.reconcile(db_session) == 0
+    assert stats.reconciled_at is not None
+
+
+def test_evaluation_pass_feeds_percent_used(monkeypatch, db_session, ticket_event):
+    monkeypatch.setattr(scheduler, "get_sla_config", lambda: {"stats-pct": {"high": {"response": 100, "resolution": 200}}})
+    monkeypatch.setattr("src.scheduler.process_alert", lambda *args: None)
+    stats = SLAStats()
+    monkeypatch.setattr("src.scheduler.sla_stats", stats)
+    crud.update_ticket(db_session, ticket_event("stats-pct-1", customer_tier="stats-pct", minutes_ago=50))
+
+    scheduler.evaluate_slas()
+
+    response = stats.snapshot()["percent_used"]["response"]
+    assert response["count"] == 1
+    assert abs(response["p50"] - 0.5) < 0.01
+    assert stats.evaluated_at is not None
+
+
+def test_stats_endpoint(db_session, ticket_event):
+    crud.update_ticket(db_session, ticket_event("stats-api-1", customer_tier="stats-api"))
+    response = client.get("/stats")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["by_customer_tier"]["stats-api"] == 1
+    assert data["tickets"] == sum(data["by_sla_state"].values())
+    assert set(data["percent_used"]) == {"response", "resolution"}